@@ -0,0 +1,136 @@
+"""Per-task accounting of LLM calls by purpose and usefulness.
+
+Telemetry says how long calls took; `CallLedger` says what they were for
+and whether their output was used. The repair loop wraps every step that
+talks to a model in `ledger.scope(purpose)`; each call finished inside the
+scope (on the same thread) is recorded under that purpose, and the loop
+marks the scope's records unused when the output is thrown away: a losing
+best-of-N candidate, a discarded speculative coder call, an unparseable
+interaction, a follow-up program that is never run.
+
+`wasted_ratio` is the share of generated tokens spent on unused output.
+Entering a scope once `max_calls` real (uncached) calls have been made
+raises `CallLimitExceeded`, so the per-task limit (`budget.llm_calls`, or
+`MAX_LLM_CALLS_PER_TASK` without a call budget) holds even within an
+iteration.
+"""
+
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from core.constants import MAX_LLM_CALLS_PER_TASK
+
+
+class CallLimitExceeded(RuntimeError):
+    """Raised when a task tries to make more LLM calls than allowed."""
+
+
+@dataclass
+class CallRecord:
+    purpose: str
+    role: Optional[str]
+    model: str
+    prompt_tokens: int = 0
+    eval_tokens: int = 0
+    wall_s: float = 0.0
+    cached: bool = False
+    used: bool = True
+
+
+class Scope:
+    """The calls made for one step of the loop."""
+
+    def __init__(self, purpose: str):
+        self.purpose = purpose
+        self.records: List[CallRecord] = []
+        self.used = True
+
+
+class CallLedger:
+    """Every LLM call of one task, tagged with the loop step that made it."""
+
+    def __init__(self, max_calls: Optional[int] = MAX_LLM_CALLS_PER_TASK):
+        self.max_calls = max_calls
+        self.records: List[CallRecord] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self) -> int:
+        """Calls that reached a server (cache hits are free)."""
+        return sum(1 for r in self.records if not r.cached)
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def scope(self, purpose: str) -> Iterator[Scope]:
+        """Attribute calls made by this thread to `purpose` until the block ends."""
+        if self.max_calls and self.calls >= self.max_calls:
+            raise CallLimitExceeded(f"{self.calls} LLM calls made; the limit per task is {self.max_calls}")
+        scope = Scope(purpose)
+        stack = self._stack()
+        stack.append(scope)
+        try:
+            yield scope
+        finally:
+            stack.pop()
+
+    def record(self, stats) -> CallRecord:
+        """Account for one finished call (a `CallStats`)."""
+        stack = self._stack()
+        scope = stack[-1] if stack else None
+        record = CallRecord(
+            scope.purpose if scope is not None else stats.role or "other",
+            stats.role,
+            stats.model,
+            stats.prompt_tokens,
+            stats.eval_tokens,
+            stats.wall_s,
+            stats.cached,
+        )
+        with self._lock:
+            if scope is not None:
+                record.used = scope.used
+                scope.records.append(record)
+            self.records.append(record)
+        return record
+
+    def mark(self, scope: Optional[Scope], used: bool) -> None:
+        """Record whether the output of `scope` was used, including calls still running."""
+        if scope is None:
+            return
+        with self._lock:
+            scope.used = used
+            for record in scope.records:
+                record.used = used
+
+    def by_purpose(self) -> Dict[str, List[CallRecord]]:
+        purposes: Dict[str, List[CallRecord]] = {}
+        for record in self.records:
+            purposes.setdefault(record.purpose, []).append(record)
+        return purposes
+
+    @property
+    def wasted_ratio(self) -> float:
+        """Share of generated tokens whose output was not used."""
+        total = sum(r.eval_tokens for r in self.records if not r.cached)
+        wasted = sum(r.eval_tokens for r in self.records if not r.cached and not r.used)
+        return wasted / total if total else 0.0
+
+    def summary(self) -> str:
+        unused = [r for r in self.records if not r.used and not r.cached]
+        parts = []
+        for purpose, records in self.by_purpose().items():
+            idle = sum(1 for r in records if not r.used)
+            parts.append(f"{purpose} {len(records)}" + (f" ({idle} unused)" if idle else ""))
+        limit = f"/{self.max_calls}" if self.max_calls else ""
+        return (
+            f"Calls: {self.calls}{limit} ({', '.join(parts) or 'none'}); "
+            f"wasted generation {self.wasted_ratio:.0%} "
+            f"({sum(r.eval_tokens for r in unused)} tokens in {len(unused)} unused calls)"
+        )
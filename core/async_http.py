@@ -0,0 +1,117 @@
+"""Minimal asyncio HTTP client for streaming JSON-lines responses.
+
+Model servers answer `/api/generate` with newline-delimited JSON, usually as a
+chunked HTTP/1.1 body. This module reads such a response on a plain asyncio
+socket so that a single event loop can drive many concurrent model streams
+without a thread per stream and without extra dependencies.
+
+Cancelling the consuming task (or calling `aclose()` on the generator) closes
+the socket, which tells the server to stop generating.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+
+class AsyncHTTPError(Exception):
+    """Raised when the server answers with a non-2xx status."""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"{status} {reason}")
+        self.status = status
+
+
+async def _read_headers(reader: asyncio.StreamReader):
+    status_line = (await reader.readline()).decode("latin-1").strip()
+    parts = status_line.split(" ", 2)
+    if len(parts) < 2 or not parts[1].isdigit():
+        raise AsyncHTTPError(0, f"malformed status line: {status_line!r}")
+    status = int(parts[1])
+    reason = parts[2] if len(parts) > 2 else ""
+
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        key, _, value = line.partition(":")
+        headers[key.strip().lower()] = value.strip()
+    return status, reason, headers
+
+
+async def _iter_body(reader: asyncio.StreamReader, headers: dict) -> AsyncIterator[bytes]:
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                await reader.readline()
+                return
+            data = await reader.readexactly(size)
+            await reader.readexactly(2)
+            yield data
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining > 0:
+            data = await reader.read(min(remaining, 65536))
+            if not data:
+                return
+            remaining -= len(data)
+            yield data
+    else:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            yield data
+
+
+async def stream_lines(
+    url: str, payload: dict, timeout: Optional[float] = None
+) -> AsyncIterator[bytes]:
+    """POST `payload` as JSON to `url` and yield the response body line by line."""
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    host = parts.hostname or "localhost"
+    port = parts.port or (443 if secure else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port, ssl=secure or None), timeout
+    )
+    try:
+        body = json.dumps(payload).encode()
+        head = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Content-Type: application/json\r\n"
+            "Accept: application/x-ndjson\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+        status, reason, headers = await asyncio.wait_for(_read_headers(reader), timeout)
+        if status >= 400:
+            raise AsyncHTTPError(status, reason)
+
+        pending = b""
+        async for data in _iter_body(reader, headers):
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if pending.strip():
+            yield pending
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
@@ -0,0 +1,182 @@
+"""Inference backends: how `LLMInterface` talks to a model server.
+
+A backend turns the request `LLMInterface` builds (Ollama-shaped: `model`,
+`prompt`, `options`, ...) into the server's request body and decodes each
+streamed line back into an Ollama-shaped dict (`response`, `done`, token
+counts and timings), so the streaming generator contract, caching,
+telemetry and stop conditions are the same for every backend.
+
+- `ollama`: `/api/generate` NDJSON (the default);
+- `openai`: OpenAI-compatible `/v1/chat/completions` server-sent events, as
+  served by llama.cpp's server, vLLM and similar. These servers batch
+  concurrent requests across parallel slots and cache prompt prefixes
+  themselves, so KV `context` reuse and `keep_alive` do not apply.
+
+The backend for each role comes from the `provider` (and optional
+`endpoint`) of the `configs/models.toml` entry whose `role` matches, or
+whose `name` is the role's model.
+"""
+
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+NS_PER_MS = 1_000_000
+
+MODELS_TOML = Path(__file__).parent.parent / "configs" / "models.toml"
+
+# plugin roles -> role names used in models.toml
+ROLE_ALIASES = {"thinker": "primary", "summariser": "summarizer"}
+
+
+class Backend(ABC):
+    """Request/response dialect of a model server."""
+
+    name = ""
+    path = ""
+    # whether requests go through the Ollama endpoint pool
+    pooled = False
+    supports_context = False
+    default_endpoint = ""
+
+    @abstractmethod
+    def body(self, payload: dict) -> dict:
+        """Server request body for an Ollama-shaped `payload`."""
+
+    @abstractmethod
+    def decoder(self):
+        """Return a callable mapping one raw line to an Ollama-shaped dict or None."""
+
+
+class OllamaBackend(Backend):
+    name = "ollama"
+    path = "/api/generate"
+    pooled = True
+    supports_context = True
+    default_endpoint = "http://localhost:11434"
+
+    def body(self, payload: dict) -> dict:
+        return payload
+
+    def decoder(self):
+        def decode(line: bytes) -> Optional[dict]:
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                # Ignore non-JSON lines
+                return None
+
+        return decode
+
+
+class _ChatStream:
+    """Decode OpenAI-style SSE chunks, keeping usage for the final dict."""
+
+    def __init__(self):
+        self.meta: dict = {}
+
+    def __call__(self, line: bytes) -> Optional[dict]:
+        line = line.strip()
+        if not line.startswith(b"data:"):
+            return None
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            return dict(self.meta, response="", done=True)
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            return None
+
+        usage = chunk.get("usage") or {}
+        if usage:
+            self.meta["prompt_eval_count"] = usage.get("prompt_tokens", 0)
+            self.meta["eval_count"] = usage.get("completion_tokens", 0)
+        # llama.cpp reports per-phase timings in milliseconds
+        timings = chunk.get("timings") or {}
+        if timings:
+            self.meta["prompt_eval_duration"] = int(timings.get("prompt_ms", 0) * NS_PER_MS)
+            self.meta["eval_duration"] = int(timings.get("predicted_ms", 0) * NS_PER_MS)
+            self.meta["total_duration"] = self.meta["prompt_eval_duration"] + self.meta["eval_duration"]
+
+        text = "".join(
+            (choice.get("delta") or {}).get("content") or choice.get("text") or ""
+            for choice in chunk.get("choices") or []
+        )
+        return {"response": text, "done": False}
+
+
+class OpenAIBackend(Backend):
+    name = "openai"
+    path = "/v1/chat/completions"
+    default_endpoint = "http://localhost:8080"
+
+    # Ollama option -> OpenAI request field
+    OPTION_FIELDS = {
+        "num_predict": "max_tokens",
+        "stop": "stop",
+        "seed": "seed",
+        "top_p": "top_p",
+        "top_k": "top_k",
+        "presence_penalty": "presence_penalty",
+        "frequency_penalty": "frequency_penalty",
+    }
+
+    def body(self, payload: dict) -> dict:
+        options = payload.get("options") or {}
+        body = {
+            "model": payload["model"],
+            "messages": [{"role": "user", "content": payload.get("prompt", "")}],
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            "temperature": options.get("temperature", payload.get("temperature", 0.0)),
+        }
+        for option, field in self.OPTION_FIELDS.items():
+            if option in options:
+                body[field] = options[option]
+        return body
+
+    def decoder(self):
+        return _ChatStream()
+
+
+BACKENDS: Dict[str, type] = {
+    "ollama": OllamaBackend,
+    "openai": OpenAIBackend,
+    "openai-compatible": OpenAIBackend,
+    "llama.cpp": OpenAIBackend,
+    "vllm": OpenAIBackend,
+}
+
+
+def get_backend(provider: Optional[str]) -> Backend:
+    """Instantiate the backend for a models.toml `provider` value."""
+    key = (provider or "ollama").lower()
+    if key not in BACKENDS:
+        raise ValueError(f"Unknown provider {provider!r}; expected one of {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[key]()
+
+
+def load_models(path: Path = MODELS_TOML) -> Dict[str, dict]:
+    """Read the model table; empty when the file or the toml package is missing."""
+    try:
+        import toml
+    except ImportError:
+        return {}
+    try:
+        return toml.load(str(path))
+    except (OSError, toml.TomlDecodeError):
+        return {}
+
+
+def resolve_backend(role: Optional[str], model_name: Optional[str], models: Optional[dict] = None) -> Tuple[Backend, Optional[str]]:
+    """Return `(backend, endpoint)` for a role, endpoint None meaning the default."""
+    models = load_models() if models is None else models
+    wanted = ROLE_ALIASES.get(role, role)
+    entries = [e for e in models.values() if isinstance(e, dict)]
+    entry = next((e for e in entries if wanted and e.get("role") == wanted), None)
+    if entry is None:
+        entry = next((e for e in entries if model_name and e.get("name") == model_name), None)
+    if entry is None:
+        return OllamaBackend(), None
+    return get_backend(entry.get("provider")), entry.get("endpoint")
@@ -0,0 +1,250 @@
+"""Run a corpus of tasks from a JSONL file on a pool of workers.
+
+Each line of the task file is a JSON object in the format of
+`examples/simple_task.json` (`{"task": ...}`), optionally with an `id` and
+`max_iterations`; a bare JSON string is taken as the task. Blank lines and
+lines starting with `#` are skipped. Tasks are read lazily, so a corpus of
+any size is never held in memory.
+
+`BatchRunner` runs at most `workers` tasks at once. Every worker builds one
+`RepairLoop` and reuses it for each task it picks up, so plugins, model
+clients and sandbox runners are created once per worker, and all workers
+share the process-wide HTTP connection pool, endpoint pool and response
+cache. A `BatchResult` is handed to the sink as soon as its task finishes
+(in completion order); `BatchSummary` reports success counts, throughput in
+tasks per hour and p50/p95 task latency.
+"""
+
+import json
+import logging
+import math
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
+
+from core.config import get_config
+
+
+@dataclass
+class BatchTask:
+    """One line of a task file."""
+
+    line: int
+    task: str
+    id: str
+    max_iterations: Optional[int] = None
+    # why the line could not be read; the task is reported, not run
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    id: str
+    line: int
+    task: str
+    success: bool
+    iterations: int = 0
+    seconds: float = 0.0
+    llm_calls: int = 0
+    code: Optional[str] = None
+    error: Optional[str] = None
+    worker: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def parse_task(text: str, line: int) -> BatchTask:
+    """Read one task line; raises ValueError when it is not a usable task."""
+    entry = json.loads(text)
+    if isinstance(entry, str):
+        entry = {"task": entry}
+    if not isinstance(entry, dict):
+        raise ValueError("expected a JSON object with a 'task' field")
+    task = entry.get("task")
+    if not isinstance(task, str) or not task.strip():
+        raise ValueError("missing 'task'")
+    max_iterations = entry.get("max_iterations")
+    if max_iterations is not None:
+        max_iterations = int(max_iterations)
+    return BatchTask(line, task.strip(), str(entry.get("id", line)), max_iterations)
+
+
+def read_tasks(lines: Iterable[str]) -> Iterator[BatchTask]:
+    """Yield the tasks of a JSONL task file, one per non-blank line."""
+    for number, text in enumerate(lines, start=1):
+        text = text.strip()
+        if not text or text.startswith("#"):
+            continue
+        try:
+            yield parse_task(text, number)
+        except (TypeError, ValueError) as e:
+            yield BatchTask(number, "", str(number), error=f"line {number}: {e}")
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of `values` (0.0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+@dataclass
+class BatchSummary:
+    succeeded: int = 0
+    failed: int = 0
+    errors: int = 0
+    wall_s: float = 0.0
+    # seconds per task that was run
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def tasks(self) -> int:
+        return self.succeeded + self.failed + self.errors
+
+    def add(self, result: BatchResult) -> None:
+        if result.error is not None:
+            self.errors += 1
+        elif result.success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        if result.seconds:
+            self.latencies.append(result.seconds)
+
+    @property
+    def tasks_per_hour(self) -> float:
+        return self.tasks / self.wall_s * 3600 if self.wall_s > 0 else 0.0
+
+    @property
+    def p50(self) -> float:
+        return percentile(self.latencies, 50)
+
+    @property
+    def p95(self) -> float:
+        return percentile(self.latencies, 95)
+
+    def summary(self) -> str:
+        return (
+            f"Batch: {self.tasks} tasks, {self.succeeded} succeeded, {self.failed} failed, "
+            f"{self.errors} errors in {self.wall_s:.1f}s; {self.tasks_per_hour:.1f} tasks/hour, "
+            f"latency p50 {self.p50:.1f}s p95 {self.p95:.1f}s"
+        )
+
+
+def default_loop(model_name: str = "qwen3:14b"):
+    """A `RepairLoop` logging to the log file."""
+    from core.logger import Logger
+    from core.repair_loop import RepairLoop
+
+    return RepairLoop(Logger(), model_name=model_name)
+
+
+class BatchRunner:
+    """Run tasks on `workers` long-lived repair loops.
+
+    `loop_factory` builds one loop per worker (default: `default_loop`);
+    `run_options` are passed to every `run_task` call.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_iterations: Optional[int] = None,
+        loop_factory: Optional[Callable[[], object]] = None,
+        warm_up: bool = False,
+        **run_options,
+    ):
+        config = get_config()
+        self.workers = max(int(workers or config.get("batch", "workers", 2)), 1)
+        self.max_iterations = max_iterations or config.get("repair", "max_iterations", 20)
+        self.loop_factory = loop_factory or default_loop
+        self.warm_up = warm_up
+        self.run_options = run_options
+        self.loops: list = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def stop(self) -> None:
+        """Start no new tasks; the ones running finish."""
+        self._stop.set()
+
+    def _run_one(self, worker: int, loop, item: BatchTask) -> BatchResult:
+        result = BatchResult(item.id, item.line, item.task, False, error=item.error, worker=worker)
+        if item.error is not None:
+            return result
+        start = time.perf_counter()
+        try:
+            result.code = loop.run_task(
+                item.task, max_iters=item.max_iterations or self.max_iterations, **self.run_options
+            )
+            result.success = bool(loop.last_success)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.seconds = round(time.perf_counter() - start, 3)
+        result.iterations = loop.telemetry.current
+        result.llm_calls = loop.ledger.calls
+        return result
+
+    def _work(self, worker: int, loop, tasks: "queue.Queue", sink, summary: BatchSummary) -> None:
+        while True:
+            item = tasks.get()
+            if item is None:
+                return
+            if self._stop.is_set():
+                continue
+            result = self._run_one(worker, loop, item)
+            with self._lock:
+                summary.add(result)
+                if sink is not None:
+                    try:
+                        sink(result)
+                    except Exception as e:
+                        loop.logger.log(f"[Batch] could not write result for {result.id}: {e}", level=logging.ERROR)
+
+    def run(self, tasks: Iterable[BatchTask], sink: Optional[Callable[[BatchResult], None]] = None) -> BatchSummary:
+        """Run every task, passing each `BatchResult` to `sink` as it finishes."""
+        if not self.loops:
+            self.loops = [self.loop_factory() for _ in range(self.workers)]
+            if self.warm_up:
+                self.loops[0].warm_up()
+        self._stop.clear()
+        summary = BatchSummary()
+        # at most one queued task per worker, so tasks are read as they are needed
+        pending: "queue.Queue" = queue.Queue(maxsize=self.workers)
+        threads = [
+            threading.Thread(target=self._work, args=(i, loop, pending, sink, summary), daemon=True)
+            for i, loop in enumerate(self.loops)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            for item in tasks:
+                if self._stop.is_set():
+                    break
+                pending.put(item)
+        except KeyboardInterrupt:
+            self.stop()
+            raise
+        finally:
+            for _ in threads:
+                pending.put(None)
+            for thread in threads:
+                thread.join()
+            summary.wall_s = time.perf_counter() - start
+        return summary
+
+
+def write_jsonl(stream: TextIO) -> Callable[[BatchResult], None]:
+    """Sink writing each result to `stream` as one flushed JSON line."""
+
+    def sink(result: BatchResult) -> None:
+        stream.write(result.to_json() + "\n")
+        stream.flush()
+
+    return sink
@@ -0,0 +1,140 @@
+"""Per-task resource budget with staged degradation.
+
+`TaskBudget` tracks wall-clock time, LLM calls, generated plus prompt
+tokens and sandbox seconds for one `RepairLoop.run_task`. Each dimension
+with a limit contributes a remaining fraction; the smallest one decides the
+degradation level, so the loop gets cheaper as any resource runs low:
+
+    FULL            normal operation
+    SKIP_EVALUATOR  score runs heuristically, without the LLM evaluator
+    SMALL_MODEL     thinker/coder switch to the configured smaller models
+    SHRINK_CONTEXT  error context passed to the models is truncated
+    EXHAUSTED       stop and return the best candidate so far
+
+Levels are cumulative. Every limit is off unless it is set in the `budget`
+config section or passed in (the CLI `--budget-seconds`/`--budget-calls`),
+so a task only degrades when a budget was asked for.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from core.config import get_config
+
+FULL = 0
+SKIP_EVALUATOR = 1
+SMALL_MODEL = 2
+SHRINK_CONTEXT = 3
+EXHAUSTED = 4
+
+LEVEL_NAMES = {
+    FULL: "full",
+    SKIP_EVALUATOR: "skip-evaluator",
+    SMALL_MODEL: "small-model",
+    SHRINK_CONTEXT: "shrink-context",
+    EXHAUSTED: "exhausted",
+}
+
+
+@dataclass
+class TaskBudget:
+    """Limits for one task (None = unlimited) and what has been used so far."""
+
+    wall_seconds: Optional[float] = None
+    llm_calls: Optional[int] = None
+    tokens: Optional[int] = None
+    sandbox_seconds: Optional[float] = None
+    # remaining fraction at or below which each level starts
+    thresholds: Dict[int, float] = field(
+        default_factory=lambda: {SKIP_EVALUATOR: 0.5, SMALL_MODEL: 0.3, SHRINK_CONTEXT: 0.15}
+    )
+    # role -> model used from SMALL_MODEL on
+    small_models: Dict[str, str] = field(default_factory=dict)
+    shrunk_context_chars: int = 800
+
+    calls_used: int = 0
+    tokens_used: int = 0
+    sandbox_used: float = 0.0
+    started_at: Optional[float] = None
+
+    @classmethod
+    def from_config(cls) -> "TaskBudget":
+        config = get_config()
+
+        def limit(key):
+            value = config.get("budget", key, 0)
+            return value if value else None
+
+        return cls(
+            wall_seconds=limit("wall_seconds"),
+            llm_calls=limit("llm_calls"),
+            tokens=limit("tokens"),
+            sandbox_seconds=limit("sandbox_seconds"),
+            small_models=dict(config.get("budget", "small_models", {}) or {}),
+            shrunk_context_chars=int(config.get("budget", "shrunk_context_chars", 800)),
+        )
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+        self.calls_used = 0
+        self.tokens_used = 0
+        self.sandbox_used = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+    def record_call(self, stats) -> None:
+        """Account for one finished LLM call (a `CallStats`)."""
+        if stats.cached:
+            return
+        self.calls_used += 1
+        self.tokens_used += stats.prompt_tokens + stats.eval_tokens
+
+    def record_sandbox(self, seconds: float) -> None:
+        self.sandbox_used += seconds
+
+    def remaining(self) -> Dict[str, float]:
+        """Remaining fraction (0..1) of every limited dimension."""
+        used = {
+            "wall_seconds": (self.elapsed, self.wall_seconds),
+            "llm_calls": (self.calls_used, self.llm_calls),
+            "tokens": (self.tokens_used, self.tokens),
+            "sandbox_seconds": (self.sandbox_used, self.sandbox_seconds),
+        }
+        return {
+            name: max(1.0 - spent / limit, 0.0)
+            for name, (spent, limit) in used.items()
+            if limit
+        }
+
+    @property
+    def level(self) -> int:
+        remaining = min(self.remaining().values(), default=1.0)
+        if remaining <= 0.0:
+            return EXHAUSTED
+        level = FULL
+        for candidate, threshold in sorted(self.thresholds.items()):
+            if remaining <= threshold:
+                level = max(level, candidate)
+        return level
+
+    @property
+    def exhausted(self) -> bool:
+        return self.level >= EXHAUSTED
+
+    def shrink(self, text: Optional[str]) -> Optional[str]:
+        """Keep only the tail of `text` once the budget is at SHRINK_CONTEXT."""
+        if text is None or self.level < SHRINK_CONTEXT or len(text) <= self.shrunk_context_chars:
+            return text
+        return "..." + text[-self.shrunk_context_chars :]
+
+    def summary(self) -> str:
+        parts = [f"{self.elapsed:.1f}s" + (f"/{self.wall_seconds:g}s" if self.wall_seconds else "")]
+        parts.append(f"{self.calls_used}" + (f"/{self.llm_calls}" if self.llm_calls else "") + " calls")
+        parts.append(f"{self.tokens_used}" + (f"/{self.tokens}" if self.tokens else "") + " tokens")
+        parts.append(
+            f"{self.sandbox_used:.1f}s" + (f"/{self.sandbox_seconds:g}s" if self.sandbox_seconds else "") + " sandbox"
+        )
+        return f"Budget: {', '.join(parts)} [{LEVEL_NAMES[self.level]}]"
@@ -0,0 +1,73 @@
+"""Best-of-N candidate generation.
+
+With `repair.n_candidates` above one, each repair iteration asks the coder
+for several programs at once instead of one. Candidates differ in sampling
+temperature and seed, are generated concurrently (using the server's
+parallel slots) and are run and scored in parallel; the highest score wins.
+Plugins are cloned per candidate because an `LLMInterface` keeps per-call
+state and must not stream two calls at once.
+"""
+
+import copy
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from core.accounting import Scope
+from core.evaluation import Verdict
+
+
+@dataclass
+class Candidate:
+    """One generated program and the result of running and scoring it."""
+
+    index: int
+    code: str
+    tests: Optional[str] = None
+    stdout: str = ""
+    stderr: str = ""
+    exitcode: int = -1
+    score: float = 0.0
+    # filled in when the tests were run through `core.test_harness`
+    tests_passed: Optional[int] = None
+    tests_total: Optional[int] = None
+    verdict: Optional[Verdict] = None
+    # the ledger scope of the calls that generated the code
+    calls: Optional[Scope] = None
+
+    def summary(self) -> str:
+        tests = f", {self.tests_passed}/{self.tests_total} tests" if self.tests_total else ""
+        return f"candidate {self.index + 1}: score {self.score} (exit code {self.exitcode}{tests})"
+
+
+def candidate_options(n: int, temperature: float = 0.0, spread: float = 0.8) -> List[dict]:
+    """Sampling options for `n` candidates.
+
+    The first candidate keeps `temperature`; the others step evenly up to
+    `temperature + spread`, each with its own seed so equal settings still
+    sample different programs.
+    """
+    if n <= 1:
+        return [{"temperature": temperature}]
+    return [
+        {"temperature": round(temperature + spread * i / (n - 1), 3), "seed": i}
+        for i in range(n)
+    ]
+
+
+def clone_plugin(plugin, **options):
+    """Copy of `plugin` with its own LLM interface (and `options`), for one thread.
+
+    Plugins without an `LLMInterface` are returned as they are and must be
+    safe to call concurrently.
+    """
+    llm = getattr(plugin, "llm", None)
+    if llm is None or not hasattr(llm, "clone"):
+        return plugin
+    twin = copy.copy(plugin)
+    twin.llm = llm.clone(**options)
+    return twin
+
+
+def best(candidates: Iterable[Candidate]) -> Candidate:
+    """Highest-scoring candidate; ties go to the lower index (cooler sampling)."""
+    return max(candidates, key=lambda c: (c.score, -c.index))
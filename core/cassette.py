@@ -0,0 +1,253 @@
+"""Record and replay LLM streams and sandbox results.
+
+A `Cassette` in record mode captures every LLM call (`LLMInterface.generate`
+and `agenerate`, including cache hits, errors and early stops) with the
+arrival time of each chunk, and every sandbox run the repair loop makes
+through `RepairLoop._run_timed`, whichever runner plugin performs it. In
+replay mode the same calls are served from the cassette without touching a
+model server or the sandbox, either instantly or with the recorded timings
+(`realtime`). That reproduces a production run offline and lets the loop
+and the stream parsers be benchmarked with the model taken out.
+
+The file is gzip-compressed JSONL, one record per call, appended as calls
+finish. Calls are matched by a hash of the request (model, prompt, template,
+options and stop sequences; the KV context and `num_ctx` are left out since
+they depend on the server), and repeated identical requests replay in
+recorded order. Only the length of a returned KV context is kept, which is
+all replay needs to take the same prompt-prefix path.
+
+The active cassette is process-wide: `use_cassette(Cassette(path, REPLAY))`.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+RECORD = "record"
+REPLAY = "replay"
+MODES = (RECORD, REPLAY)
+
+LLM_CALL = "llm"
+SANDBOX_RUN = "run"
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a call the cassette did not record."""
+
+
+def request_key(payload: dict) -> str:
+    """Hash of the parts of an LLM request that decide its response."""
+    options = {k: v for k, v in payload.get("options", {}).items() if k != "num_ctx"}
+    request = {"model": payload.get("model"), "prompt": payload.get("prompt"), "options": options}
+    if payload.get("template") is not None:
+        request["template"] = payload["template"]
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def run_key(method: str, args: tuple, kwargs: dict) -> str:
+    request = {"method": method, "args": list(args), "kwargs": kwargs}
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Take:
+    """One recorded LLM call."""
+
+    key: str
+    model: str
+    role: Optional[str] = None
+    chunks: List[str] = field(default_factory=list)
+    # seconds from the start of the call to each chunk
+    offsets: List[float] = field(default_factory=list)
+    metadata: dict = field(default_factory=dict)
+    context_len: int = 0
+    cached: bool = False
+    stopped: bool = False
+    error: Optional[str] = None
+
+    def final(self) -> Optional[dict]:
+        """The final-chunk data to hand to `LLMInterface._finish`, if the call had one."""
+        if not self.metadata and not self.context_len:
+            return None
+        data = dict(self.metadata)
+        if self.context_len:
+            data["context"] = [0] * self.context_len
+        return data
+
+    def play(self, realtime: bool = False) -> Iterator[str]:
+        start = time.perf_counter()
+        for chunk, offset in zip(self.chunks, self.offsets):
+            if realtime:
+                delay = offset - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            yield chunk
+
+    async def aplay(self, realtime: bool = False):
+        start = time.perf_counter()
+        for chunk, offset in zip(self.chunks, self.offsets):
+            if realtime:
+                delay = offset - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield chunk
+
+
+class Tape:
+    """Collects one live LLM call for a recording cassette."""
+
+    def __init__(self, cassette: "Cassette", payload: dict, role: Optional[str]):
+        self.cassette = cassette
+        self.take = Take(request_key(payload), payload.get("model", ""), role)
+        self._start = time.perf_counter()
+
+    def add(self, chunk: str) -> None:
+        self.take.chunks.append(chunk)
+        self.take.offsets.append(round(time.perf_counter() - self._start, 4))
+
+    def save(self, llm) -> None:
+        """Store the call with the outcome `llm` reported for it."""
+        take = self.take
+        take.metadata = dict(llm.last_metadata)
+        take.context_len = len(llm.last_context or [])
+        take.cached = llm.last_cached
+        take.stopped = llm.last_stopped
+        take.error = llm.last_error
+        self.cassette._write({"kind": LLM_CALL, **asdict(take)})
+
+
+class Cassette:
+    """A recording of the LLM calls and sandbox runs of one or more tasks."""
+
+    def __init__(self, path: str, mode: str = REPLAY, realtime: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}; expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.calls = 0
+        self.runs = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._takes: Dict[str, deque] = defaultdict(deque)
+        self._runs: Dict[str, deque] = defaultdict(deque)
+        if mode == REPLAY:
+            self._load()
+        else:
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # the recording process died mid-write
+                    break
+                kind = record.pop("kind", None)
+                if kind == LLM_CALL:
+                    self._takes[record["key"]].append(Take(**record))
+                elif kind == SANDBOX_RUN:
+                    self._runs[record["key"]].append(record)
+
+    def _write(self, record: dict) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            if record["kind"] == LLM_CALL:
+                self.calls += 1
+            else:
+                self.runs += 1
+
+    def tape(self, payload: dict, role: Optional[str] = None) -> Optional[Tape]:
+        """A `Tape` for a live call when recording, else None."""
+        return Tape(self, payload, role) if self.recording else None
+
+    def take(self, payload: dict) -> Take:
+        """The next recorded response to this request."""
+        with self._lock:
+            takes = self._takes.get(request_key(payload))
+            if not takes:
+                raise CassetteMiss(f"No recorded response for a {payload.get('model')} call in {self.path}")
+            self.calls += 1
+            return takes.popleft()
+
+    def run(self, run, *args, **kwargs):
+        """Call a sandbox runner method, or replay its recorded result."""
+        method = getattr(run, "__name__", "run")
+        key = run_key(method, args, kwargs)
+        if self.replaying:
+            with self._lock:
+                recorded = self._runs.get(key)
+                if not recorded:
+                    raise CassetteMiss(f"No recorded result for a sandbox {method} call in {self.path}")
+                self.runs += 1
+                record = recorded.popleft()
+            if self.realtime:
+                time.sleep(record["seconds"])
+            return tuple(record["result"])
+
+        started = time.perf_counter()
+        result = run(*args, **kwargs)
+        self._write(
+            {
+                "kind": SANDBOX_RUN,
+                "key": key,
+                "method": method,
+                "result": list(result),
+                "seconds": round(time.perf_counter() - started, 4),
+            }
+        )
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def summary(self) -> str:
+        verb = "recorded" if self.recording else "replayed"
+        return f"Cassette {self.path}: {verb} {self.calls} LLM calls and {self.runs} sandbox runs"
+
+
+_cassette: Optional[Cassette] = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The active cassette, or None."""
+    return _cassette
+
+
+def set_cassette(cassette: Optional[Cassette]) -> None:
+    global _cassette
+    _cassette = cassette
+
+
+@contextmanager
+def use_cassette(cassette: Cassette) -> Iterator[Cassette]:
+    """Make `cassette` the active one for the duration of the block, then close it."""
+    previous = get_cassette()
+    set_cassette(cassette)
+    try:
+        yield cassette
+    finally:
+        set_cassette(previous)
+        cassette.close()
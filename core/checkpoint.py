@@ -0,0 +1,139 @@
+"""Append-only checkpoints of repair sessions.
+
+`_save_session` only writes once a task has ended, so a process that dies
+mid-run loses every iteration's LLM work. A `SessionLog` is a JSONL file per
+session under `checkpoint.dir`: a `task` record when the session starts, an
+`iteration` record (`IterationCheckpoint`) after every completed iteration
+and an `end` record when it finishes. Records are appended and flushed one
+line at a time, so a checkpoint costs a single small write, and a line torn
+by a crash is skipped on load.
+
+`RepairLoop.run_task(resume=session)` reads the log back and continues the
+linear strategy after the last completed iteration, with the spec, code and
+error context that iteration handed on.
+"""
+
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from core.config import get_config
+
+DEFAULT_DIR = "~/.cache/laph/sessions"
+
+
+@dataclass
+class IterationCheckpoint:
+    """State after one completed iteration of the linear repair loop."""
+
+    iteration: int
+    spec: Optional[str]
+    # the program that was run and its tests
+    code: Optional[str]
+    tests: Optional[str]
+    stdout: str
+    stderr: str
+    exitcode: int
+    score: float
+    # what the next iteration starts from
+    next_code: Optional[str]
+    last_error: Optional[str]
+    working_code: Optional[str]
+
+
+def checkpoint_dir() -> str:
+    return os.path.expanduser(get_config().get("checkpoint", "dir", DEFAULT_DIR))
+
+
+def checkpoints_enabled() -> bool:
+    return bool(get_config().get("checkpoint", "enabled", True))
+
+
+def new_session_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class SessionLog:
+    """The checkpoint file of one repair session."""
+
+    def __init__(self, session: str, directory: Optional[str] = None):
+        self.session = session
+        self.directory = directory or checkpoint_dir()
+        self.path = os.path.join(self.directory, f"{session}.jsonl")
+
+    @classmethod
+    def create(cls, task: str, directory: Optional[str] = None, **meta) -> "SessionLog":
+        log = cls(new_session_id(), directory)
+        os.makedirs(log.directory, exist_ok=True)
+        log.append({"type": "task", "task": task, "started": time.time(), **meta})
+        return log
+
+    @classmethod
+    def open(cls, session: str, directory: Optional[str] = None) -> "SessionLog":
+        """Open an existing session; `session` may also be the path of its file."""
+        if session.endswith(".jsonl") and os.path.exists(session):
+            directory, name = os.path.split(os.path.abspath(session))
+            session = name[: -len(".jsonl")]
+        log = cls(session, directory)
+        if not os.path.exists(log.path):
+            raise FileNotFoundError(f"No checkpoint for session {session!r} in {log.directory}")
+        with open(log.path, "rb+") as f:
+            # end a line torn by a crash so the next record starts on its own line
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        return log
+
+    def append(self, record: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+
+    def records(self) -> List[dict]:
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # a write cut short by a crash
+                    continue
+        return records
+
+    @property
+    def task(self) -> Optional[str]:
+        for record in self.records():
+            if record.get("type") == "task":
+                return record.get("task")
+        return None
+
+    def record_iteration(self, checkpoint: IterationCheckpoint) -> None:
+        self.append({"type": "iteration", **asdict(checkpoint)})
+
+    def last_iteration(self) -> Optional[IterationCheckpoint]:
+        last = None
+        for record in self.records():
+            if record.get("type") == "iteration":
+                last = record
+        if last is None:
+            return None
+        last = dict(last)
+        del last["type"]
+        return IterationCheckpoint(**last)
+
+    def finish(self, success: bool, code: Optional[str], iterations: int) -> None:
+        self.append({"type": "end", "success": success, "code": code, "iterations": iterations})
+
+    def outcome(self) -> Optional[dict]:
+        """The `end` record of the latest run of this session, if it finished."""
+        outcome = None
+        for record in self.records():
+            if record.get("type") == "end":
+                outcome = record
+            elif record.get("type") in ("task", "resume"):
+                outcome = None
+        return outcome
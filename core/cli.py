@@ -6,8 +6,10 @@ Provides a user-friendly CLI for running code generation tasks without the GUI.
 import click
 import sys
 from pathlib import Path
+from core.budget import TaskBudget
 from core.repair_loop import RepairLoop
 from core.logger import Logger
+from core.response_cache import set_cache_enabled
 
 
 class CLILogger(Logger):
@@ -41,6 +43,12 @@ def stream_to_cli(chunk: str | None, source: str):
         click.echo("\n" + "-" * 60)
 
 
+def _echo_resume_hint(agent: RepairLoop):
+    """Tell the user how to continue a checkpointed session."""
+    if agent.session is not None:
+        click.echo(f"Resume with: laph generate --resume {agent.session.session}", err=True)
+
+
 @click.group(invoke_without_command=True)
 @click.pass_context
 @click.argument("task", required=False, nargs=-1)
@@ -52,6 +60,7 @@ def cli(ctx, task):
     Quick usage:
         laph "write a hello world program"
         laph generate "task" --max-iterations 20
+        laph batch tasks.jsonl -o results.jsonl
         laph gui
         laph help
     """
@@ -62,6 +71,13 @@ def cli(ctx, task):
             click.echo(ctx.get_help())
             return
 
+    # The task argument also captures subcommand names; dispatch those here
+    if task and task[0] in cli.commands:
+        command = cli.commands[task[0]]
+        with command.make_context(task[0], list(task[1:]), parent=ctx) as sub_ctx:
+            command.invoke(sub_ctx)
+        return
+
     # If a task is provided without a subcommand, treat it as a generate request
     if task and ctx.invoked_subcommand is None:
         ctx.invoke(
@@ -72,6 +88,7 @@ def cli(ctx, task):
             coder_model="qwen2.5-coder:7b-instruct",
             verbose=False,
             output=None,
+            no_cache=False,
         )
     elif not ctx.invoked_subcommand and not task:
         # No task and no subcommand -> show help
@@ -118,6 +135,9 @@ def show_help():
   laph help
     Show this help message
 
+  laph models
+    Show models currently loaded by Ollama
+
   laph version
     Show version information
 
@@ -130,6 +150,18 @@ def show_help():
   -c, --coder-model NAME       Coder model (default: qwen2.5-coder:7b)
   -o, --output FILE            Save code to file
   -v, --verbose                Show detailed logs
+  --no-cache                   Bypass the on-disk LLM response cache
+  --schedule fixed|grouped     Call order; grouped minimises model swaps
+  --budget-seconds SECS        Wall-clock budget; stops with the best candidate when spent
+  --budget-calls NUM           Maximum LLM calls for the task
+  --memory                     Keep a rolling summary of earlier attempts
+  --candidates NUM             Programs generated and run in parallel per iteration
+  --pipeline                   Start the coder while the thinker is still streaming
+  --strategy linear|beam       Repair chain or beam search over attempts
+  --resume SESSION             Continue a checkpointed session where it stopped
+  --record FILE                Record LLM streams and sandbox results to a cassette
+  --replay FILE [--realtime]   Re-run offline from a cassette
+  --no-reuse                   Ignore verified solutions stored for the same task
 
 
 💡 EXAMPLES
@@ -150,6 +182,9 @@ def show_help():
   # Verbose output
   laph "task" -v
 
+  # Run every task in a JSONL file, 4 at a time
+  laph batch tasks.jsonl --workers 4 -o results.jsonl
+
 
 🔧 ENVIRONMENT VARIABLES
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -172,7 +207,7 @@ Example:
 
 
 @cli.command(context_settings=dict(allow_interspersed_args=False))
-@click.argument("task", required=True, nargs=-1)
+@click.argument("task", required=False, nargs=-1)
 @click.option(
     "--max-iterations",
     "-i",
@@ -207,6 +242,79 @@ Example:
     default=None,
     help="Write generated code to a file.",
 )
+@click.option(
+    "--schedule",
+    type=click.Choice(["fixed", "grouped"]),
+    default=None,
+    help="Model call order; 'grouped' minimises model swaps (default: config).",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not read or write the on-disk LLM response cache.",
+)
+@click.option(
+    "--budget-seconds",
+    type=float,
+    default=None,
+    help="Wall-clock budget for the task (default: config budget.wall_seconds, unlimited).",
+)
+@click.option(
+    "--budget-calls",
+    type=int,
+    default=None,
+    help="Maximum LLM calls for the task (default: config budget.llm_calls, unlimited).",
+)
+@click.option(
+    "--memory",
+    is_flag=True,
+    help="Summarise earlier attempts with a small model instead of passing raw history.",
+)
+@click.option(
+    "--candidates",
+    type=int,
+    default=None,
+    help="Candidates generated, run and scored in parallel per iteration (default: config repair.n_candidates).",
+)
+@click.option(
+    "--pipeline",
+    is_flag=True,
+    help="Overlap the thinker and coder calls, speculating on repair iterations.",
+)
+@click.option(
+    "--strategy",
+    type=click.Choice(["linear", "beam"]),
+    default=None,
+    help="Repair strategy; 'beam' searches over a frontier of attempts (default: config).",
+)
+@click.option(
+    "--resume",
+    type=str,
+    default=None,
+    help="Continue a checkpointed session (its id or file) after its last completed iteration.",
+)
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Record every LLM stream and sandbox result to this cassette file.",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Serve LLM streams and sandbox results from a recorded cassette, offline.",
+)
+@click.option(
+    "--realtime",
+    is_flag=True,
+    help="With --replay, keep the recorded timings instead of replaying instantly.",
+)
+@click.option(
+    "--no-reuse",
+    is_flag=True,
+    help="Solve the task from scratch even when a verified solution is stored.",
+)
 def generate(
     task: tuple,
     max_iterations: int,
@@ -214,15 +322,31 @@ def generate(
     coder_model: str,
     verbose: bool,
     output: str | None,
+    no_cache: bool,
+    schedule: str | None = None,
+    budget_seconds: float | None = None,
+    budget_calls: int | None = None,
+    memory: bool = False,
+    candidates: int | None = None,
+    pipeline: bool = False,
+    strategy: str | None = None,
+    resume: str | None = None,
+    record: str | None = None,
+    replay: str | None = None,
+    realtime: bool = False,
+    no_reuse: bool = False,
 ):
     """Generate code from a task description.
 
     Example:
         laph generate "write a dice roller with input validation"
+        laph generate --resume 20250101-120000-abc123 --max-iterations 40
+        laph generate "task" --record run.cassette
+        laph generate "task" --replay run.cassette
     """
     task_str = " ".join(task)
 
-    if not task_str:
+    if not task_str and not resume:
         click.echo(click.style("Error: Task description required.", fg="red"), err=True)
         sys.exit(1)
 
@@ -233,13 +357,30 @@ def generate(
         )
         sys.exit(1)
 
+    if record and replay:
+        click.echo(click.style("Error: Use either --record or --replay, not both.", fg="red"), err=True)
+        sys.exit(1)
+
     click.echo(
         click.style(f"\n🚀 Starting L.A.P.H. Code Generation", fg="cyan", bold=True)
     )
-    click.echo(f"Task: {task_str}")
+    click.echo(f"Task: {task_str or 'resumed from session ' + resume}")
     click.echo(f"Max iterations: {max_iterations}")
     click.echo(f"Models: Thinker={model}, Coder={coder_model}\n")
 
+    if no_cache:
+        set_cache_enabled(False)
+
+    if no_reuse:
+        from core.solution_store import set_solutions_enabled
+
+        set_solutions_enabled(False)
+
+    if memory:
+        from core.config import get_config
+
+        get_config().set("memory", "enabled", True)
+
     logger = CLILogger(verbose=verbose)
     agent = RepairLoop(logger, model_name=model)
     # Override the coder model if specified
@@ -247,13 +388,49 @@ def generate(
 
     agent.models["coder"] = LLMInterface(coder_model)
 
+    cassette = None
+    if record or replay:
+        from core.cassette import RECORD, REPLAY, Cassette, set_cassette
+
+        cassette = Cassette(record or replay, RECORD if record else REPLAY, realtime=realtime)
+        set_cassette(cassette)
+
     try:
+        if cassette is None or cassette.recording:
+            click.echo(click.style("Loading models...", fg="yellow", bold=True))
+            agent.warm_up()
         click.echo(click.style("Generating specification...", fg="yellow", bold=True))
+        budget = TaskBudget.from_config()
+        if budget_seconds is not None:
+            budget.wall_seconds = budget_seconds
+        if budget_calls is not None:
+            budget.llm_calls = budget_calls
         final_code = agent.run_task(
-            task_str, max_iters=max_iterations, stream_callback=stream_to_cli
+            task_str,
+            max_iters=max_iterations,
+            stream_callback=stream_to_cli,
+            schedule=schedule,
+            budget=budget,
+            n_candidates=candidates,
+            pipeline=pipeline or None,
+            strategy=strategy,
+            resume=resume,
         )
 
-        if final_code:
+        if final_code and not agent.last_success:
+            # the budget ran out: the best candidate is shown but not trusted
+            click.echo(
+                click.style(
+                    "\n❌ Budget exhausted before the code worked. Best candidate so far:\n",
+                    fg="red",
+                    bold=True,
+                ),
+                err=True,
+            )
+            click.echo(final_code)
+            _echo_resume_hint(agent)
+            sys.exit(1)
+        elif final_code:
             click.echo(
                 click.style("\n✨ Success! Generated code:\n", fg="green", bold=True)
             )
@@ -273,18 +450,147 @@ def generate(
                 ),
                 err=True,
             )
+            _echo_resume_hint(agent)
             sys.exit(1)
 
     except KeyboardInterrupt:
         click.echo(click.style("\n⚠️ Interrupted by user.", fg="yellow"), err=True)
+        _echo_resume_hint(agent)
         sys.exit(130)
     except Exception as e:
         click.echo(click.style(f"\n❌ Error: {e}", fg="red", bold=True), err=True)
+        _echo_resume_hint(agent)
         if verbose:
             import traceback
 
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        if cassette is not None:
+            set_cassette(None)
+            cassette.close()
+            click.echo(cassette.summary(), err=True)
+
+
+@cli.command()
+@click.argument("tasks_file", type=click.File("r"))
+@click.option(
+    "--output",
+    "-o",
+    type=click.File("w"),
+    default="-",
+    help="Write one JSON result per task to this file (default: stdout).",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=None,
+    help="Tasks run at the same time (default: config batch.workers).",
+)
+@click.option(
+    "--max-iterations",
+    "-i",
+    type=int,
+    default=10,
+    help="Repair loop iterations per task unless the task sets max_iterations (default: 10).",
+)
+@click.option(
+    "--model",
+    "-m",
+    type=str,
+    default="qwen3:14b",
+    help="Thinker model to use (default: qwen3:14b).",
+)
+@click.option(
+    "--schedule",
+    type=click.Choice(["fixed", "grouped"]),
+    default=None,
+    help="Model call order; 'grouped' minimises model swaps (default: config).",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not read or write the on-disk LLM response cache.",
+)
+@click.option(
+    "--candidates",
+    type=int,
+    default=None,
+    help="Candidates per iteration (default: config repair.n_candidates).",
+)
+@click.option(
+    "--pipeline",
+    is_flag=True,
+    help="Overlap the thinker and coder calls, speculating on repair iterations.",
+)
+@click.option(
+    "--strategy",
+    type=click.Choice(["linear", "beam"]),
+    default=None,
+    help="Repair strategy (default: config).",
+)
+def batch(
+    tasks_file,
+    output,
+    workers: int | None,
+    max_iterations: int,
+    model: str,
+    schedule: str | None = None,
+    no_cache: bool = False,
+    candidates: int | None = None,
+    pipeline: bool = False,
+    strategy: str | None = None,
+):
+    """Run every task in a JSONL file on a pool of workers.
+
+    Each line is a task object like examples/simple_task.json, optionally
+    with "id" and "max_iterations". Results stream out as JSON lines; the
+    summary goes to stderr.
+
+    Example:
+        laph batch tasks.jsonl --workers 4 -o results.jsonl
+    """
+    from functools import partial
+
+    from core.batch import BatchRunner, default_loop, read_tasks, write_jsonl
+
+    if max_iterations < 1 or max_iterations > 60:
+        click.echo(
+            click.style("Error: Max iterations must be between 1 and 60.", fg="red"),
+            err=True,
+        )
+        sys.exit(1)
+
+    if no_cache:
+        set_cache_enabled(False)
+
+    runner = BatchRunner(
+        workers=workers,
+        max_iterations=max_iterations,
+        loop_factory=partial(default_loop, model),
+        warm_up=True,
+        schedule=schedule,
+        n_candidates=candidates,
+        pipeline=pipeline or None,
+        strategy=strategy,
+    )
+    write = write_jsonl(output)
+
+    def sink(result):
+        write(result)
+        mark = click.style("✓", fg="green") if result.success else click.style("✗", fg="red")
+        click.echo(f"{mark} {result.id} ({result.seconds:.1f}s, {result.iterations} iterations)", err=True)
+
+    click.echo(click.style(f"🚀 Running batch with {runner.workers} workers", fg="cyan", bold=True), err=True)
+    try:
+        summary = runner.run(read_tasks(tasks_file), sink)
+    except KeyboardInterrupt:
+        click.echo(click.style("\n⚠️ Interrupted by user.", fg="yellow"), err=True)
+        sys.exit(130)
+    click.echo(summary.summary(), err=True)
+    if summary.errors:
+        sys.exit(1)
 
 
 @cli.command()
@@ -306,6 +612,22 @@ def gui():
         sys.exit(1)
 
 
+@cli.command()
+def models():
+    """Show endpoint health and which models each Ollama server keeps loaded."""
+    from core.endpoints import get_endpoint_pool
+    from core.residency import ModelResidency
+
+    pool = get_endpoint_pool()
+    pool.check_all()
+    click.echo(pool.report())
+    for endpoint in pool.endpoints:
+        if endpoint.healthy:
+            if len(pool) > 1:
+                click.echo(f"\n{endpoint.url}")
+            click.echo(ModelResidency(endpoint=endpoint.url).report())
+
+
 @cli.command()
 def version():
     """Show version information."""
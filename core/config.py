@@ -19,6 +19,19 @@ class Config:
             "endpoint": "http://localhost:11434",
             "timeout": 30,
             "retries": 3,
+            "pool_connections": 4,
+            "pool_maxsize": 16,
+            "reuse_context": True,
+            "endpoints": [],
+            "routing": "affinity",
+            "retry_after": 30,
+            "auto_num_ctx": True,
+            "num_ctx_buckets": [2048, 4096, 8192, 16384, 32768],
+            "expected_output_tokens": 1024,
+            "hedge": False,
+            "hedge_percentile": 95,
+            "hedge_initial_delay": 5,
+            "hedge_min_delay": 0.25,
         },
         "models": {
             "thinker": "qwen3:4b",
@@ -30,9 +43,67 @@ class Config:
             "memory_limit_mb": 256,
             "timeout_seconds": 8,
         },
+        "cache": {
+            "enabled": True,
+            "path": "~/.cache/laph/responses.db",
+            "max_size_mb": 256,
+            "ttl_seconds": 604800,
+        },
+        "budget": {
+            # per-task limits; 0 leaves a dimension unlimited
+            "wall_seconds": 0,
+            "llm_calls": 0,
+            "tokens": 0,
+            "sandbox_seconds": 0,
+            "small_models": {"thinker": "qwen3:4b"},
+            "shrunk_context_chars": 800,
+        },
+        "memory": {
+            "enabled": False,
+            "model": "qwen3:4b",
+            "max_chars": 1500,
+            "error_chars": 1500,
+        },
+        "evaluation": {
+            # ask the LLM judge about every run that did not crash
+            "strict": False,
+        },
         "repair": {
             "max_iterations": 20,
             "max_iterations_limit": 60,
+            "schedule": "fixed",
+            "n_candidates": 1,
+            "candidate_spread": 0.8,
+            "pipeline": False,
+            "speculate": True,
+            "speculation_similarity": 0.9,
+            "strategy": "linear",
+            "beam_width": 3,
+            "beam_branching": 2,
+            "frontier_size": 12,
+        },
+        "checkpoint": {
+            # append every repair iteration to <dir>/<session>.jsonl
+            "enabled": True,
+            "dir": "~/.cache/laph/sessions",
+        },
+        "solutions": {
+            # re-verify and reuse the stored program for a repeated task
+            "enabled": True,
+            "path": "laph.db",
+        },
+        "retrieval": {
+            # similar solved sessions as prompt examples (needs numpy)
+            "enabled": True,
+            "path": "laph.db",
+            "k": 2,
+            "min_similarity": 0.35,
+            "max_chars": 800,
+            "dim": 128,
+        },
+        "batch": {
+            # tasks run concurrently by `laph batch`
+            "workers": 2,
         },
     }
 
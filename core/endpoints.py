@@ -0,0 +1,209 @@
+"""Pool of Ollama endpoints with health checks, routing and failover.
+
+`LLMInterface` instances created without an explicit endpoint route every
+call through the process-wide `EndpointPool`. The pool is configured with
+`llm.endpoints` (a list, or a comma-separated string such as
+`LAPH_LLM_ENDPOINTS=http://gpu1:11434,http://gpu2:11434`) and falls back to
+the single `llm.endpoint`.
+
+Each endpoint tracks its in-flight requests. Routing is either
+`least_loaded` or `affinity` (the default): affinity prefers an endpoint that
+recently served the same model, since it probably still holds that model in
+VRAM, unless that endpoint is much busier than the least-loaded one. An
+endpoint that fails is taken out of rotation for `llm.retry_after` seconds
+and then probed again via `/api/tags`, which also records the models it has
+installed so requests are not routed to a host that cannot serve them.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from core.config import get_config
+from core.http_pool import get_session
+
+LEAST_LOADED = "least_loaded"
+AFFINITY = "affinity"
+ROUTING = (LEAST_LOADED, AFFINITY)
+
+# affinity is abandoned once the preferred endpoint has this many more
+# requests in flight than the least-loaded one
+MAX_AFFINITY_IMBALANCE = 2
+
+
+class Endpoint:
+    """One model server and its routing state."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.healthy = True
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.checked_at = 0.0
+        # installed models from /api/tags; empty means unknown
+        self.models: set = set()
+        # model -> time it was last served here
+        self.recent: Dict[str, float] = {}
+
+    def serves(self, model: str) -> bool:
+        return not self.models or model in self.models
+
+    def __repr__(self) -> str:
+        state = "up" if self.healthy else "down"
+        return f"Endpoint({self.url!r}, {state}, in_flight={self.in_flight})"
+
+
+class EndpointPool:
+    """Route requests across several endpoints."""
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        routing: str = AFFINITY,
+        retry_after: float = 30.0,
+        check_timeout: float = 2.0,
+    ):
+        if routing not in ROUTING:
+            raise ValueError(f"Unknown routing {routing!r}; expected one of {', '.join(ROUTING)}")
+        self.endpoints: List[Endpoint] = []
+        for url in urls:
+            if url and url.rstrip("/") not in (e.url for e in self.endpoints):
+                self.endpoints.append(Endpoint(url))
+        if not self.endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.routing = routing
+        self.retry_after = retry_after
+        self.check_timeout = check_timeout
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    @property
+    def primary(self) -> str:
+        return self.endpoints[0].url
+
+    def get(self, url: str) -> Optional[Endpoint]:
+        url = url.rstrip("/")
+        for endpoint in self.endpoints:
+            if endpoint.url == url:
+                return endpoint
+        return None
+
+    def check(self, endpoint: Endpoint) -> bool:
+        """Probe `endpoint` via `/api/tags` and update its health and models."""
+        try:
+            response = get_session().get(f"{endpoint.url}/api/tags", timeout=self.check_timeout)
+            response.raise_for_status()
+            models = {m.get("name") or m.get("model") for m in response.json().get("models", [])}
+            healthy = True
+        except Exception:
+            models, healthy = None, False
+        with self._lock:
+            endpoint.checked_at = time.monotonic()
+            endpoint.healthy = healthy
+            if models is not None:
+                endpoint.models = {m for m in models if m}
+        return healthy
+
+    def check_all(self) -> Dict[str, bool]:
+        return {endpoint.url: self.check(endpoint) for endpoint in self.endpoints}
+
+    def _recover(self) -> None:
+        """Re-probe endpoints whose failure back-off has expired."""
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            if not endpoint.healthy and now - endpoint.checked_at >= self.retry_after:
+                self.check(endpoint)
+
+    def _choose(self, model: str, candidates: List[Endpoint]) -> Endpoint:
+        least = min(candidates, key=lambda e: (e.in_flight, e.requests))
+        if self.routing == AFFINITY:
+            warm = [e for e in candidates if model in e.recent]
+            if warm:
+                best = max(warm, key=lambda e: e.recent[model])
+                if best.in_flight - least.in_flight < MAX_AFFINITY_IMBALANCE:
+                    return best
+        return least
+
+    def acquire(self, model: str, exclude: Iterable[str] = (), pin: Optional[str] = None) -> Endpoint:
+        """Pick an endpoint for `model` and count the request as in flight.
+
+        `pin` forces a specific endpoint (e.g. to continue a KV context that
+        only exists there). If every endpoint is down or excluded, the one that
+        failed longest ago is returned rather than failing outright.
+        """
+        self._recover()
+        excluded = {url.rstrip("/") for url in exclude}
+        with self._lock:
+            chosen = self.get(pin) if pin else None
+            if chosen is None:
+                usable = [e for e in self.endpoints if e.healthy and e.url not in excluded]
+                serving = [e for e in usable if e.serves(model)]
+                candidates = serving or usable
+                if candidates:
+                    chosen = self._choose(model, candidates)
+                else:
+                    rest = [e for e in self.endpoints if e.url not in excluded] or self.endpoints
+                    chosen = min(rest, key=lambda e: e.checked_at)
+            chosen.in_flight += 1
+            chosen.requests += 1
+            chosen.recent[model] = time.monotonic()
+            return chosen
+
+    def release(self, endpoint: Endpoint, ok: bool = True) -> None:
+        """Finish a request; a failed one takes the endpoint out of rotation."""
+        with self._lock:
+            endpoint.in_flight = max(endpoint.in_flight - 1, 0)
+            if not ok:
+                endpoint.failures += 1
+                endpoint.healthy = False
+                endpoint.checked_at = time.monotonic()
+
+    def report(self) -> str:
+        lines = []
+        for e in self.endpoints:
+            state = "up" if e.healthy else "down"
+            models = f", models: {', '.join(sorted(e.models))}" if e.models else ""
+            lines.append(
+                f"endpoint: {e.url} [{state}] {e.requests} requests, "
+                f"{e.failures} failures, {e.in_flight} in flight{models}"
+            )
+        return "\n".join(lines)
+
+
+def configured_endpoints() -> List[str]:
+    """Endpoint URLs from `llm.endpoints`, falling back to `llm.endpoint`."""
+    config = get_config()
+    urls = config.get("llm", "endpoints") or []
+    if isinstance(urls, str):
+        urls = [u.strip() for u in urls.split(",")]
+    urls = [u for u in urls if u]
+    return urls or [config.llm_endpoint()]
+
+
+_pool: Optional[EndpointPool] = None
+_lock = threading.Lock()
+
+
+def get_endpoint_pool() -> EndpointPool:
+    """Get or create the shared endpoint pool from config."""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                config = get_config()
+                _pool = EndpointPool(
+                    configured_endpoints(),
+                    routing=config.get("llm", "routing", AFFINITY),
+                    retry_after=float(config.get("llm", "retry_after", 30)),
+                )
+    return _pool
+
+
+def reset_endpoint_pool() -> None:
+    """Drop the shared pool (useful for testing or reconfiguring)."""
+    global _pool
+    with _lock:
+        _pool = None
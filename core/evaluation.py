@@ -0,0 +1,86 @@
+"""Tiered evaluation of a program run.
+
+The repair loop only asks whether a run scores at least `PASS_SCORE`, and
+the deterministic checks (exit code 0, empty stderr, some stdout) are worth
+one point each. Calling the LLM judge for every run therefore mostly costs
+a round trip (and often a model swap) without changing the outcome.
+`triage` decides what it can without a model, cheapest tier first:
+
+    deterministic  a crash fails; a clean run with output passes
+    tests          the generated tests decide, when they were counted
+    llm            the judge is asked only when nothing above decided
+
+In strict mode (`evaluation.strict`) only failures are decided early; every
+other run goes to the judge, which must answer YES for it to pass. Each
+`Verdict` records the tier that decided it.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from core.config import get_config
+
+PASS_SCORE = 3.0
+JUDGE_POINTS = 2.0
+
+DETERMINISTIC = "deterministic"
+TESTS = "tests"
+LLM = "llm"
+# the budget ran low and the judge was skipped
+HEURISTIC = "heuristic"
+
+
+@dataclass
+class Verdict:
+    score: float
+    tier: str
+    reason: str = ""
+
+    @property
+    def passed(self) -> bool:
+        return self.score >= PASS_SCORE
+
+    def summary(self) -> str:
+        return f"{self.score} ({self.tier}: {self.reason})" if self.reason else f"{self.score} ({self.tier})"
+
+
+def is_strict() -> bool:
+    return bool(get_config().get("evaluation", "strict", False))
+
+
+def deterministic_score(stdout: str, stderr: str, exitcode: int) -> float:
+    """One point each for exit code 0, empty stderr and non-empty stdout."""
+    return float((exitcode == 0) + (not stderr) + bool((stdout or "").strip()))
+
+
+def triage(
+    stdout: str,
+    stderr: str,
+    exitcode: int,
+    tests_passed: Optional[int] = None,
+    tests_total: Optional[int] = None,
+    strict: bool = False,
+) -> Optional[Verdict]:
+    """Verdict from the cheap tiers, or None when only the LLM judge can decide."""
+    score = deterministic_score(stdout, stderr, exitcode)
+    if exitcode != 0:
+        return Verdict(score, DETERMINISTIC, f"exit code {exitcode}")
+    if strict:
+        return None
+    if tests_total:
+        if tests_passed == tests_total:
+            return Verdict(score + JUDGE_POINTS, TESTS, f"{tests_passed}/{tests_total} tests passed")
+        return Verdict(min(score, PASS_SCORE - 1), TESTS, f"{tests_passed}/{tests_total} tests passed")
+    if score >= PASS_SCORE:
+        return Verdict(score, DETERMINISTIC, "clean run with output")
+    return None
+
+
+def judged(stdout: str, stderr: str, exitcode: int, answer: str, strict: bool = False) -> Verdict:
+    """Verdict from the LLM judge's YES/NO `answer`."""
+    score = deterministic_score(stdout, stderr, exitcode)
+    if "YES" in (answer or "").upper():
+        return Verdict(score + JUDGE_POINTS, LLM, "judge said YES")
+    if strict:
+        score = min(score, PASS_SCORE - 1)
+    return Verdict(score, LLM, "judge said NO")
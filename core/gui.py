@@ -515,9 +515,15 @@ class LAPH_GUI:
         # stop spinner
         self._stop_spinner()
 
-        if final_code:
+        if final_code and self.agent.last_success:
             self.status_label.config(text="Success! ✨", bootstyle=SUCCESS)
             self.logger.log("Task finished successfully.")
+        elif final_code:
+            self.status_label.config(
+                text="Budget exhausted. The best candidate so far does not work yet.",
+                bootstyle=DANGER,
+            )
+            self.logger.log("Task failed. Budget exhausted before the code worked.")
         else:
             self.status_label.config(
                 text="Failed to generate a working script. Try a different prompt or more iterations.",
@@ -0,0 +1,111 @@
+"""Hedged requests: race a second copy of a stalled LLM call.
+
+A call that produces no first token within the hedge delay is sent again,
+to another pooled endpoint when one is available and otherwise to a second
+slot of the same server. The first stream to produce output wins and the
+other is cancelled. The delay is a high percentile (`llm.hedge_percentile`)
+of recently observed times to first token for the same model, so only the
+tail is hedged; until enough samples exist, `llm.hedge_initial_delay` is
+used. Hedging is opt-in via `llm.hedge`.
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from core.config import get_config
+
+# samples needed before the percentile replaces the initial delay
+MIN_SAMPLES = 10
+
+
+class HedgePolicy:
+    """Decide when to hedge and keep hedge/win statistics."""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        initial_delay: float = 5.0,
+        min_delay: float = 0.25,
+        max_delay: float = 60.0,
+        window: int = 200,
+    ):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def delay(self, model: str) -> float:
+        """Seconds to wait for a first token before hedging a call to `model`."""
+        with self._lock:
+            samples = sorted(self.samples.get(model, ()))
+        if len(samples) < MIN_SAMPLES:
+            return self.initial_delay
+        index = min(int(len(samples) * self.percentile / 100.0), len(samples) - 1)
+        return min(max(samples[index], self.min_delay), self.max_delay)
+
+    def observe(self, model: str, ttft: float, hedged: bool, hedge_won: bool) -> None:
+        """Record the outcome of one call."""
+        with self._lock:
+            self.samples.setdefault(model, deque(maxlen=self.window)).append(ttft)
+            self.requests += 1
+            self.hedged += int(hedged)
+            self.hedge_wins += int(hedge_won)
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        """Fraction of hedged calls where the hedge beat the original request."""
+        return self.hedge_wins / self.hedged if self.hedged else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": self.hedge_rate,
+            "win_rate": self.win_rate,
+        }
+
+    def summary(self) -> str:
+        return (
+            f"Hedging: {self.hedged}/{self.requests} calls hedged ({self.hedge_rate:.0%}), "
+            f"hedge won {self.hedge_wins} ({self.win_rate:.0%})"
+        )
+
+
+_policy: Optional[HedgePolicy] = None
+_lock = threading.Lock()
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    """Return the shared policy, or None when hedging is disabled in config."""
+    global _policy
+    config = get_config()
+    if not config.get("llm", "hedge", False):
+        return None
+    if _policy is None:
+        with _lock:
+            if _policy is None:
+                _policy = HedgePolicy(
+                    percentile=float(config.get("llm", "hedge_percentile", 95)),
+                    initial_delay=float(config.get("llm", "hedge_initial_delay", 5)),
+                    min_delay=float(config.get("llm", "hedge_min_delay", 0.25)),
+                )
+    return _policy
+
+
+def reset_hedge_policy() -> None:
+    """Drop the shared policy and its statistics (useful for testing)."""
+    global _policy
+    with _lock:
+        _policy = None
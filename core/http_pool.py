@@ -0,0 +1,92 @@
+"""Process-wide pooled HTTP session for talking to model servers.
+
+Every `LLMInterface` (and therefore every plugin built on it) shares a single
+`requests.Session` so that repeated calls to the same Ollama host reuse
+keep-alive TCP connections instead of opening a fresh socket per request.
+Pool sizing comes from the `llm` config section (`pool_connections`,
+`pool_maxsize`) and can be overridden via `LAPH_LLM_POOL_MAXSIZE` etc.
+"""
+
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import get_config
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """Create a session with a sized, keep-alive connection pool."""
+    config = get_config()
+    adapter = HTTPAdapter(
+        pool_connections=int(config.get("llm", "pool_connections", 4)),
+        pool_maxsize=int(config.get("llm", "pool_maxsize", 16)),
+        pool_block=bool(config.get("llm", "pool_block", False)),
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get or create the shared HTTP session."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session() -> None:
+    """Close and drop the shared session (useful for testing or reconfiguring)."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Return per-host connection counters for diagnostics.
+
+    For every host pool, `connections` is the number of TCP connections that
+    were opened, `requests` the number of requests sent over them and `reused`
+    how many requests went over an already-open connection.
+    """
+    stats: Dict[str, Dict[str, int]] = {}
+    if _session is None:
+        return stats
+
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        manager = getattr(adapter, "poolmanager", None)
+        if manager is None:
+            continue
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            host = f"{key.key_scheme}://{key.key_host}:{key.key_port}"
+            entry = stats.setdefault(host, {"connections": 0, "requests": 0, "reused": 0})
+            entry["connections"] += pool.num_connections
+            entry["requests"] += pool.num_requests
+            entry["reused"] += max(pool.num_requests - pool.num_connections, 0)
+    return stats
+
+
+def pool_summary() -> str:
+    """One line of `pool_stats` per host, or "" before the first request."""
+    return "\n".join(
+        f"{host}: {entry['requests']} requests on {entry['connections']} connections ({entry['reused']} reused)"
+        for host, entry in sorted(pool_stats().items())
+    )
@@ -2,51 +2,740 @@
 
 This small wrapper sends prompts to a local Ollama-style HTTP API and streams
 chunks of text as they arrive. It intentionally yields chunks to support
-progressive UI updates.
+progressive UI updates. The wire format is delegated to a backend (see
+`core.backends`): Ollama by default, or an OpenAI-compatible server.
+
+All instances share one pooled keep-alive session (see `core.http_pool`), so
+consecutive calls from the thinker, coder and evaluator reuse TCP connections.
+`agenerate` is the asyncio counterpart that yields the same chunks over a
+non-blocking socket (see `core.async_http`). Deterministic calls are served
+from the on-disk response cache when possible (see `core.response_cache`).
+
+Without an explicit `endpoint`, calls are routed through the shared
+`EndpointPool` (see `core.endpoints`), which spreads load over the configured
+servers and fails over when one is unreachable. With `llm.hedge` enabled, a
+call that stalls before its first token is raced against a second copy (see
+`core.hedging`).
+
+Unless `num_ctx` is set explicitly, each request gets the smallest context
+window that fits its estimated prompt plus output (see
+`core.token_estimator`).
+
+`generate_with_prefix` reuses the server's KV context for a large static
+prompt prefix (the role template), so only the per-iteration delta has to be
+prefilled on every call. Both halves are sent with the identity template
+`PASS_THROUGH_TEMPLATE`, so the model sees exactly `prefix + delta`, the
+same text `PromptManager.build_*` produces, rather than the delta wrapped as
+a second chat turn after the prefix.
+
+Generations can end early: `stop` sequences are enforced by the server, and an
+`until` predicate (see `core.stop_conditions`) closes the stream client-side
+as soon as the caller has everything it needs.
+
+With an active cassette (see `core.cassette`) every call is recorded, or
+served from the recording without contacting a server.
 """
 
+import asyncio
+import copy
+import queue
 import requests
-import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from core.async_http import AsyncHTTPError, stream_lines
+from core.backends import Backend, OllamaBackend
+from core.cassette import get_cassette
+from core.config import get_config
+from core.endpoints import Endpoint, EndpointPool, get_endpoint_pool
+from core.hedging import HedgePolicy, get_hedge_policy
+from core.http_pool import get_session
+from core.response_cache import ResponseCache, get_response_cache
+from core.telemetry import CallStats
+from core.token_estimator import ContextSizer, get_context_sizer
+
+# how many distinct prompt prefixes keep a primed KV context per instance
+MAX_PREFIX_CONTEXTS = 8
+
+# Ollama returns no KV context for `raw` requests; a template that inserts the
+# prompt unchanged gives the same raw text and still returns one
+PASS_THROUGH_TEMPLATE = "{{ .Prompt }}"
+
+# `last_error` of a call stopped by `cancel()`
+CANCELLED = "cancelled"
+
+# queue marker for a finished stream
+_END = object()
+
+
+class _Attempt(threading.Thread):
+    """One copy of a hedged request, pushing its raw lines onto a shared queue."""
+
+    def __init__(self, llm, index: int, payload: dict, pin, exclude, lines: queue.Queue):
+        super().__init__(daemon=True)
+        self.llm = llm
+        self.index = index
+        self.payload = payload
+        self.pin = pin
+        self.tried = list(exclude)
+        self.lines = lines
+        self.url: str | None = None
+        self.cancelled = False
+        self.response = None
+
+    def run(self):
+        try:
+            response, lease = self.llm._open(self.payload, self.pin, self.tried)
+        except Exception as e:
+            self.lines.put((self.index, e))
+            return
+        self.url = self.tried[-1]
+        self.response = response
+        ok = True
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if self.cancelled:
+                    break
+                if line:
+                    self.lines.put((self.index, line))
+            self.lines.put((self.index, _END))
+        except Exception as e:
+            if not self.cancelled:
+                ok = not isinstance(e, requests.ConnectionError)
+                self.lines.put((self.index, e))
+        finally:
+            response.close()
+            self.llm._release(lease, ok)
+
+    def cancel(self):
+        # closing the connection makes the server stop generating. The close
+        # blocks while another thread is inside a read, so do it off-thread;
+        # an attempt still waiting for headers notices the flag afterwards.
+        if self.cancelled:
+            return
+        self.cancelled = True
+        if self.response is not None and self.is_alive():
+            threading.Thread(target=self.response.close, daemon=True).start()
 
 
 class LLMInterface:
     """Send prompts to a local LLM endpoint and yield streamed responses."""
 
-    def __init__(self, model_name="qwen3:14b", temperature: float = 0.0):
-        """Create a new interface instance for a named model and temperature."""
+    def __init__(
+        self,
+        model_name="qwen3:14b",
+        temperature: float = 0.0,
+        endpoint: str | None = None,
+        options: dict | None = None,
+        cache: ResponseCache | None = None,
+        backend: Backend | None = None,
+    ):
+        """Create a new interface instance for a named model and temperature.
+
+        `endpoint` pins the interface to one server; by default Ollama calls
+        are routed through the shared endpoint pool. `options` are passed
+        through to the server as Ollama model options. `cache` overrides the
+        global response cache (mostly for tests). `backend` selects the server
+        dialect (default: Ollama).
+        """
         # default to deterministic outputs unless configured otherwise
         self.model_name = model_name
         self.temperature = temperature
+        self.backend: Backend = backend or OllamaBackend()
+        self.pool: EndpointPool | None = None
+        self._endpoint = ""
+        self._prefix_contexts: OrderedDict = OrderedDict()
+        self.use_backend(self.backend, endpoint)
+        self.last_endpoint: str | None = None
+        self.options = dict(options or {})
+        self.cache = cache
+        self.use_cache = True
+        self.role: str | None = None
+        self.keep_alive: str | int | None = None
+        # callables invoked as listener(llm) after every finished call
+        self.listeners: list = []
+        self.reuse_context = bool(get_config().get("llm", "reuse_context", True))
+        self.hedging: HedgePolicy | None = get_hedge_policy()
+        self.sizer: ContextSizer | None = get_context_sizer()
+        self.last_num_ctx: int | None = None
+        self.last_truncation_risk = False
+        self._prompt_chars = 0
+        self.last_hedged = False
         self.last_error: str | None = None
+        self.last_cached = False
+        self.last_stopped = False
+        self.last_metadata: dict = {}
+        self.last_context: list | None = None
+        self.last_stats: CallStats | None = None
+        self._started_at = 0.0
+        self._ttft: float | None = None
+        self._cancelled = threading.Event()
 
-    def generate(self, prompt: str):
-        """Send a prompt to a local Ollama model via HTTP API and stream the output."""
-        self.last_error = None
+    @property
+    def endpoint(self) -> str:
+        return self._endpoint
+
+    @endpoint.setter
+    def endpoint(self, url: str) -> None:
+        """Pin the interface to `url`, bypassing the endpoint pool."""
+        self._endpoint = url.rstrip("/")
+        self.pool = None
+
+    def use_backend(self, backend: Backend, endpoint: str | None = None) -> None:
+        """Switch to `backend`, on `endpoint` or the backend's default server."""
+        self.backend = backend
+        if endpoint is not None:
+            self.endpoint = endpoint
+        elif backend.pooled:
+            self.pool = get_endpoint_pool()
+            self._endpoint = self.pool.primary
+        else:
+            self.endpoint = backend.default_endpoint
+        if not backend.supports_context:
+            self.reset_context()
+
+    def clone(self, **options) -> "LLMInterface":
+        """Return a copy for use in another thread, with `options` overriding model options.
+
+        Per-call `last_*` state is the clone's own; listeners, the endpoint
+        pool and primed prefix contexts are shared with this interface.
+        """
+        twin = copy.copy(self)
+        twin.options = {**self.options, **options}
+        twin._cancelled = threading.Event()
+        twin._start()
+        twin.last_stats = None
+        return twin
+
+    def cancel(self) -> None:
+        """Abort the streaming call at its next chunk; later calls end before sending anything.
+
+        Meant for throwaway `clone`s whose result is no longer wanted; the
+        aborted call sets `last_error` and is not cached.
+        """
+        self._cancelled.set()
+
+    def _route(self, pin: str | None, tried: list):
+        """Return `(lease, url)` for the next attempt; `lease` is None without a pool."""
+        if self.pool is None:
+            self.last_endpoint = pin or self._endpoint
+            return None, self.last_endpoint
+        lease = self.pool.acquire(self.model_name, exclude=tried, pin=pin)
+        self.last_endpoint = lease.url
+        return lease, lease.url
 
+    def _release(self, lease: Endpoint | None, ok: bool = True) -> None:
+        if lease is not None and self.pool is not None:
+            self.pool.release(lease, ok)
+
+    def _can_fail_over(self, pin: str | None, tried: list) -> bool:
+        return self.pool is not None and not pin and len(tried) < len(self.pool)
+
+    def _open(self, payload: dict, pin: str | None = None, tried: list | None = None):
+        """POST `payload`, failing over to another pooled endpoint if a server is down.
+
+        Endpoints in `tried` are skipped; every endpoint attempted is appended.
+        """
+        tried = [] if tried is None else tried
+        while True:
+            lease, url = self._route(pin, tried)
+            tried.append(url)
+            try:
+                response = get_session().post(
+                    f"{url}{self.backend.path}", json=self.backend.body(payload), stream=True
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                self._release(lease, ok=False)
+                if not self._can_fail_over(pin, tried):
+                    raise
+                continue
+            if response.status_code >= 500 and self._can_fail_over(pin, tried):
+                response.close()
+                self._release(lease, ok=False)
+                continue
+            return response, lease
+
+    def _lines(self, payload: dict, pin: str | None = None):
+        """Yield the raw NDJSON lines of one request."""
+        response, lease = self._open(payload, pin)
+        ok = True
         try:
-            url = "http://localhost:11434/api/generate"
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": True,
-                "temperature": self.temperature,
-            }
-            response = requests.post(url, json=payload, stream=True)
             response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield line
+        except requests.RequestException as e:
+            ok = not isinstance(e, (requests.ConnectionError, requests.exceptions.ChunkedEncodingError))
+            raise
+        finally:
+            # hand the connection back to the pool even if the consumer
+            # stopped iterating early
+            response.close()
+            self._release(lease, ok)
+
+    def _hedged_lines(self, payload: dict, pin: str | None = None):
+        """Like `_lines`, but race a second request if the first stalls.
+
+        The hedge goes to another endpoint unless the call is pinned (or there
+        is none), in which case it uses a second slot of the same server.
+        """
+        lines: queue.Queue = queue.Queue()
+        attempts = [_Attempt(self, 0, payload, pin, (), lines)]
+        attempts[0].start()
+        delay = self.hedging.delay(self.model_name)
+        started = time.perf_counter()
+        failed: set = set()
+        winner = None
+        try:
+            while True:
+                timeout = None
+                if winner is None and len(attempts) == 1:
+                    timeout = max(delay - (time.perf_counter() - started), 0.0)
+                try:
+                    index, item = lines.get(timeout=timeout)
+                except queue.Empty:
+                    exclude = attempts[0].tried[:1] if pin is None else ()
+                    attempts.append(_Attempt(self, 1, payload, pin, exclude, lines))
+                    attempts[1].start()
+                    continue
+
+                if winner is None:
+                    if isinstance(item, Exception) or item is _END:
+                        # this copy died before producing anything
+                        failed.add(index)
+                        if len(failed) < len(attempts):
+                            continue
+                        if isinstance(item, Exception):
+                            raise item
+                        return
+                    winner = index
+                    for attempt in attempts:
+                        if attempt.index != winner:
+                            attempt.cancel()
+                    self.last_hedged = len(attempts) > 1
+                    self.last_endpoint = attempts[winner].url
+                    self.hedging.observe(
+                        self.model_name,
+                        time.perf_counter() - started,
+                        hedged=self.last_hedged,
+                        hedge_won=winner == 1,
+                    )
+                if index != winner:
+                    continue
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    def _payload(
+        self,
+        prompt: str,
+        context: list | None = None,
+        options: dict | None = None,
+        stop: list | None = None,
+        template: str | None = None,
+    ) -> dict:
+        merged = {"temperature": self.temperature}
+        merged.update(self.options)
+        merged.update(options or {})
+        if self.sizer is not None and "num_ctx" not in merged:
+            merged["num_ctx"], self.last_truncation_risk = self.sizer.num_ctx(
+                self.model_name, prompt, len(context or []), merged.get("num_predict")
+            )
+        self.last_num_ctx = merged.get("num_ctx")
+        # only full prompts tell us how many tokens the text itself takes
+        self._prompt_chars = 0 if context else len(prompt)
+        if stop:
+            merged["stop"] = list(stop)
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True,
+            "temperature": self.temperature,
+            "options": merged,
+        }
+        if context:
+            payload["context"] = context
+        if template is not None:
+            payload["template"] = template
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
 
+    def _cache_for(self, payload: dict, until=None):
+        """Return (cache, key) for cacheable deterministic requests, else (None, None).
+
+        Early-terminated outputs are only valid for the same stop condition,
+        so its `key()` (see `core.stop_conditions`) is part of the cache key;
+        a condition without one makes the call uncacheable.
+        """
+        if not self.use_cache:
+            return None, None
+        options = payload.get("options", {})
+        if options.get("temperature", 0.0) != 0.0 and "seed" not in options:
+            return None, None
+        if until is not None and not hasattr(until, "key"):
+            return None, None
+        cache = self.cache or get_response_cache()
+        if cache is None:
+            return None, None
+        if until is not None:
+            payload = dict(payload, until=until.key())
+        if self.backend.name != OllamaBackend.name:
+            payload = dict(payload, backend=self.backend.name)
+        return cache, cache.key(payload)
+
+    def _start(self):
+        self.last_error = None
+        self.last_cached = False
+        self.last_metadata = {}
+        self.last_context = None
+        self.last_stopped = False
+        self.last_hedged = False
+        self.last_truncation_risk = False
+        self._started_at = time.perf_counter()
+        self._ttft = None
+
+    def _mark(self, text: str):
+        if text and self._ttft is None:
+            self._ttft = time.perf_counter() - self._started_at
+
+    def _finish(self, data: dict):
+        """Keep the final chunk's metadata (timings, token counts, context)."""
+        self.last_metadata = {k: v for k, v in data.items() if k not in ("response", "context")}
+        self.last_context = data.get("context")
+        if self.sizer is not None and not self.last_cached and self._prompt_chars:
+            self.sizer.estimator.calibrate(self.model_name, self._prompt_chars, data.get("prompt_eval_count", 0))
+
+    def _replayed(self, take):
+        """Take on the outcome of a call replayed from a cassette."""
+        self.last_cached = take.cached
+        self.last_stopped = take.stopped
+        self.last_error = take.error
+        final = take.final()
+        if final is not None:
+            self._finish(final)
+
+    def _notify(self):
+        self.last_stats = CallStats.from_metadata(
+            self.model_name,
+            self.role,
+            {} if self.last_cached else self.last_metadata,
+            ttft_s=self._ttft,
+            wall_s=time.perf_counter() - self._started_at,
+            cached=self.last_cached,
+            stopped=self.last_stopped,
+            hedged=self.last_hedged,
+            error=self.last_error,
+        )
+        for listener in self.listeners:
             try:
-                for line in response.iter_lines():
-                    if not line:
-                        continue
-                    try:
-                        data = json.loads(line)
-                        yield data.get("response", "")
-                    except json.JSONDecodeError:
-                        # Ignore non-JSON lines
+                listener(self)
+            except Exception:
+                pass
+
+    def generate(
+        self,
+        prompt: str,
+        context: list | None = None,
+        options: dict | None = None,
+        stop: list | None = None,
+        until: Optional[Callable[[str], bool]] = None,
+        endpoint: str | None = None,
+        template: str | None = None,
+    ):
+        """Send a prompt to a local Ollama model via HTTP API and stream the output.
+
+        `context` continues from a KV context returned by an earlier call and
+        `options` overrides model options for this call only. `stop` lists
+        server-side stop sequences; `until` is fed every chunk and ends the
+        stream (closing the connection) once it returns True. `endpoint` pins
+        the call to one pooled server, since a `context` is only valid on the
+        server that produced it. `template` overrides the model's prompt
+        template for this call.
+        """
+        self._start()
+        tape = None
+
+        try:
+            if self._cancelled.is_set():
+                self.last_error = CANCELLED
+                return
+            payload = self._payload(prompt, context, options, stop, template)
+            cassette = get_cassette()
+            if cassette is not None and cassette.replaying:
+                take = cassette.take(payload)
+                for chunk in take.play(cassette.realtime):
+                    self._mark(chunk)
+                    if until is not None:
+                        until(chunk)
+                    yield chunk
+                self._replayed(take)
+                return
+            tape = cassette.tape(payload, self.role) if cassette is not None else None
+
+            cache, key = self._cache_for(payload, until)
+            if cache is not None:
+                entry = cache.lookup(key)
+                if entry is not None:
+                    self.last_cached = True
+                    self._mark("cached")
+                    for chunk in entry[0]:
+                        # keep stateful predicates (and their parsers) in step
+                        if until is not None:
+                            until(chunk)
+                        if tape is not None:
+                            tape.add(chunk)
+                        yield chunk
+                    self._finish(entry[1])
+                    return
+
+            if self.hedging is not None:
+                lines = self._hedged_lines(payload, endpoint)
+            else:
+                lines = self._lines(payload, endpoint)
+            decode = self.backend.decoder()
+            chunks = []
+            final = None
+            try:
+                for line in lines:
+                    if self._cancelled.is_set():
+                        self.last_error = CANCELLED
+                        break
+                    data = decode(line)
+                    if data is None:
                         continue
+                    if data.get("done"):
+                        final = data
+                        self._finish(data)
+                    text = data.get("response", "")
+                    chunks.append(text)
+                    self._mark(text)
+                    if tape is not None:
+                        tape.add(text)
+                    yield text
+                    if until is not None and until(text) and final is None:
+                        self.last_stopped = True
+                        break
             except requests.RequestException as e:
                 self.last_error = str(e)
                 return
+            finally:
+                lines.close()
+
+            # only complete (or deliberately stopped) streams are worth replaying
+            if cache is not None and (final is not None or self.last_stopped):
+                cache.put(key, chunks, dict(self.last_metadata, context=self.last_context))
+        except Exception as e:
+            self.last_error = str(e)
+            return
+        finally:
+            if tape is not None:
+                tape.save(self)
+            self._notify()
+
+    async def agenerate(
+        self,
+        prompt: str,
+        context: list | None = None,
+        options: dict | None = None,
+        stop: list | None = None,
+        until: Optional[Callable[[str], bool]] = None,
+        endpoint: str | None = None,
+        template: str | None = None,
+    ):
+        """Async variant of `generate` yielding the same chunks.
+
+        Cancelling the awaiting task closes the connection, which stops
+        generation on the server. Errors are reported via `last_error` exactly
+        like the blocking path.
+        """
+        self._start()
+        tape = None
+
+        try:
+            if self._cancelled.is_set():
+                self.last_error = CANCELLED
+                return
+            payload = self._payload(prompt, context, options, stop, template)
+            cassette = get_cassette()
+            if cassette is not None and cassette.replaying:
+                take = cassette.take(payload)
+                async for chunk in take.aplay(cassette.realtime):
+                    self._mark(chunk)
+                    if until is not None:
+                        until(chunk)
+                    yield chunk
+                self._replayed(take)
+                return
+            tape = cassette.tape(payload, self.role) if cassette is not None else None
+
+            cache, key = self._cache_for(payload, until)
+            if cache is not None:
+                entry = cache.lookup(key)
+                if entry is not None:
+                    self.last_cached = True
+                    self._mark("cached")
+                    for chunk in entry[0]:
+                        if until is not None:
+                            until(chunk)
+                        if tape is not None:
+                            tape.add(chunk)
+                        yield chunk
+                    self._finish(entry[1])
+                    return
+
+            chunks = []
+            final = None
+            tried: list = []
+            while True:
+                lease, url = self._route(endpoint, tried)
+                tried.append(url)
+                ok = True
+                decode = self.backend.decoder()
+                try:
+                    async for line in stream_lines(f"{url}{self.backend.path}", self.backend.body(payload)):
+                        if self._cancelled.is_set():
+                            self.last_error = CANCELLED
+                            break
+                        data = decode(line)
+                        if data is None:
+                            continue
+                        if data.get("done"):
+                            final = data
+                            self._finish(data)
+                        text = data.get("response", "")
+                        chunks.append(text)
+                        self._mark(text)
+                        if tape is not None:
+                            tape.add(text)
+                        yield text
+                        if until is not None and until(text) and final is None:
+                            self.last_stopped = True
+                            break
+                except (OSError, asyncio.TimeoutError, AsyncHTTPError) as e:
+                    ok = isinstance(e, AsyncHTTPError) and e.status < 500
+                    # only fail over before anything reached the caller
+                    if chunks or ok or not self._can_fail_over(endpoint, tried):
+                        raise
+                    continue
+                finally:
+                    self._release(lease, ok)
+                break
+
+            if cache is not None and (final is not None or self.last_stopped):
+                cache.put(key, chunks, dict(self.last_metadata, context=self.last_context))
         except Exception as e:
             self.last_error = str(e)
             return
+        finally:
+            if tape is not None:
+                tape.save(self)
+            self._notify()
+
+    # ------------------------------------------------------------------
+    # Prefix / KV context reuse
+    # ------------------------------------------------------------------
+
+    def reset_context(self) -> None:
+        """Forget every primed prefix context."""
+        self._prefix_contexts.clear()
+
+    def _remember_prefix(self, prefix: str, context: list | None) -> tuple:
+        # the priming call decodes one token; drop it so the context holds
+        # exactly the prefix. An empty list records that the server returned
+        # no context, so the prefix is not primed again.
+        entry = (self.last_endpoint or self._endpoint, context[:-1] if context else [])
+        self._prefix_contexts[(self.model_name, prefix)] = entry
+        while len(self._prefix_contexts) > MAX_PREFIX_CONTEXTS:
+            self._prefix_contexts.popitem(last=False)
+        return entry
+
+    def _prefix_context(self, prefix: str) -> tuple | None:
+        """Return `(endpoint, context)` for a primed prefix still usable on its server."""
+        key = (self.model_name, prefix)
+        entry = self._prefix_contexts.get(key)
+        if entry is None:
+            return None
+        if self.pool is None:
+            usable = entry[0] == self._endpoint
+        else:
+            server = self.pool.get(entry[0])
+            usable = server is not None and server.healthy
+        if not usable:
+            del self._prefix_contexts[key]
+            return None
+        self._prefix_contexts.move_to_end(key)
+        return entry
+
+    def _prime(self, prefix: str) -> tuple | None:
+        if self._cancelled.is_set():
+            self.last_error = CANCELLED
+            return None
+        entry = self._prefix_context(prefix)
+        if entry is not None:
+            return entry
+        for _ in self.generate(prefix, options={"num_predict": 1}, template=PASS_THROUGH_TEMPLATE):
+            pass
+        if self.last_error:
+            return None
+        return self._remember_prefix(prefix, self.last_context)
+
+    def prime_prefix(self, prefix: str) -> list | None:
+        """Prefill `prefix` once on the server and remember its KV context."""
+        entry = self._prime(prefix)
+        return entry[1] if entry is not None else None
+
+    def _reuses_context(self, delta: str) -> bool:
+        # an empty prompt only loads the model on Ollama, so a call with
+        # nothing after the prefix sends the full prompt instead
+        return bool(delta) and self.reuse_context and self.backend.supports_context
+
+    def generate_with_prefix(self, prefix: str, delta: str, **kwargs):
+        """Stream `prefix + delta`, sending only `delta` when the prefix context is primed.
+
+        Falls back to the full prompt when `delta` is empty, context reuse is
+        disabled or the server does not return a context, but not when the
+        call was cancelled while priming. Extra keyword arguments are passed
+        on to `generate`.
+        """
+        primed = None
+        if self._reuses_context(delta):
+            primed = self._prime(prefix)
+            if primed is None and self.last_error == CANCELLED:
+                return
+        if primed and primed[1]:
+            yield from self.generate(
+                delta, context=primed[1], endpoint=primed[0], template=PASS_THROUGH_TEMPLATE, **kwargs
+            )
+        else:
+            yield from self.generate(prefix + delta, **kwargs)
+
+    async def agenerate_with_prefix(self, prefix: str, delta: str, **kwargs):
+        """Async variant of `generate_with_prefix`."""
+        primed = None
+        if self._reuses_context(delta):
+            primed = self._prefix_context(prefix)
+            if primed is None:
+                async for _ in self.agenerate(prefix, options={"num_predict": 1}, template=PASS_THROUGH_TEMPLATE):
+                    pass
+                if self.last_error == CANCELLED:
+                    return
+                if not self.last_error:
+                    primed = self._remember_prefix(prefix, self.last_context)
+
+        if primed and primed[1]:
+            async for chunk in self.agenerate(
+                delta, context=primed[1], endpoint=primed[0], template=PASS_THROUGH_TEMPLATE, **kwargs
+            ):
+                yield chunk
+        else:
+            async for chunk in self.agenerate(prefix + delta, **kwargs):
+                yield chunk
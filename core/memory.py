@@ -0,0 +1,115 @@
+"""Rolling memory of earlier repair attempts.
+
+Instead of handing the models only the latest raw error, `IterationMemory`
+keeps a bounded summary of every earlier attempt (spec, error, suggested
+fix), compressed by a small summariser model using the summariser prompt.
+Folding the previous attempt into the summary runs on a background thread
+while the sandbox executes the current one, so it rarely delays the loop.
+The context handed to the thinker and coder is the summary plus the tail of
+the latest error, both capped, so prompt size stays roughly constant across
+iterations.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+
+from core.config import get_config
+from core.constants import DEFAULT_SUMMARIZER_MODEL
+from core.llm_interface import LLMInterface
+from core.prompt_manager import PromptManager
+
+
+@dataclass
+class Attempt:
+    iteration: int
+    spec: str
+    error: str
+    fix: str = ""
+
+    def describe(self) -> str:
+        text = f"Iteration {self.iteration}: spec: {self.spec.strip()}\nError: {self.error.strip() or 'none'}"
+        if self.fix:
+            text += f"\nSuggested fix: {self.fix.strip()}"
+        return text
+
+
+def _tail(text: str, limit: int) -> str:
+    return text if len(text) <= limit else "..." + text[-limit:]
+
+
+class IterationMemory:
+    """Bounded, asynchronously maintained summary of previous attempts."""
+
+    def __init__(
+        self,
+        llm: Optional[LLMInterface] = None,
+        prompts: Optional[PromptManager] = None,
+        max_chars: int = 1500,
+        error_chars: int = 1500,
+    ):
+        self.llm = llm or LLMInterface(DEFAULT_SUMMARIZER_MODEL)
+        self.prompts = prompts or PromptManager()
+        self.max_chars = max_chars
+        self.error_chars = error_chars
+        self.summary = ""
+        self._unfolded: List[Attempt] = []
+        self._worker: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, prompts: Optional[PromptManager] = None) -> "IterationMemory":
+        config = get_config()
+        return cls(
+            LLMInterface(config.get("memory", "model", DEFAULT_SUMMARIZER_MODEL)),
+            prompts,
+            max_chars=int(config.get("memory", "max_chars", 1500)),
+            error_chars=int(config.get("memory", "error_chars", 1500)),
+        )
+
+    def reset(self) -> None:
+        self.wait()
+        self.summary = ""
+        self._unfolded = []
+
+    def remember(self, iteration: int, spec: str, error: Optional[str], fix: str = "") -> None:
+        """Queue a finished attempt; it is folded into the summary by `compress`."""
+        self._unfolded.append(Attempt(iteration, spec or "", error or "", fix or ""))
+
+    def compress(self) -> None:
+        """Start folding queued attempts into the summary in the background."""
+        self.wait()
+        if not self._unfolded:
+            return
+        attempts, self._unfolded = self._unfolded, []
+        self._worker = threading.Thread(target=self._fold, args=(attempts,), daemon=True)
+        self._worker.start()
+
+    def wait(self) -> None:
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def _fold(self, attempts: List[Attempt]) -> None:
+        logs = "\n\n".join(
+            ([f"Summary so far: {self.summary}"] if self.summary else [])
+            + [a.describe() for a in attempts]
+        )
+        prompt = self.prompts.build_summariser(logs) + (
+            f"\nSummarise what was tried, what failed and what to avoid in at most "
+            f"{self.max_chars} characters.\n"
+        )
+        output = "".join(self.llm.generate(prompt, options={"num_predict": self.max_chars // 3}))
+        if self.llm.last_error or not output.strip():
+            # keep the loop going with the raw history, newest last
+            output = logs
+        self.summary = _tail(output.strip(), self.max_chars)
+
+    def context(self, error: Optional[str]) -> Optional[str]:
+        """Error context for the next model call: summary plus the latest error."""
+        self.wait()
+        parts = []
+        if self.summary:
+            parts.append(f"Earlier attempts (summary): {self.summary}")
+        if error:
+            parts.append(_tail(error, self.error_chars))
+        return "\n".join(parts) or None
@@ -0,0 +1,108 @@
+"""Pipelined thinker -> coder hand-off.
+
+In pipelined mode (`repair.pipeline`) the coder does not wait for the
+thinker's stream to end. `SpecWatcher` hands the `spec` field to the coder as
+soon as its JSON string has closed, while the thinker finishes the rest of
+its block. On repair iterations the coder can also start speculatively from
+the previous spec and the new error while the thinker revises
+(`repair.speculate`); that result is only kept when the revised spec is
+`similar` enough to the one it was generated from.
+
+Coder calls run as `CoderJob`s on a cloned plugin, so they never share an
+`LLMInterface` with the thread streaming the thinker.
+"""
+
+import difflib
+import threading
+from contextlib import nullcontext
+from typing import Callable, Optional, Tuple
+
+from core.accounting import CallLedger, Scope
+from core.candidates import clone_plugin
+from core.stop_conditions import FirstJsonBlock
+from core.stream_parser import StreamParser, streamed_field
+
+
+def similarity(a: str, b: str) -> float:
+    """Similarity of two specs in [0, 1], ignoring case and whitespace."""
+
+    def normalise(text: str) -> str:
+        return " ".join((text or "").lower().split())
+
+    return difflib.SequenceMatcher(None, normalise(a), normalise(b)).ratio()
+
+
+class SpecWatcher:
+    """Thinker stop condition that reports the spec as soon as it has streamed."""
+
+    def __init__(self, on_spec: Callable[[str], None], parser: Optional[StreamParser] = None):
+        self.stop = FirstJsonBlock(parser)
+        self.parser = self.stop.parser
+        self.on_spec = on_spec
+        self.spec: Optional[str] = None
+
+    def key(self) -> str:
+        # it stops exactly where `FirstJsonBlock` does
+        return self.stop.key()
+
+    def __call__(self, chunk: str) -> bool:
+        done = self.stop(chunk)
+        if self.spec is None and ('"' in chunk or done):
+            spec = streamed_field(self.parser, "spec")
+            if spec is not None:
+                self.spec = spec.strip()
+                self.on_spec(self.spec)
+        return done
+
+
+class CoderJob:
+    """`generate_code` for one spec on a background thread.
+
+    With a `ledger`, the job's calls are accounted under `purpose` and
+    `cancel` marks them unused.
+    """
+
+    def __init__(
+        self,
+        coder,
+        spec: str,
+        code: Optional[str],
+        error: Optional[str],
+        ledger: Optional[CallLedger] = None,
+        purpose: str = "code",
+    ):
+        self.spec = spec
+        self.coder = clone_plugin(coder)
+        self.ledger = ledger
+        self.scope: Optional[Scope] = None
+        self.result: Optional[Tuple[str, Optional[str]]] = None
+        self.error: Optional[BaseException] = None
+        self._scoped = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(code, error, purpose), daemon=True)
+        self._thread.start()
+
+    def _run(self, code: Optional[str], error: Optional[str], purpose: str) -> None:
+        try:
+            with self.ledger.scope(purpose) if self.ledger is not None else nullcontext() as scope:
+                self.scope = scope
+                self._scoped.set()
+                self.result = self.coder.generate_code(self.spec, code, error)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._scoped.set()
+
+    def join(self) -> Tuple[str, Optional[str]]:
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def cancel(self) -> None:
+        """Stop the coder stream; the result is discarded."""
+        llm = getattr(self.coder, "llm", None)
+        if llm is not None and hasattr(llm, "cancel"):
+            llm.cancel()
+        if self.ledger is not None:
+            self._scoped.wait()
+            self.ledger.mark(self.scope, False)
@@ -24,3 +24,21 @@ class EvaluatorPlugin(ABC):
     @abstractmethod
     def evaluate(self, code: str, stdout: str, stderr: str, exitcode: int, task: str) -> float:
         pass
+
+
+class AsyncThinkerPlugin(ABC):
+    @abstractmethod
+    async def agenerate_spec(self, task: str, code: Optional[str], error: Optional[str]) -> str:
+        pass
+
+
+class AsyncCoderPlugin(ABC):
+    @abstractmethod
+    async def agenerate_code(self, spec: str, code: Optional[str], error: Optional[str]) -> Tuple[str, Optional[str]]:
+        pass
+
+
+class AsyncEvaluatorPlugin(ABC):
+    @abstractmethod
+    async def aevaluate(self, code: str, stdout: str, stderr: str, exitcode: int, task: str) -> float:
+        pass
@@ -1,29 +1,34 @@
-from core.plugins.base import EvaluatorPlugin
+from core.evaluation import is_strict, judged, triage
+from core.plugins.base import AsyncEvaluatorPlugin, EvaluatorPlugin
 from core.llm_interface import LLMInterface
 
 
-class LLMEvaluator(EvaluatorPlugin):
+class LLMEvaluator(EvaluatorPlugin, AsyncEvaluatorPlugin):
     def __init__(self, model_name: str = "qwen3:4b"):
         self.llm = LLMInterface(model_name)
+        # the Verdict behind the last returned score
+        self.last_verdict = None
 
     def evaluate(self, code: str, stdout: str, stderr: str, exitcode: int, task: str) -> float:
-        score = 0.0
-        if exitcode == 0:
-            score += 1.0
-        if not stderr:
-            score += 1.0
-        if stdout.strip():
-            score += 1.0
+        self.last_verdict = triage(stdout, stderr, exitcode, strict=is_strict())
+        if self.last_verdict is None:
+            output = ""
+            for chunk in self.llm.generate(self._query(stdout, task)):
+                output += chunk
+            self.last_verdict = judged(stdout, stderr, exitcode, output, is_strict())
+        return self.last_verdict.score
 
-        query = (
+    async def aevaluate(self, code: str, stdout: str, stderr: str, exitcode: int, task: str) -> float:
+        self.last_verdict = triage(stdout, stderr, exitcode, strict=is_strict())
+        if self.last_verdict is None:
+            output = ""
+            async for chunk in self.llm.agenerate(self._query(stdout, task)):
+                output += chunk
+            self.last_verdict = judged(stdout, stderr, exitcode, output, is_strict())
+        return self.last_verdict.score
+
+    def _query(self, stdout: str, task: str) -> str:
+        return (
             f"Does this output satisfy the task '{task}'? Output: {stdout}. "
             "Answer YES or NO."
         )
-        output = ""
-        for chunk in self.llm.generate(query):
-            output += chunk
-
-        if "YES" in output.upper():
-            score += 2.0
-
-        return score
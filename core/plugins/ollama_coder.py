@@ -1,30 +1,28 @@
-from core.plugins.base import CoderPlugin
+from core.plugins.base import AsyncCoderPlugin, CoderPlugin
 from core.llm_interface import LLMInterface
 from core.prompt_manager import PromptManager
-import re
+from core.stop_conditions import TrailingProse
+from core.stream_parser import StreamParser, split_code_and_tests
 
 
-class OllamaCoder(CoderPlugin):
+class OllamaCoder(CoderPlugin, AsyncCoderPlugin):
     def __init__(self, model_name: str = "qwen2.5-coder:7b-instruct"):
         self.llm = LLMInterface(model_name)
         self.prompts = PromptManager()
 
     def generate_code(self, spec: str, code: str = None, error: str = None):
-        prompt = self.prompts.build_coder(spec, code, error)
-        output = ""
-        for chunk in self.llm.generate(prompt):
-            output += chunk
+        prefix, delta = self.prompts.coder_parts(spec, code, error)
+        parser = StreamParser()
+        for _ in self.llm.generate_with_prefix(prefix, delta, until=TrailingProse(parser=parser)):
+            pass
+        return self._parse(parser)
 
-        fences = re.findall(r"```(?:python\n)?([\s\S]*?)```", output)
-        if not fences:
-            return output.strip(), None
+    async def agenerate_code(self, spec: str, code: str = None, error: str = None):
+        prefix, delta = self.prompts.coder_parts(spec, code, error)
+        parser = StreamParser()
+        async for _ in self.llm.agenerate_with_prefix(prefix, delta, until=TrailingProse(parser=parser)):
+            pass
+        return self._parse(parser)
 
-        if len(fences) == 1:
-            return fences[0].strip(), None
-
-        last = fences[-1]
-        if "assert " in last or "pytest" in last or "unittest" in last:
-            code_blocks = fences[:-1]
-            return "\n\n".join([b.strip() for b in code_blocks]), last.strip()
-
-        return fences[0].strip(), None
+    def _parse(self, output):
+        return split_code_and_tests(output)
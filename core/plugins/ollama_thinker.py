@@ -1,33 +1,29 @@
-from core.plugins.base import ThinkerPlugin
+from core.plugins.base import AsyncThinkerPlugin, ThinkerPlugin
 from core.llm_interface import LLMInterface
 from core.prompt_manager import PromptManager
-import re
-import json
+from core.stop_conditions import FirstJsonBlock
+from core.stream_parser import StreamParser, extract_spec
 
 
-class OllamaThinker(ThinkerPlugin):
+class OllamaThinker(ThinkerPlugin, AsyncThinkerPlugin):
     def __init__(self, model_name: str = "qwen3:14b"):
         self.llm = LLMInterface(model_name)
         self.prompts = PromptManager()
 
     def generate_spec(self, task: str, code: str = None, error: str = None) -> str:
-        prompt = self.prompts.build_thinker(task, code, error)
-        output = ""
-        for chunk in self.llm.generate(prompt):
-            output += chunk
+        prefix, delta = self.prompts.thinker_parts(task, code, error)
+        parser = StreamParser()
+        for _ in self.llm.generate_with_prefix(prefix, delta, until=FirstJsonBlock(parser)):
+            pass
+        return self._parse(parser)
 
-        # Try JSON fenced block first
-        m = re.search(r"```json\s*([\s\S]*?)```", output)
-        if m:
-            try:
-                parsed = json.loads(m.group(1))
-                return parsed.get("spec", "").strip() if isinstance(parsed, dict) else ""
-            except Exception:
-                pass
+    async def agenerate_spec(self, task: str, code: str = None, error: str = None) -> str:
+        prefix, delta = self.prompts.thinker_parts(task, code, error)
+        parser = StreamParser()
+        async for _ in self.llm.agenerate_with_prefix(prefix, delta, until=FirstJsonBlock(parser)):
+            pass
+        return self._parse(parser)
 
-        # fallback to extracting code-like sections
-        m2 = re.search(r"```(?:python\n)?([\s\S]*?)```", output)
-        if m2:
-            return m2.group(1).strip()
-
-        return output.strip()
+    def _parse(self, output) -> str:
+        # JSON fenced block first, then the first code-like section
+        return extract_spec(output)
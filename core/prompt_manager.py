@@ -21,6 +21,8 @@ class PromptManager:
         self.prompts["summariser"] = self._load_prompt("summariser_prompt.txt")
         self.prompts["vision"] = self._load_prompt("vision_prompt.txt")
         self.prompts["coder"] = self._load_prompt("coder_prompt.txt")
+        # solved tasks shown to the thinker and coder (see `core.retrieval`)
+        self.examples = []
 
     def _load_prompt(self, filename):
         """Read a prompt file from disk and return its contents as a string.
@@ -36,12 +38,29 @@ class PromptManager:
 
     def build_thinker(self, task, code=None, error=None):
         """Compose the thinker prompt by inserting task, previous code, and error context."""
-        return (
-            self.prompts["thinker"]
-            + f"\n\nTask: {task}\n"
-            + (f"Previous code: {code}\n" if code else "")
-            + (f"Error: {error}\n" if error else "")
+        return "".join(self.thinker_parts(task, code, error))
+
+    def thinker_parts(self, task, code=None, error=None):
+        """Return the thinker prompt as `(static prefix, per-iteration delta)`.
+
+        The prefix (template, examples and task) stays identical across repair
+        iterations so its KV context can be reused by `LLMInterface`.
+        """
+        prefix = self.prompts["thinker"] + self.format_examples() + f"\n\nTask: {task}\n"
+        delta = (f"Previous code: {code}\n" if code else "") + (
+            f"Error: {error}\n" if error else ""
         )
+        return prefix, delta
+
+    def format_examples(self):
+        """Return `self.examples` as a compact block of solved tasks, or ""."""
+        if not self.examples:
+            return ""
+        blocks = [
+            f"Example task: {example.task}\nSolution:\n```python\n{example.code.strip()}\n```"
+            for example in self.examples
+        ]
+        return "\n\nSimilar tasks solved before:\n\n" + "\n\n".join(blocks) + "\n"
 
     def build_thinker_interaction(
         self, task, code=None, stdout=None, stderr=None, exitcode=None
@@ -56,12 +75,17 @@ class PromptManager:
         )
 
     def build_coder(self, spec, code=None, error=None):
-        return (
-            self.prompts["coder"]
-            + f"\n\nSpecification: {spec}\n"
+        return "".join(self.coder_parts(spec, code, error))
+
+    def coder_parts(self, spec, code=None, error=None):
+        """Return the coder prompt as `(static prefix, per-call delta)`."""
+        prefix = self.prompts["coder"] + self.format_examples()
+        delta = (
+            f"\n\nSpecification: {spec}\n"
             + (f"Previous code: {code}\n" if code else "")
             + (f"Error: {error}\n" if error else "")
         )
+        return prefix, delta
 
     def build_summariser(self, logs):
         """Return a summariser prompt with `logs` inserted for context."""
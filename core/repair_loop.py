@@ -8,17 +8,40 @@ the maximum iterations are exhausted.
 """
 
 import importlib
-import json
+import logging
 import os
-import re
 import sqlite3
+import threading
 import time
-from typing import Callable, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 
+from core.accounting import CallLedger, CallLimitExceeded
+from core.backends import OllamaBackend, load_models, resolve_backend
+from core.budget import EXHAUSTED, LEVEL_NAMES, SKIP_EVALUATOR, SMALL_MODEL, TaskBudget
+from core.candidates import Candidate, best, candidate_options, clone_plugin
+from core.cassette import get_cassette
+from core.checkpoint import IterationCheckpoint, SessionLog, checkpoints_enabled
+from core.config import get_config
+from core.constants import MAX_LLM_CALLS_PER_TASK
+from core.evaluation import HEURISTIC, LLM, Verdict, deterministic_score, is_strict, judged, triage
+from core.hedging import get_hedge_policy
+from core.http_pool import pool_summary
 from core.llm_interface import LLMInterface
 from core.logger import Logger
+from core.memory import IterationMemory
+from core.pipeline import CoderJob, SpecWatcher, similarity
 from core.prompt_manager import PromptManager
+from core.residency import ModelResidency
 from core.runner import CodeRunner
+from core.scheduling import FIXED, GROUPED, SCHEDULES, SwapTracker
+from core.retrieval import get_session_index
+from core.search import BEAM, LINEAR, STRATEGIES, Frontier, Node
+from core.solution_store import get_solution_store
+from core.stop_conditions import FirstJsonBlock, TrailingProse
+from core.stream_parser import StreamParser, extract_code, extract_json, extract_spec, split_code_and_tests
+from core.telemetry import TaskTelemetry
+from core.test_harness import instrument, read_results
 
 
 class RepairLoop:
@@ -28,6 +51,7 @@ class RepairLoop:
         """Initialize LLM interfaces, runner, prompt manager, and plugins."""
         self.logger = logger or Logger()
         self.prompt_manager = PromptManager()
+        self.keep_alive: dict = {}
 
         self.plugins = self._load_plugins()
 
@@ -44,7 +68,327 @@ class RepairLoop:
             "evaluator": self.evaluator,
         }
 
+        self.residency = ModelResidency(logger=self.logger, keep_alive=self.keep_alive)
+        self.swaps = SwapTracker()
+        self.telemetry = TaskTelemetry()
+        self.ledger = CallLedger()
+        self.budget: Optional[TaskBudget] = None
+        self.memory: Optional[IterationMemory] = None
+        if get_config().get("memory", "enabled", False):
+            self.memory = IterationMemory.from_config(self.prompt_manager)
+        self.best_candidate: Optional[Tuple[float, str]] = None
+        # evaluation tier -> number of verdicts it decided in this task
+        self.verdicts: dict = {}
+        self._budget_level = 0
+        self._full_models: dict = {}
+        # guards shared accounting when best-of-N candidates run in threads
+        self._lock = threading.RLock()
+        self._wire_llms()
+
         self.working_code: Optional[str] = None
+        # outcome of the last task, as saved to the session history
+        self.last_success: Optional[bool] = None
+        # checkpoint file of the current task (see `core.checkpoint`)
+        self.session: Optional[SessionLog] = None
+
+    def _role_llms(self) -> dict:
+        """Return `role -> LLMInterface` for every plugin that talks to a model."""
+        llms = {}
+        for role in ("thinker", "coder", "evaluator"):
+            llm = getattr(self.models[role], "llm", None)
+            if llm is not None and hasattr(llm, "listeners"):
+                llms[role] = llm
+        if getattr(self, "memory", None) is not None:
+            llms["summariser"] = self.memory.llm
+        return llms
+
+    def _wire_llms(self) -> None:
+        models = load_models()
+        for role, llm in self._role_llms().items():
+            llm.role = role
+            backend, endpoint = resolve_backend(role, llm.model_name, models)
+            if backend.name != llm.backend.name or endpoint:
+                llm.use_backend(backend, endpoint)
+            if role in self.keep_alive:
+                llm.keep_alive = self.keep_alive[role]
+            llm.listeners.append(self._on_llm_call)
+
+    def _on_llm_call(self, llm) -> None:
+        """Listener invoked by every plugin LLM after each call."""
+        with self._lock:
+            self._record_llm_call(llm)
+
+    def _record_llm_call(self, llm) -> None:
+        self.residency.observe(llm)
+        if llm.last_truncation_risk:
+            self.logger.log(
+                f"[num_ctx] {llm.role or llm.model_name} prompt may exceed the largest context window "
+                f"({llm.last_num_ctx} tokens) and be truncated",
+                level=logging.WARNING,
+            )
+        if not llm.last_cached:
+            self.swaps.record(llm.model_name)
+        if llm.last_stats is not None:
+            self.telemetry.record(llm.last_stats)
+            self.ledger.record(llm.last_stats)
+            if self.budget is not None:
+                self.budget.record_call(llm.last_stats)
+
+    def _begin_iteration(self, number: int) -> None:
+        if self.telemetry.current:
+            self._log_iteration_stats(self.telemetry.current)
+        self.telemetry.start_iteration(number)
+
+    def _log_iteration_stats(self, number: int) -> None:
+        totals = self.telemetry.iteration_totals(number)
+        if totals.calls:
+            self.logger.log(f"[Telemetry] iteration {number}: {totals.summary()}")
+
+    def _end_task(self) -> None:
+        """Log per-iteration and per-task inference statistics."""
+        if self.telemetry.current:
+            self._log_iteration_stats(self.telemetry.current)
+        self.logger.log(f"[Telemetry] task: {self.telemetry.task_totals().summary()}")
+        for role, totals in sorted(self.telemetry.by_role().items()):
+            self.logger.log(f"[Telemetry] {role}: {totals.summary()}")
+        self.logger.log(self.swaps.summary())
+        self.logger.log(f"[Calls] {self.ledger.summary()}")
+        for line in pool_summary().splitlines():
+            # counted since the shared session was created, not per task
+            self.logger.log(f"[HTTP] {line}")
+        if self.verdicts:
+            tiers = ", ".join(f"{tier} {count}" for tier, count in sorted(self.verdicts.items()))
+            self.logger.log(f"[Evaluation] verdicts by tier: {tiers}")
+        if self.budget is not None:
+            self.logger.log(self.budget.summary())
+        self._restore_models()
+        if self.memory is not None:
+            self.memory.wait()
+        hedging = get_hedge_policy()
+        if hedging is not None:
+            self.logger.log(hedging.summary())
+
+    def _apply_budget(self) -> int:
+        """Degrade according to the current budget level and return the level."""
+        with self._lock:
+            return self._degrade()
+
+    def _degrade(self) -> int:
+        level = self.budget.level
+        if level > self._budget_level:
+            self.logger.log(f"[Budget] degrading to {LEVEL_NAMES[level]}: {self.budget.summary()}")
+            if level >= SMALL_MODEL and not self._full_models:
+                self._use_small_models()
+            self._budget_level = level
+        return level
+
+    def _use_small_models(self) -> None:
+        llms = self._role_llms()
+        for role, small in self.budget.small_models.items():
+            llm = llms.get(role)
+            if llm is not None and small and llm.model_name != small:
+                self._full_models[role] = llm.model_name
+                llm.model_name = small
+                self.logger.log(f"[Budget] {role} now uses {small}")
+
+    def _restore_models(self) -> None:
+        llms = self._role_llms()
+        for role, model in self._full_models.items():
+            if role in llms:
+                llms[role].model_name = model
+        self._full_models = {}
+
+    def _error_context(self, error: Optional[str]) -> Optional[str]:
+        """Error context for the models: rolling memory plus the latest error."""
+        error = self.budget.shrink(error)
+        if self.memory is not None:
+            return self.memory.context(error)
+        return error
+
+    def _run_timed(self, run, *args, **kwargs):
+        """Call a runner method and charge its duration to the sandbox budget.
+
+        With an active cassette the run is recorded, or replayed without the
+        sandbox (see `core.cassette`).
+        """
+        started = time.time()
+        try:
+            cassette = get_cassette()
+            if cassette is not None:
+                return cassette.run(run, *args, **kwargs)
+            return run(*args, **kwargs)
+        finally:
+            if self.budget is not None:
+                with self._lock:
+                    self.budget.record_sandbox(time.time() - started)
+
+    def _heuristic_score(self, stdout: str, stderr: str, exitcode: int) -> float:
+        """Evaluator score without the LLM judgement (used when over budget)."""
+        return deterministic_score(stdout, stderr, exitcode)
+
+    def _judge(self, evaluator, candidate: Candidate, task: str) -> Verdict:
+        """Score a run, calling the evaluator only when the cheap tiers cannot decide."""
+        c = candidate
+        verdict = triage(c.stdout, c.stderr, c.exitcode, c.tests_passed, c.tests_total, strict=is_strict())
+        if verdict is None and self._apply_budget() >= SKIP_EVALUATOR:
+            verdict = Verdict(self._heuristic_score(c.stdout, c.stderr, c.exitcode), HEURISTIC, "budget")
+        if verdict is not None:
+            self._skip_call("evaluator")
+        else:
+            with self.ledger.scope("evaluate"):
+                score = evaluator.evaluate(c.code, c.stdout, c.stderr, c.exitcode, task)
+            verdict = getattr(evaluator, "last_verdict", None)
+            if verdict is None or verdict.score != score:
+                verdict = Verdict(score, LLM, type(evaluator).__name__)
+        with self._lock:
+            self.verdicts[verdict.tier] = self.verdicts.get(verdict.tier, 0) + 1
+        return verdict
+
+    def _remember_candidate(self, score: float, code: Optional[str]) -> None:
+        if code and (self.best_candidate is None or score > self.best_candidate[0]):
+            self.best_candidate = (score, code)
+
+    def _checkpoint(self, ran: Optional[tuple], code: Optional[str], last_error: Optional[str], working_code: Optional[str]) -> None:
+        """Append the iteration `ran` = (number, spec, candidate) and what it hands on to the session log."""
+        if ran is None or self.session is None:
+            return
+        number, spec, candidate = ran
+        checkpoint = IterationCheckpoint(
+            number,
+            spec,
+            candidate.code,
+            candidate.tests,
+            candidate.stdout,
+            candidate.stderr,
+            candidate.exitcode,
+            candidate.score,
+            code,
+            last_error,
+            working_code,
+        )
+        try:
+            self.session.record_iteration(checkpoint)
+        except OSError as e:
+            self.logger.log(f"[Checkpoint] could not write {self.session.path}: {e}", level=30)
+
+    def _open_session(self, task: str, resume: Optional[str], **meta) -> Optional[IterationCheckpoint]:
+        """Start (or reopen) the task's checkpoint file; returns the iteration to resume after."""
+        self.session = None
+        if resume:
+            self.session = SessionLog.open(resume)
+            start = self.session.last_iteration()
+            self.session.append({"type": "resume", "started": time.time(), **meta})
+            done = start.iteration if start is not None else 0
+            self.logger.log(f"[Checkpoint] resuming session {self.session.session} after iteration {done}")
+            return start
+        if checkpoints_enabled():
+            try:
+                self.session = SessionLog.create(task, **meta)
+                self.logger.log(f"[Checkpoint] session {self.session.session} ({self.session.path})")
+            except OSError as e:
+                self.logger.log(f"[Checkpoint] checkpoints disabled: {e}", level=30)
+        return None
+
+    def _store_solution(self, task: str, candidate: Candidate) -> None:
+        try:
+            store = get_solution_store()
+            if store is not None:
+                store.put(task, candidate.code, candidate.tests)
+        except sqlite3.Error as e:
+            self.logger.log(f"[Solutions] could not store the solution: {e}", level=30)
+
+    def _reuse_solution(self, task: str) -> Optional[str]:
+        """Return the stored solution for `task` if it still passes, else None.
+
+        A stored program that fails re-verification is invalidated.
+        """
+        try:
+            store = get_solution_store()
+            solution = store.lookup(task) if store is not None else None
+        except sqlite3.Error as e:
+            self.logger.log(f"[Solutions] lookup failed: {e}", level=30)
+            return None
+        if solution is None:
+            return None
+        self.logger.log("--- Re-verifying stored solution ---")
+        candidate = self._candidate(
+            0, self.coder, self.evaluator, task, task, None, None, generated=(solution.code, solution.tests)
+        )
+        self.logger.log(f"Evaluation score: {candidate.verdict.summary()}")
+        if not candidate.verdict.passed:
+            self.logger.log("[Solutions] stored solution no longer passes; solving from scratch", level=30)
+            store.invalidate(task)
+            return None
+        store.hit(task)
+        self.logger.log("🎉 Success! Stored solution passes evaluation.")
+        self._save_session(task, candidate.code, 0, success=True)
+        self._end_task()
+        return candidate.code
+
+    def _retrieve_examples(self, task: str) -> list:
+        """Solved sessions similar to `task`, for the thinker and coder prompts."""
+        config = get_config()
+        try:
+            index = get_session_index()
+            if index is None:
+                return []
+            examples = index.exemplars(
+                task,
+                k=int(config.get("retrieval", "k", 2)),
+                min_similarity=float(config.get("retrieval", "min_similarity", 0.35)),
+                max_chars=int(config.get("retrieval", "max_chars", 800)),
+            )
+        except (sqlite3.Error, OSError, ValueError) as e:
+            self.logger.log(f"[Retrieval] lookup failed: {e}", level=30)
+            return []
+        if examples:
+            scores = ", ".join(f"{e.score:.2f}" for e in examples)
+            self.logger.log(f"[Retrieval] {len(examples)} similar solved tasks as examples (similarity {scores})")
+        return examples
+
+    def _show_examples(self, examples: list) -> None:
+        """Put `examples` in the loop's prompts and in those of the thinker and coder plugins."""
+        self.prompt_manager.examples = examples
+        for role in ("thinker", "coder"):
+            prompts = getattr(self.models[role], "prompts", None)
+            if hasattr(prompts, "examples"):
+                prompts.examples = examples
+
+    def _budget_exhausted(self, task: str, iterations: int) -> Optional[str]:
+        """Stop the task and return the best candidate seen so far."""
+        best = self.best_candidate[1] if self.best_candidate else None
+        score = f" (score {self.best_candidate[0]})" if self.best_candidate else ""
+        self.logger.log(f"❌ Budget exhausted after {iterations} iterations; returning best candidate{score}.")
+        self._save_session(task, best or "", iterations, success=False)
+        self._end_task()
+        return best
+
+    def _skip_call(self, role: str) -> None:
+        """Account for a call the fixed schedule would have made here."""
+        llm = self._role_llms().get(role)
+        if llm is not None:
+            with self._lock:
+                self.swaps.skip(llm.model_name)
+
+    def warm_up(self) -> dict:
+        """Preload every role's model so the first iteration does not pay load time.
+
+        Each model is loaded on the server its role's calls go to: the pinned
+        endpoint, or the one the endpoint pool routes the model to (which
+        affinity routing then keeps using).
+        """
+        models, endpoints = {}, {}
+        for role, llm in self._role_llms().items():
+            if llm.backend.name != OllamaBackend.name:
+                continue
+            models[role] = llm.model_name
+            if llm.pool is None:
+                endpoints[role] = llm.endpoint
+            else:
+                lease = llm.pool.acquire(llm.model_name)
+                llm.pool.release(lease)
+                endpoints[role] = lease.url
+        return self.residency.preload(models, endpoints)
 
     def _load_plugins(self) -> dict:
         """Load plugin classes from configs/plugins.toml."""
@@ -61,6 +405,8 @@ class RepairLoop:
             return plugins
 
         for role, section in cfg.items():
+            if "keep_alive" in section:
+                self.keep_alive[role] = section["keep_alive"]
             plugin_path = section.get("plugin")
             if not plugin_path:
                 continue
@@ -99,21 +445,11 @@ class RepairLoop:
             self.prompts = prompts
 
         def generate_spec(self, task, code, error):
-            thinker_prompt = self.prompts.build_thinker(task, code, error)
-            self_llm_out = ""
-            for c in self.llm.generate(thinker_prompt):
-                self_llm_out += c
-            m = re.search(r"```json\s*([\s\S]*?)```", self_llm_out)
-            if m:
-                try:
-                    parsed = json.loads(m.group(1))
-                    return parsed.get("spec", "").strip() if isinstance(parsed, dict) else ""
-                except Exception:
-                    pass
-            m2 = re.search(r"```(?:python\n)?([\s\S]*?)```", self_llm_out)
-            if m2:
-                return m2.group(1).strip()
-            return self_llm_out.strip()
+            prefix, delta = self.prompts.thinker_parts(task, code, error)
+            parser = StreamParser()
+            for _ in self.llm.generate_with_prefix(prefix, delta, until=FirstJsonBlock(parser)):
+                pass
+            return extract_spec(parser)
 
     class _DefaultCoder:
         def __init__(self, model_name, prompts):
@@ -121,21 +457,11 @@ class RepairLoop:
             self.prompts = prompts
 
         def generate_code(self, spec, code, error):
-            coder_prompt = self.prompts.build_coder(spec, code, error)
-            out = ""
-            for c in self.llm.generate(coder_prompt):
-                out += c
-
-            fences = re.findall(r"```(?:python\n)?([\s\S]*?)```", out)
-            if not fences:
-                return out.strip(), None
-            if len(fences) == 1:
-                return fences[0].strip(), None
-            last = fences[-1]
-            if "assert " in last or "pytest" in last or "unittest" in last:
-                block = "\n\n".join(fences[:-1])
-                return block.strip(), last.strip()
-            return fences[0].strip(), None
+            prefix, delta = self.prompts.coder_parts(spec, code, error)
+            parser = StreamParser()
+            for _ in self.llm.generate_with_prefix(prefix, delta, until=TrailingProse(parser=parser)):
+                pass
+            return split_code_and_tests(parser)
 
     class _DefaultRunner:
         def __init__(self):
@@ -154,24 +480,20 @@ class RepairLoop:
         def __init__(self, model_name):
             self.model_name = model_name
             self.llm = LLMInterface(model_name)
+            self.last_verdict = None
 
         def evaluate(self, code, stdout, stderr, exitcode, task):
-            score = 0.0
-            if exitcode == 0:
-                score += 1
-            if not stderr:
-                score += 1
-            if stdout.strip():
-                score += 1
+            self.last_verdict = triage(stdout, stderr, exitcode, strict=is_strict())
+            if self.last_verdict is not None:
+                return self.last_verdict.score
 
             query = f"Does this output satisfy the task '{task}'? Output: {stdout}. Answer YES or NO."
             result_str = ""
             for chunk in self.llm.generate(query):
                 result_str += chunk
 
-            if "YES" in result_str.upper():
-                score += 2
-            return score
+            self.last_verdict = judged(stdout, stderr, exitcode, result_str, is_strict())
+            return self.last_verdict.score
 
     def _generate_spec(self, task: str, code: Optional[str], last_error: Optional[str], stream_callback: Optional[Callable[[str, str], None]] = None) -> str:
         return self.thinker.generate_spec(task, code, last_error)
@@ -180,23 +502,18 @@ class RepairLoop:
         return self.coder.generate_code(spec, code, last_error)
 
     def _split_code_and_tests(self, output: str):
-        fences = re.findall(r"```(?:python\n)?([\s\S]*?)```", output)
-        if not fences:
-            return output, None
-
-        if len(fences) == 1:
-            return fences[0], None
-
-        last = fences[-1]
-        if "assert " in last or "pytest" in last or "unittest" in last:
-            return "\n\n".join(fences[:-1]), last
-
-        return fences[0], None
+        return split_code_and_tests(output)
 
     def evaluate_output(self, code: str, stdout: str, stderr: str, exitcode: int, task: str) -> float:
         return self.evaluator.evaluate(code, stdout, stderr, exitcode, task)
 
     def _save_session(self, task: str, code: str, iterations: int, success: bool):
+        self.last_success = success
+        if self.session is not None:
+            try:
+                self.session.finish(success, code, iterations)
+            except OSError as e:
+                self.logger.log(f"[Checkpoint] could not write {self.session.path}: {e}", level=30)
         db = sqlite3.connect("laph.db")
         cursor = db.cursor()
         cursor.execute(
@@ -249,112 +566,505 @@ class RepairLoop:
         return "", code, tests
 
     def _extract_code_from_output(self, output: str) -> str:
-        fence_match = re.search(r"```(?:python\n)?([\s\S]*?)```", output)
-        if fence_match:
-            return fence_match.group(1).strip()
-        fence_match2 = re.search(r"```([\s\S]*?)```", output)
-        if fence_match2:
-            return fence_match2.group(1).strip()
-        return output.strip()
+        return extract_code(output)
+
+    def _candidate(
+        self,
+        index: int,
+        coder,
+        evaluator,
+        task: str,
+        spec: str,
+        code: Optional[str],
+        error_context: Optional[str],
+        before_run: Optional[Callable[[], None]] = None,
+        generated: Optional[Tuple[str, Optional[str]]] = None,
+    ) -> Candidate:
+        """Generate (unless `generated` is given), run and score one program for `spec`.
+
+        The tests run through `core.test_harness`, so the candidate records
+        how many of them passed.
+        """
+        calls = None
+        if generated is not None:
+            new_code, tests = generated
+        else:
+            with self.ledger.scope("code") as calls:
+                new_code, tests = coder.generate_code(spec, code, error_context)
+
+        preamble, run_code_sanitized, run_tests_sanitized = self._sanitize_code_for_run(new_code, tests)
+        instrumented = instrument(run_tests_sanitized) if run_tests_sanitized else None
+        if instrumented is not None:
+            run_tests_sanitized = instrumented[0]
+        if run_tests_sanitized:
+            full_payload = preamble + run_code_sanitized + "\n\n" + run_tests_sanitized
+        else:
+            full_payload = preamble + run_code_sanitized
+
+        self.logger.log("--- Running Code ---")
+        if before_run is not None:
+            before_run()
+        stdout, stderr, exitcode = self._run_timed(self.runner.run, full_payload)
+        candidate = Candidate(index, new_code, tests, stdout, stderr, exitcode, calls=calls)
+        if instrumented is not None:
+            stdout, passed, _ = read_results(stdout)
+            # no report means the program died before the tests finished
+            candidate.stdout, candidate.tests_passed, candidate.tests_total = stdout, passed or 0, instrumented[1]
+
+        candidate.verdict = self._judge(evaluator, candidate, task)
+        candidate.score = candidate.verdict.score
+        return candidate
+
+    def _compress_memory(self) -> None:
+        if self.memory is not None:
+            # fold earlier attempts while the sandbox runs
+            self.memory.compress()
+
+    def _prime_coder(self, spec: str, code: Optional[str], error_context: Optional[str]) -> None:
+        """Prefill the coder's static prompt prefix once so every candidate reuses it."""
+        llm = getattr(self.coder, "llm", None)
+        prompts = getattr(self.coder, "prompts", None)
+        if llm is None or prompts is None or not hasattr(llm, "prime_prefix"):
+            return
+        if llm.reuse_context and llm.backend.supports_context:
+            with self.ledger.scope("code"):
+                llm.prime_prefix(prompts.coder_parts(spec, code, error_context)[0])
+
+    def _best_of(
+        self, n: int, task: str, spec: str, code: Optional[str], error_context: Optional[str]
+    ) -> Candidate:
+        """Generate, run and score `n` candidates concurrently and return the best."""
+        self._prime_coder(spec, code, error_context)
+        self._compress_memory()
+        llm = getattr(self.coder, "llm", None)
+        temperature = llm.options.get("temperature", llm.temperature) if llm is not None else 0.0
+        spread = float(get_config().get("repair", "candidate_spread", 0.8))
+        options = candidate_options(n, temperature, spread)
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            futures = [
+                pool.submit(
+                    self._candidate,
+                    i,
+                    clone_plugin(self.coder, **opts),
+                    clone_plugin(self.evaluator),
+                    task,
+                    spec,
+                    code,
+                    error_context,
+                )
+                for i, opts in enumerate(options)
+            ]
+            candidates = [future.result() for future in futures]
+        for candidate in candidates:
+            self.logger.log(f"[Best-of-{n}] {candidate.summary()}")
+        chosen = best(candidates)
+        self.logger.log(f"[Best-of-{n}] keeping candidate {chosen.index + 1}")
+        for candidate in candidates:
+            if candidate is not chosen:
+                self.ledger.mark(candidate.calls, False)
+        return chosen
+
+    def _can_pipeline(self) -> bool:
+        llm = getattr(self.thinker, "llm", None)
+        prompts = getattr(self.thinker, "prompts", None)
+        return hasattr(llm, "generate_with_prefix") and hasattr(prompts, "thinker_parts")
+
+    def _pipelined_spec(
+        self,
+        task: str,
+        thinker_code: Optional[str],
+        code: Optional[str],
+        error_context: Optional[str],
+        previous_spec: Optional[str],
+    ) -> Tuple[str, Optional[Tuple[str, Optional[str]]]]:
+        """Stream the thinker spec while the coder already works on it.
+
+        Returns `(spec, (code, tests))`, or `(spec, None)` when no coder result
+        matches the final spec and the coder still has to run.
+        """
+        config = get_config()
+        threshold = float(config.get("repair", "speculation_similarity", 0.9))
+        jobs = []
+        speculative = None
+        if previous_spec and error_context and config.get("repair", "speculate", True):
+            # the thinker usually revises the spec only slightly after an error
+            speculative = CoderJob(self.coder, previous_spec, code, error_context, self.ledger, "speculative code")
+            jobs.append(speculative)
+
+        def start_coder(spec: str) -> None:
+            if speculative is not None and similarity(spec, speculative.spec) >= threshold:
+                return
+            jobs.append(CoderJob(self.coder, spec, code, error_context, self.ledger))
+
+        prefix, delta = self.thinker.prompts.thinker_parts(task, thinker_code, error_context)
+        watcher = SpecWatcher(start_coder)
+        with self.ledger.scope("spec"):
+            for _ in self.thinker.llm.generate_with_prefix(prefix, delta, until=watcher):
+                pass
+        spec = extract_spec(watcher.parser)
+
+        # newest first: a job started from the streamed spec beats speculation
+        keep = next((job for job in reversed(jobs) if similarity(spec, job.spec) >= threshold), None)
+        for job in jobs:
+            if job is not keep:
+                job.cancel()
+        if speculative is not None:
+            if keep is speculative:
+                self.logger.log(f"[Pipeline] keeping speculative code (spec similarity {similarity(spec, keep.spec):.2f})")
+            else:
+                self.logger.log("[Pipeline] spec changed; discarding speculative code")
+        if keep is None:
+            return spec, None
+        return spec, keep.join()
+
+    def _expand(self, task: str, parent: Optional[Node], options: List[dict]) -> List[Node]:
+        """Revise `parent` (None: start from the task) into one scored child per option set."""
+        code = parent.candidate.code if parent is not None else None
+        error_context = self.budget.shrink(parent.feedback) if parent is not None else None
+        with self.ledger.scope("spec"):
+            spec = clone_plugin(self.thinker).generate_spec(task, code, error_context)
+        with ThreadPoolExecutor(max_workers=len(options)) as pool:
+            futures = [
+                pool.submit(
+                    self._candidate,
+                    i,
+                    clone_plugin(self.coder, **opts),
+                    clone_plugin(self.evaluator),
+                    task,
+                    spec,
+                    code,
+                    error_context,
+                )
+                for i, opts in enumerate(options)
+            ]
+            candidates = [future.result() for future in futures]
+        depth = parent.depth + 1 if parent is not None else 0
+        return [Node(c, spec, depth, parent.key if parent is not None else None) for c in candidates]
+
+    def _beam_search(self, task: str, max_iters: int) -> Optional[str]:
+        """Search strategy of `run_task`: expand the best attempts of a bounded frontier."""
+        config = get_config()
+        width = max(int(config.get("repair", "beam_width", 3)), 1)
+        branching = max(int(config.get("repair", "beam_branching", 2)), 1)
+        spread = float(config.get("repair", "candidate_spread", 0.8))
+        llm = getattr(self.coder, "llm", None)
+        temperature = llm.options.get("temperature", llm.temperature) if llm is not None else 0.0
+        frontier = Frontier(int(config.get("repair", "frontier_size", 12)))
+
+        parents: List[Optional[Node]] = [None]
+        rounds = 0
+        for i in range(max_iters):
+            if self._apply_budget() >= EXHAUSTED:
+                return self._budget_exhausted(task, i)
+            if i:
+                parents = frontier.pop(width)
+            if not parents:
+                self.logger.log("[Beam] frontier is empty; every attempt has been expanded")
+                break
+            rounds = i + 1
+            self.logger.log(f"--- Search round {i+1}/{max_iters}: expanding {len(parents)} ---")
+            self._begin_iteration(i + 1)
+
+            # the root fills the whole beam, later nodes branch
+            options = candidate_options(width if i == 0 else branching, temperature, spread)
+            with ThreadPoolExecutor(max_workers=len(parents)) as pool:
+                futures = [pool.submit(self._expand, task, parent, options) for parent in parents]
+                children = [node for future in futures for node in future.result()]
+
+            for node in children:
+                self.logger.log(f"[Beam] depth {node.depth} {node.candidate.summary()}")
+                self._remember_candidate(node.priority, node.candidate.code)
+                frontier.add(node)
+            self.logger.log(f"[Beam] {frontier.summary()}")
+
+            solved = [node for node in children if node.candidate.verdict.passed]
+            if solved:
+                winner = max(solved, key=lambda n: n.priority).candidate
+                code = winner.code
+                self.logger.log("🎉 Success! Program passes evaluation.")
+                self._store_solution(task, winner)
+                self._save_session(task, code, i + 1, success=True)
+                self._end_task()
+                return code
+
+        best = self.best_candidate[1] if self.best_candidate else ""
+        self._save_session(task, best, rounds, success=False)
+        self.logger.log("❌ Search ended without a working program.")
+        self._end_task()
+        return None
 
     def run_task(
         self,
         task: str,
         max_iters: int = 20,
         stream_callback: Optional[Callable[[str, str], None]] = None,
+        schedule: Optional[str] = None,
+        budget: Optional[TaskBudget] = None,
+        n_candidates: Optional[int] = None,
+        pipeline: Optional[bool] = None,
+        strategy: Optional[str] = None,
+        resume: Optional[str] = None,
     ) -> Optional[str]:
+        """Run the repair loop for `task` and return working code or None.
+
+        `schedule` selects the call order: "fixed" (default, from the
+        `repair.schedule` config) follows thinker -> coder -> evaluator ->
+        interaction -> coder; "grouped" keeps the thinker busy for both the
+        interaction analysis and the next spec and drops the follow-up coder
+        call, so fewer model swaps happen on GPUs that cannot hold every
+        model at once.
+
+        `budget` (default: `TaskBudget.from_config()`) caps wall time, LLM
+        calls, tokens and sandbox time. As it runs low the loop skips the LLM
+        evaluator, switches to smaller models and truncates error context;
+        once exhausted it returns the best-scoring candidate so far, which
+        may not be working code.
+
+        `n_candidates` (default: `repair.n_candidates`, 1) generates that
+        many programs per iteration concurrently, with increasing sampling
+        temperature, runs and scores them in parallel and continues with the
+        highest-scoring one.
+
+        `pipeline` (default: `repair.pipeline`) starts the coder as soon as the
+        thinker's spec has streamed, and on repair iterations speculatively
+        from the previous spec while the thinker revises it. It applies to
+        single-candidate runs with a thinker that exposes `llm` and `prompts`.
+
+        `strategy` (default: `repair.strategy`) is "linear", the chain
+        described above, or "beam", which keeps a bounded frontier of scored
+        attempts and refines the most promising ones in parallel (see
+        `core.search`); each of its rounds counts as one iteration and it
+        does not use the interaction step or the rolling memory.
+
+        Every linear iteration is checkpointed to `self.session` (see
+        `core.checkpoint`, `checkpoint.enabled`). `resume` names an earlier
+        session to continue after its last completed iteration, up to
+        `max_iters` iterations in total; `task` may then be empty. A session
+        that already succeeded returns its code without calling a model.
+        The rolling memory starts empty on resume.
+
+        Before the first iteration, a verified solution stored for the same
+        normalised task (see `core.solution_store`) is run and judged again
+        and returned if it still passes, without calling the thinker or
+        coder. Otherwise the most similar solved sessions (see
+        `core.retrieval`) are given to the thinker and coder prompts as
+        examples. Neither happens while a cassette records or replays, so a
+        replay repeats the recorded run whatever `laph.db` holds.
+        """
+        schedule = schedule or get_config().get("repair", "schedule", FIXED)
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown schedule {schedule!r}; expected one of {SCHEDULES}")
+        strategy = strategy or get_config().get("repair", "strategy", LINEAR)
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}; expected one of {STRATEGIES}")
+        if resume:
+            if strategy != LINEAR:
+                raise ValueError("Only the linear strategy can resume a session")
+            previous = SessionLog.open(resume)
+            task = task or previous.task
+            outcome = previous.outcome()
+            if outcome is not None and outcome.get("success"):
+                self.logger.log(f"[Checkpoint] session {previous.session} already succeeded")
+                self.session = None
+                self.last_success = True
+                return outcome.get("code")
+        self.swaps = SwapTracker()
+        self.telemetry = TaskTelemetry()
+        self.budget = budget or TaskBudget.from_config()
+        self.budget.start()
+        n_candidates = max(int(n_candidates or get_config().get("repair", "n_candidates", 1)), 1)
+        if pipeline is None:
+            pipeline = bool(get_config().get("repair", "pipeline", False))
+        pipeline = pipeline and n_candidates == 1 and self._can_pipeline()
+        self.best_candidate = None
+        self.last_success = None
+        self.verdicts = {}
+        self._budget_level = 0
+        # one call limit: the budget's when one is set, else the hard default
+        self.ledger = CallLedger(self.budget.llm_calls or MAX_LLM_CALLS_PER_TASK)
+        start = self._open_session(task, resume, max_iters=max_iters, schedule=schedule, strategy=strategy)
+        try:
+            # a cassette holds the model calls of one run; stored solutions and
+            # examples from laph.db would make that run take another path
+            from_history = get_cassette() is None
+            if from_history and not resume:
+                reused = self._reuse_solution(task)
+                if reused is not None:
+                    return reused
+            self._show_examples(self._retrieve_examples(task) if from_history else [])
+            if strategy == BEAM:
+                return self._beam_search(task, max_iters)
+            return self._run_linear(task, max_iters, stream_callback, schedule, n_candidates, pipeline, start)
+        except CallLimitExceeded as e:
+            self.logger.log(f"[Calls] {e}", level=30)
+            return self._budget_exhausted(task, self.telemetry.current)
+
+    def _run_linear(
+        self,
+        task: str,
+        max_iters: int,
+        stream_callback: Optional[Callable[[str, str], None]],
+        schedule: str,
+        n_candidates: int,
+        pipeline: bool,
+        start: Optional[IterationCheckpoint] = None,
+    ) -> Optional[str]:
+        """The linear strategy of `run_task`: one chain of repair iterations."""
+        if self.memory is not None:
+            self.memory.reset()
+
         code = None
         last_error = None
         working_code = None
+        spec = None
+        first = 0
+        if start is not None:
+            first = start.iteration
+            code, last_error, working_code, spec = start.next_code, start.last_error, start.working_code, start.spec
+            self._remember_candidate(start.score, start.code)
+        # the iteration to checkpoint once it has handed on its state
+        ran = None
 
-        for i in range(max_iters):
-            self.logger.log(f"--- Iteration {i+1}/{max_iters} ---")
-
-            spec = self.thinker.generate_spec(task, working_code or code, last_error)
-            self.logger.log("--- Running Code ---")
-            code, tests = self.coder.generate_code(spec, code, last_error)
+        try:
+            for i in range(first, max_iters):
+                self._checkpoint(ran, code, last_error, working_code)
+                ran = None
+                if self._apply_budget() >= EXHAUSTED:
+                    return self._budget_exhausted(task, i)
+                self.logger.log(f"--- Iteration {i+1}/{max_iters} ---")
+                self._begin_iteration(i + 1)
 
-            run_payload = code
-            if tests:
-                run_payload = code + "\n\n" + tests
+                error_context = self._error_context(last_error)
+                generated = None
+                if pipeline:
+                    spec, generated = self._pipelined_spec(task, working_code or code, code, error_context, spec)
+                else:
+                    with self.ledger.scope("spec"):
+                        spec = self.thinker.generate_spec(task, working_code or code, error_context)
+                self.logger.log("--- Running Code ---")
+                if n_candidates > 1:
+                    candidate = self._best_of(n_candidates, task, spec, code, error_context)
+                else:
+                    candidate = self._candidate(
+                        0,
+                        self.coder,
+                        self.evaluator,
+                        task,
+                        spec,
+                        code,
+                        error_context,
+                        before_run=self._compress_memory,
+                        generated=generated,
+                    )
+                code, tests = candidate.code, candidate.tests
+                stdout, stderr, exitcode = candidate.stdout, candidate.stderr, candidate.exitcode
+                ran = (i + 1, spec, candidate)
 
-            preamble, run_code_sanitized, run_tests_sanitized = self._sanitize_code_for_run(code, tests)
-            if run_tests_sanitized:
-                full_payload = preamble + run_code_sanitized + "\n\n" + run_tests_sanitized
-            else:
-                full_payload = preamble + run_code_sanitized
+                self.logger.log("--- Execution Result ---")
+                self.logger.log("STDOUT:\n" + stdout)
+                self.logger.log("STDERR:\n" + stderr)
 
-            self.logger.log("--- Running Code ---")
-            stdout, stderr, exitcode = self.runner.run(full_payload)
+                evaluation_score = candidate.score
+                self.logger.log(f"Evaluation score: {candidate.verdict.summary()}")
+                self._remember_candidate(evaluation_score, code)
 
-            self.logger.log("--- Execution Result ---")
-            self.logger.log("STDOUT:\n" + stdout)
-            self.logger.log("STDERR:\n" + stderr)
+                if candidate.verdict.passed:
+                    self.logger.log("🎉 Success! Program passes evaluation.")
+                    working_code = code
+                    self._store_solution(task, candidate)
+                    self._save_session(task, code, i + 1, success=True)
+                    self._end_task()
+                    return code
 
-            evaluation_score = self.evaluate_output(code, stdout, stderr, exitcode, task)
-            self.logger.log(f"Evaluation score: {evaluation_score}")
+                if self._apply_budget() >= EXHAUSTED:
+                    # hand on what a failed iteration passes to the next one
+                    self._checkpoint(ran, working_code, stderr, working_code)
+                    return self._budget_exhausted(task, i + 1)
 
-            if evaluation_score >= 3.0:
-                self.logger.log("🎉 Success! Program passes evaluation.")
-                working_code = code
-                self._save_session(task, code, i + 1, success=True)
-                return code
+                self.logger.log("--- Invoking Thinker Interaction ---")
+                interaction_prompt = self.prompt_manager.build_thinker_interaction(task, code, stdout, stderr, exitcode)
+                self.logger.log("--- Thinker Interaction Prompt ---\n" + interaction_prompt)
+                if stream_callback:
+                    stream_callback(interaction_prompt, "thinker_prompt")
+                    stream_callback(None, "thinker_start")
 
-            self.logger.log("--- Invoking Thinker Interaction ---")
-            interaction_prompt = self.prompt_manager.build_thinker_interaction(task, code, stdout, stderr, exitcode)
-            self.logger.log("--- Thinker Interaction Prompt ---\n" + interaction_prompt)
-            if stream_callback:
-                stream_callback(interaction_prompt, "thinker_prompt")
-                stream_callback(None, "thinker_start")
+                interaction = StreamParser()
+                with self.ledger.scope("interaction") as interaction_calls:
+                    for chunk in self.thinker.llm.generate(interaction_prompt, until=FirstJsonBlock(interaction)) if hasattr(self.thinker, 'llm') else []:
+                        if stream_callback:
+                            stream_callback(chunk, "thinker")
 
-            interaction_output = ""
-            for chunk in self.thinker.llm.generate(interaction_prompt) if hasattr(self.thinker, 'llm') else []:
-                interaction_output += chunk
                 if stream_callback:
-                    stream_callback(chunk, "thinker")
+                    stream_callback(None, "thinker_end")
 
-            if stream_callback:
-                stream_callback(None, "thinker_end")
+                parsed = None
+                try:
+                    parsed = extract_json(interaction)
+                except Exception as e:
+                    self.logger.log(f"[Thinker interaction parse error] {e}", level=40)
+                if not isinstance(parsed, dict):
+                    self.ledger.mark(interaction_calls, False)
 
-            parsed = None
-            try:
-                m = re.search(r"```json\s*([\s\S]*?)```", interaction_output)
-                if m:
-                    parsed = json.loads(m.group(1))
-                else:
-                    start = interaction_output.find("{")
-                    end = interaction_output.rfind("}")
-                    if start != -1 and end != -1 and end > start:
-                        parsed = json.loads(interaction_output[start : end + 1])
-            except Exception as e:
-                self.logger.log(f"[Thinker interaction parse error] {e}", level=40)
-
-            if isinstance(parsed, dict):
-                actions = parsed.get("actions", [])
-                followup_spec = parsed.get("followup_spec", "")
-
-                inputs = [a["payload"] for a in actions if a.get("type") == "input"]
-                if inputs:
-                    self.logger.log("--- Running interactive actions ---")
-                    istdout, istderr, iexit = self.runner.run_code_interactive(code, inputs=inputs)
-                    self.logger.log("--- Interactive Execution Result ---")
-                    self.logger.log("ISTDOUT:\n" + istdout)
-                    self.logger.log("ISTDERR:\n" + istderr)
-                    last_error = istderr or stderr
-                    if followup_spec:
-                        self.logger.log("--- Applying followup spec ---")
-                        code, tests = self.coder.generate_code(followup_spec, code, last_error)
+                if self.memory is not None:
+                    fix = parsed.get("followup_spec", "") if isinstance(parsed, dict) else ""
+                    self.memory.remember(i + 1, spec, stderr, fix)
+
+                if isinstance(parsed, dict):
+                    actions = parsed.get("actions", [])
+                    followup_spec = parsed.get("followup_spec", "")
+
+                    inputs = [a["payload"] for a in actions if a.get("type") == "input"]
+                    if inputs:
+                        self.logger.log("--- Running interactive actions ---")
+                        istdout, istderr, iexit = self._run_timed(self.runner.run_code_interactive, code, inputs=inputs)
+                        self.logger.log("--- Interactive Execution Result ---")
+                        self.logger.log("ISTDOUT:\n" + istdout)
+                        self.logger.log("ISTDERR:\n" + istderr)
+                        last_error = istderr or stderr
+                        if followup_spec and schedule == GROUPED:
+                            last_error = self._with_followup(last_error, followup_spec)
+                            self._skip_call("coder")
+                            continue
+                        if followup_spec:
+                            self.logger.log("--- Applying followup spec ---")
+                            code, tests = self._followup_code(followup_spec, code, last_error)
+                            continue
+                    elif followup_spec and schedule == GROUPED:
+                        last_error = self._with_followup(stderr, followup_spec)
+                        self._skip_call("coder")
+                        continue
+                    elif followup_spec:
+                        code, tests = self._followup_code(followup_spec, code, last_error)
                         continue
-                elif followup_spec:
-                    code, tests = self.coder.generate_code(followup_spec, code, last_error)
-                    continue
 
-            code = working_code
-            last_error = stderr
-            self.logger.log("--- Code failed, trying again... ---")
-            time.sleep(2)
+                code = working_code
+                last_error = stderr
+                self.logger.log("--- Code failed, trying again... ---")
+                time.sleep(2)
+        except CallLimitExceeded:
+            # out of calls after an evaluated iteration: keep it for a resume
+            if ran is not None:
+                self._checkpoint(ran, working_code, ran[2].stderr, working_code)
+            raise
 
+        self._checkpoint(ran, code, last_error, working_code)
         self._save_session(task, working_code or "", max_iters, success=False)
         self.logger.log("❌ Failed to generate a working script after max iterations.")
+        self._end_task()
         return None
 
+    def _followup_code(self, followup_spec: str, code: Optional[str], last_error: Optional[str]):
+        """Apply the interaction's follow-up spec with the coder.
+
+        The program is never run: the next iteration only passes it to the
+        thinker and coder as previous code, so its calls count as unused.
+        """
+        with self.ledger.scope("followup code") as calls:
+            result = self.coder.generate_code(followup_spec, code, self._error_context(last_error))
+        self.ledger.mark(calls, False)
+        return result
+
+    def _with_followup(self, error: Optional[str], followup_spec: str) -> str:
+        """Fold the interaction's suggested fix into the error context for the next spec."""
+        return (error or "").rstrip() + f"\nSuggested fix: {followup_spec}"
+
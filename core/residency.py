@@ -0,0 +1,113 @@
+"""Model residency management for memory-constrained GPUs.
+
+When the thinker, coder and evaluator models cannot all stay in VRAM, every
+role switch can force Ollama to reload a model. `ModelResidency` makes that
+cost visible and controllable:
+
+- `preload` warms models up front with a per-role `keep_alive`, on the
+  server each role's calls are routed to;
+- `loaded` queries `/api/ps` to report which models are resident;
+- `observe` is registered as an `LLMInterface` listener and logs every call
+  whose `load_duration` shows that the model had to be (re)loaded.
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+from core.endpoints import configured_endpoints
+from core.http_pool import get_session
+
+# load_duration above this many seconds means the model was actually loaded
+RELOAD_THRESHOLD_SECONDS = 0.1
+
+
+class ModelResidency:
+    """Preload models, track reloads and report what the server keeps loaded."""
+
+    def __init__(self, endpoint: Optional[str] = None, logger=None, keep_alive: Optional[Dict[str, str]] = None):
+        # default: the first configured server (`llm.endpoints` or `llm.endpoint`)
+        self.endpoint = (endpoint or configured_endpoints()[0]).rstrip("/")
+        self.logger = logger
+        self.keep_alive: Dict[str, str] = dict(keep_alive or {})
+        self.loads: Dict[str, int] = {}
+        self.load_seconds: Dict[str, float] = {}
+
+    def _log(self, message: str, level=logging.INFO):
+        if self.logger is not None:
+            try:
+                self.logger.log(message, level=level)
+            except TypeError:
+                # CLI logger takes the message only
+                self.logger.log(message)
+
+    def _record_load(self, model: str, seconds: float, role: Optional[str]):
+        self.loads[model] = self.loads.get(model, 0) + 1
+        self.load_seconds[model] = self.load_seconds.get(model, 0.0) + seconds
+        who = f" for {role}" if role else ""
+        self._log(f"[Residency] loaded {model}{who} in {seconds:.2f}s")
+
+    def preload(self, models: Dict[str, str], endpoints: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+        """Load each `role -> model` on the server and return load seconds per model.
+
+        `endpoints` maps a role to the server its calls go to; other roles
+        use `self.endpoint`. An empty-prompt generate request makes Ollama
+        load the model and apply `keep_alive` without producing tokens.
+        """
+        endpoints = endpoints or {}
+        timings: Dict[str, float] = {}
+        done = set()
+        for role, model in models.items():
+            url = endpoints.get(role, self.endpoint).rstrip("/")
+            if not model or (url, model) in done:
+                continue
+            done.add((url, model))
+            payload = {"model": model, "stream": False}
+            if role in self.keep_alive:
+                payload["keep_alive"] = self.keep_alive[role]
+            try:
+                response = get_session().post(f"{url}/api/generate", json=payload)
+                response.raise_for_status()
+                lines = [line for line in response.text.splitlines() if line.strip()]
+                data = json.loads(lines[-1]) if lines else {}
+            except Exception as e:
+                self._log(f"[Residency] preload of {model} failed: {e}", level=logging.WARNING)
+                continue
+            seconds = data.get("load_duration", 0) / 1e9
+            timings[model] = seconds
+            if seconds > RELOAD_THRESHOLD_SECONDS:
+                self._record_load(model, seconds, role)
+        return timings
+
+    def loaded(self) -> List[dict]:
+        """Return the models currently loaded on the server (from `/api/ps`)."""
+        try:
+            response = get_session().get(f"{self.endpoint}/api/ps", timeout=5)
+            response.raise_for_status()
+            return response.json().get("models", [])
+        except Exception as e:
+            self._log(f"[Residency] could not query loaded models: {e}", level=logging.WARNING)
+            return []
+
+    def observe(self, llm) -> None:
+        """`LLMInterface` listener: record calls that paid a model load."""
+        if llm.last_cached or not llm.last_metadata:
+            return
+        seconds = llm.last_metadata.get("load_duration", 0) / 1e9
+        if seconds > RELOAD_THRESHOLD_SECONDS:
+            self._record_load(llm.model_name, seconds, llm.role)
+
+    def report(self) -> str:
+        """Human-readable summary of resident models and observed loads."""
+        lines = []
+        for entry in self.loaded():
+            name = entry.get("name") or entry.get("model", "?")
+            vram = entry.get("size_vram")
+            until = entry.get("expires_at", "")
+            size = f" {vram / 1024 ** 3:.1f} GiB VRAM" if vram else ""
+            lines.append(f"resident: {name}{size}" + (f" until {until}" if until else ""))
+        if not lines:
+            lines.append("resident: none")
+        for model, count in sorted(self.loads.items()):
+            lines.append(f"loads: {model} x{count} ({self.load_seconds[model]:.2f}s total)")
+        return "\n".join(lines)
@@ -0,0 +1,164 @@
+"""Persistent content-addressed cache for LLM responses.
+
+Deterministic generations (temperature 0 or a fixed seed) are stored on disk
+keyed by a SHA-256 of the request (model, prompt, temperature, options and
+any KV context). A hit replays the recorded chunks through the normal
+streaming generator, so the CLI and GUI streaming callbacks behave exactly as
+for a live model.
+
+Entries expire after `cache.ttl_seconds` and the least recently used entries
+are evicted once the stored text exceeds `cache.max_size_mb`. The cache can be
+disabled globally with `set_cache_enabled(False)` (the CLI `--no-cache` flag)
+or via `LAPH_CACHE_ENABLED=false`.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from core.config import get_config
+
+
+class ResponseCache:
+    """SQLite-backed LRU cache of streamed LLM responses."""
+
+    def __init__(self, path: str, max_size_mb: float = 256, ttl_seconds: float = 7 * 86400):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    chunks TEXT,
+                    meta TEXT,
+                    size INTEGER,
+                    created REAL,
+                    last_used REAL
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def key(payload: dict) -> str:
+        """Return the content address of a request payload."""
+        material = {
+            "model": payload.get("model"),
+            "prompt": payload.get("prompt"),
+            "temperature": payload.get("temperature"),
+            # the window size does not change a response that fits in it
+            "options": {k: v for k, v in (payload.get("options") or {}).items() if k != "num_ctx"},
+            "context": payload.get("context"),
+            "until": payload.get("until"),
+        }
+        if payload.get("template") is not None:
+            material["template"] = payload["template"]
+        if payload.get("backend"):
+            material["backend"] = payload["backend"]
+        blob = json.dumps(material, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Tuple[List[str], dict]]:
+        """Return `(chunks, meta)` for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock, self._connect() as db:
+            row = db.execute(
+                "SELECT chunks, meta, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0]), json.loads(row[1] or "{}")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Return the cached chunks for `key`, or None on a miss or expired entry."""
+        entry = self.lookup(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, chunks: List[str], meta: Optional[dict] = None) -> None:
+        """Store a completed response and evict LRU entries beyond the size bound."""
+        blob = json.dumps(chunks, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, json.dumps(meta or {}), len(blob), now, now),
+            )
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(db, total - self.max_bytes)
+
+    def _evict(self, db: sqlite3.Connection, excess: int) -> None:
+        freed = 0
+        victims = []
+        for victim_key, size in db.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+            if freed >= excess:
+                break
+            victims.append((victim_key,))
+            freed += size
+        db.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM responses")
+
+
+_cache_instance: Optional[ResponseCache] = None
+_cache_enabled: Optional[bool] = None
+
+
+def set_cache_enabled(enabled: bool) -> None:
+    """Globally enable or disable the response cache (e.g. for `--no-cache`)."""
+    global _cache_enabled
+    _cache_enabled = enabled
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the global response cache, or None when caching is disabled."""
+    global _cache_instance
+    config = get_config()
+    enabled = _cache_enabled if _cache_enabled is not None else config.get("cache", "enabled", True)
+    if not enabled:
+        return None
+    if _cache_instance is None:
+        _cache_instance = ResponseCache(
+            config.get("cache", "path", "~/.cache/laph/responses.db"),
+            max_size_mb=config.get("cache", "max_size_mb", 256),
+            ttl_seconds=config.get("cache", "ttl_seconds", 7 * 86400),
+        )
+    return _cache_instance
+
+
+def reset_response_cache() -> None:
+    """Drop the global cache instance and enablement override (useful for testing)."""
+    global _cache_instance, _cache_enabled
+    _cache_instance = None
+    _cache_enabled = None
@@ -0,0 +1,296 @@
+"""Retrieval of similar solved sessions as few-shot exemplars.
+
+`SessionIndex` indexes the tasks of successful sessions in `laph.db` as
+hashed character n-gram vectors: each 3- and 4-gram of the normalised task
+(see `core.solution_store.normalise_task`) and each word is hashed into one
+of `dim` signed buckets, counts are damped with `log1p` and every row is
+scaled to unit length. Rows are appended to a flat float32 file that is
+memory-mapped for queries, so the index grows incrementally: `update`
+vectorises only the sessions added since the last call.
+
+TF-IDF weighting is applied on the query side. Document frequencies are
+counted per n-gram, over `DF_SLOTS` hashed slots, before the n-grams are
+folded into the much smaller vectors: at 128 dimensions nearly every bucket
+is non-zero in nearly every row, so a per-bucket IDF would be almost flat.
+Each query n-gram is weighted by its own IDF, and the cosine of the query
+against all rows is then a single matrix-vector product over the memory
+map. At the default 128 dimensions, 100k sessions take 51 MB and a query
+reads them once, in about 2-3 ms on one core.
+
+Only sessions still marked successful are offered as examples; a stored
+solution that fails re-verification marks its sessions as failed (see
+`SolutionStore.invalidate`).
+
+The best matches are handed to `PromptManager.examples`, which puts them in
+the thinker and coder prompts as compact exemplars. numpy is optional;
+without it retrieval is off.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from core.config import get_config
+from core.solution_store import normalise_task
+
+try:
+    import numpy as np
+except ImportError:  # retrieval is optional
+    np = None
+
+DEFAULT_DIM = 128
+# hashed n-gram slots the document frequencies are counted over
+DF_SLOTS = 1 << 16
+_SIGN_BIT = 0x80000000
+
+
+@dataclass
+class Exemplar:
+    """A solved task shown to the models as an example."""
+
+    task: str
+    code: str
+    score: float = 0.0
+
+
+def available() -> bool:
+    return np is not None
+
+
+def ngrams(text: str) -> List[str]:
+    """Character 3- and 4-grams and the words of the normalised `text`."""
+    normalised = normalise_task(text)
+    padded = f" {normalised} "
+    grams = [padded[i : i + n] for n in (3, 4) for i in range(len(padded) - n + 1)]
+    return grams + normalised.split()
+
+
+def _grams(texts: List[str]):
+    """Row, hash and count of every distinct n-gram of `texts`, as arrays."""
+    rows, hashes, counts = [], [], []
+    for row, text in enumerate(texts):
+        for h, n in Counter(zlib.crc32(gram.encode("utf-8")) for gram in ngrams(text)).items():
+            rows.append(row)
+            hashes.append(h)
+            counts.append(n)
+    return (
+        np.asarray(rows, dtype=np.int64),
+        np.asarray(hashes, dtype=np.int64),
+        np.asarray(counts, dtype=np.float64),
+    )
+
+
+def document_frequency(texts: List[str]):
+    """How many of `texts` contain each of the `DF_SLOTS` hashed n-gram slots."""
+    rows, hashes, _ = _grams(texts)
+    slots = np.unique(rows * DF_SLOTS + (hashes & (DF_SLOTS - 1))) % DF_SLOTS
+    return np.bincount(slots, minlength=DF_SLOTS)
+
+
+def vectorize(texts: List[str], dim: int = DEFAULT_DIM, idf=None):
+    """Unit-length hashed n-gram vectors of `texts`, one float32 row each.
+
+    `idf`, indexed by n-gram slot (see `document_frequency`), weights every
+    n-gram before it is folded into its bucket.
+    """
+    rows, hashes, counts = _grams(texts)
+    # damp repeated n-grams so long tasks do not dominate
+    weights = np.log1p(counts)
+    if idf is not None:
+        weights = weights * idf[hashes & (DF_SLOTS - 1)]
+    signed = np.where(hashes & _SIGN_BIT, weights, -weights)
+    flat = rows * dim + (hashes & (dim - 1))
+    matrix = np.bincount(flat, weights=signed, minlength=len(texts) * dim).reshape(len(texts), dim)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class SessionIndex:
+    """Append-only, memory-mapped vector index over successful sessions."""
+
+    def __init__(self, db_path: str = "laph.db", directory: Optional[str] = None, dim: int = DEFAULT_DIM):
+        if dim <= 0 or dim & (dim - 1):
+            raise ValueError(f"Index dimension must be a power of two, not {dim}")
+        self.db_path = os.path.abspath(os.path.expanduser(db_path))
+        self.directory = directory or os.path.splitext(self.db_path)[0] + ".retrieval"
+        self.dim = dim
+        self.count = 0
+        self.last_id = 0
+        self.df = np.zeros(DF_SLOTS, dtype=np.int64)
+        self.vectors = None
+        self.ids = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> None:
+        try:
+            with open(self._path("state.json"), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("dim") != self.dim or state.get("df_slots") != DF_SLOTS or state.get("db") != self.db_path:
+            # built for another layout or database: start again
+            return
+        try:
+            df = np.fromfile(self._path(state["df"]), dtype=np.int64)
+        except (KeyError, OSError):
+            return
+        if df.shape != (DF_SLOTS,):
+            return
+        self.count = state["count"]
+        self.last_id = state["last_id"]
+        self.df = df
+        self._map()
+
+    def _map(self) -> None:
+        if not self.count:
+            self.vectors = self.ids = None
+            return
+        self.vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        self.ids = np.memmap(self._path("ids.i64"), dtype=np.int64, mode="r", shape=(self.count,))
+
+    def _append(self, name: str, data, row_bytes: int) -> None:
+        path = self._path(name)
+        if os.path.exists(path):
+            # drop rows written after the last saved state
+            os.truncate(path, self.count * row_bytes)
+        with open(path, "ab") as f:
+            f.write(data.tobytes())
+
+    def update(self) -> int:
+        """Index the successful sessions added since the last update; returns how many."""
+        if not os.path.exists(self.db_path):
+            return 0
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            rows = db.execute(
+                "SELECT id, task FROM sessions WHERE success = 1 AND final_code != '' AND id > ? ORDER BY id",
+                (self.last_id,),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # no session has been saved yet
+            return 0
+        finally:
+            db.close()
+        if not rows:
+            return 0
+
+        tasks = [task or "" for _, task in rows]
+        vectors = vectorize(tasks, self.dim)
+        os.makedirs(self.directory, exist_ok=True)
+        self._append("vectors.f32", vectors, self.dim * 4)
+        self._append("ids.i64", np.array([i for i, _ in rows], dtype=np.int64), 8)
+        df = self.df + document_frequency(tasks)
+        # a new file per state, so the saved state never points at newer counts
+        df_name = f"df.{rows[-1][0]}.i64"
+        df.tofile(self._path(df_name))
+        state = {
+            "dim": self.dim,
+            "df_slots": DF_SLOTS,
+            "df": df_name,
+            "db": self.db_path,
+            "count": self.count + len(rows),
+            "last_id": rows[-1][0],
+        }
+        tmp = self._path("state.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self._path("state.json"))
+        if self.last_id and self.last_id != state["last_id"]:
+            try:
+                os.remove(self._path(f"df.{self.last_id}.i64"))
+            except OSError:
+                pass
+
+        self.count, self.last_id, self.df = state["count"], state["last_id"], df
+        self._map()
+        return len(rows)
+
+    def search(self, task: str, k: int = 2) -> List[Tuple[int, float]]:
+        """`(session id, similarity)` of the `k` indexed tasks closest to `task`, best first."""
+        if not self.count or k <= 0:
+            return []
+        idf = np.log((1 + self.count) / (1 + self.df)) + 1.0
+        query = vectorize([task], self.dim, idf)[0]
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = self.vectors @ (query / norm).astype(np.float32)
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+    def exemplars(self, task: str, k: int = 2, min_similarity: float = 0.35, max_chars: int = 800) -> List[Exemplar]:
+        """Up to `k` solved sessions similar to `task`, one per distinct task."""
+        with self._lock:
+            self.update()
+            # the same task may have been solved many times
+            hits = [(i, s) for i, s in self.search(task, k * 4) if s >= min_similarity]
+        if not hits:
+            return []
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            marks = ",".join("?" * len(hits))
+            rows = db.execute(
+                f"SELECT id, task, final_code FROM sessions WHERE success = 1 AND id IN ({marks})",
+                [i for i, _ in hits],
+            ).fetchall()
+        finally:
+            db.close()
+        sessions: Dict[int, tuple] = {row[0]: row[1:] for row in rows}
+
+        exemplars: List[Exemplar] = []
+        seen = set()
+        for session_id, score in hits:
+            if session_id not in sessions:
+                continue
+            solved, code = sessions[session_id]
+            key = normalise_task(solved)
+            if key in seen:
+                continue
+            seen.add(key)
+            if len(code) > max_chars:
+                code = code[:max_chars].rstrip() + "\n# ..."
+            exemplars.append(Exemplar(solved, code, round(score, 3)))
+            if len(exemplars) == k:
+                break
+        return exemplars
+
+
+_indexes: Dict[str, "SessionIndex"] = {}
+_retrieval_enabled: Optional[bool] = None
+
+
+def set_retrieval_enabled(enabled: bool) -> None:
+    """Globally enable or disable similar-session retrieval."""
+    global _retrieval_enabled
+    _retrieval_enabled = enabled
+
+
+def get_session_index() -> Optional[SessionIndex]:
+    """The index of the configured session database, or None when retrieval is off."""
+    config = get_config()
+    enabled = _retrieval_enabled if _retrieval_enabled is not None else config.get("retrieval", "enabled", True)
+    if not enabled or not available():
+        return None
+    path = os.path.abspath(os.path.expanduser(config.get("retrieval", "path", "laph.db")))
+    if path not in _indexes:
+        _indexes[path] = SessionIndex(path, dim=int(config.get("retrieval", "dim", DEFAULT_DIM)))
+    return _indexes[path]
+
+
+def reset_session_index() -> None:
+    """Drop cached indexes and the enablement override (useful for testing)."""
+    global _retrieval_enabled
+    _indexes.clear()
+    _retrieval_enabled = None
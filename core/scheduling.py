@@ -0,0 +1,55 @@
+"""Model swap accounting for swap-aware call scheduling.
+
+On GPUs that cannot hold every role's model at once, each change of model
+between consecutive calls may force a reload. `SwapTracker` counts those
+changes for the calls that actually ran and, in parallel, for the baseline
+fixed order (actual calls plus the calls the scheduler chose to skip or
+regroup), so the loop can report how many swaps the schedule avoided.
+"""
+
+from typing import Optional
+
+FIXED = "fixed"
+GROUPED = "grouped"
+SCHEDULES = (FIXED, GROUPED)
+
+
+class _Sequence:
+    def __init__(self):
+        self.last: Optional[str] = None
+        self.swaps = 0
+        self.calls = 0
+
+    def add(self, model: str):
+        if self.last is not None and model != self.last:
+            self.swaps += 1
+        self.last = model
+        self.calls += 1
+
+
+class SwapTracker:
+    """Count model swaps for executed calls versus the fixed-order baseline."""
+
+    def __init__(self):
+        self.actual = _Sequence()
+        self.baseline = _Sequence()
+
+    def record(self, model: str) -> None:
+        """Record a call that was executed."""
+        self.actual.add(model)
+        self.baseline.add(model)
+
+    def skip(self, model: str) -> None:
+        """Record a call the fixed order would have made but the schedule skipped."""
+        self.baseline.add(model)
+
+    @property
+    def swaps(self) -> int:
+        return self.actual.swaps
+
+    @property
+    def avoided(self) -> int:
+        return max(self.baseline.swaps - self.actual.swaps, 0)
+
+    def summary(self) -> str:
+        return f"Model swaps: {self.swaps} (avoided {self.avoided} vs fixed order)"
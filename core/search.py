@@ -0,0 +1,103 @@
+"""Beam search over repair attempts.
+
+The linear repair loop follows one chain and, after a failed attempt,
+restarts from the last working code, so partially good programs are thrown
+away. With `repair.strategy = "beam"` every attempt becomes a `Node` in a
+bounded `Frontier`, ranked by evaluator score plus the fraction of its tests
+that passed. Each round expands the best `beam_width` unexpanded nodes in
+parallel (one thinker revision per node, `beam_branching` coder samples per
+revision); children whose code was already seen are dropped and the
+frontier is pruned back to `frontier_size` nodes.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from core.candidates import Candidate
+
+LINEAR = "linear"
+BEAM = "beam"
+STRATEGIES = (LINEAR, BEAM)
+
+# weight of the test pass fraction relative to the evaluator score
+TEST_WEIGHT = 2.0
+
+
+def code_key(code: str) -> str:
+    """Hash of `code` ignoring trailing whitespace and blank lines."""
+    lines = [line.rstrip() for line in (code or "").splitlines()]
+    normalised = "\n".join(line for line in lines if line)
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Node:
+    """One scored attempt in the search tree."""
+
+    candidate: Candidate
+    spec: str
+    depth: int = 0
+    parent: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return code_key(self.candidate.code)
+
+    @property
+    def test_fraction(self) -> float:
+        c = self.candidate
+        return c.tests_passed / c.tests_total if c.tests_total else 0.0
+
+    @property
+    def priority(self) -> float:
+        return self.candidate.score + TEST_WEIGHT * self.test_fraction
+
+    @property
+    def feedback(self) -> str:
+        """What went wrong, as error context for the node's children."""
+        c = self.candidate
+        feedback = c.stderr.strip() or f"Exit code {c.exitcode}; output:\n{c.stdout.strip()}"
+        if c.tests_total:
+            feedback = f"{c.tests_passed}/{c.tests_total} tests passed.\n{feedback}"
+        return feedback
+
+
+class Frontier:
+    """Bounded set of unexpanded nodes, deduplicated by code hash."""
+
+    def __init__(self, max_size: int = 12):
+        self.max_size = max_size
+        self.nodes: List[Node] = []
+        self.seen: Dict[str, float] = {}
+        self.duplicates = 0
+        self.pruned = 0
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add(self, node: Node) -> bool:
+        """Add `node` unless its code was seen before; returns whether it was kept."""
+        key = node.key
+        if key in self.seen:
+            self.duplicates += 1
+            return False
+        self.seen[key] = node.priority
+        self.nodes.append(node)
+        self.nodes.sort(key=lambda n: n.priority, reverse=True)
+        if len(self.nodes) > self.max_size:
+            self.pruned += len(self.nodes) - self.max_size
+            del self.nodes[self.max_size :]
+        return node in self.nodes
+
+    def pop(self, count: int) -> List[Node]:
+        """Remove and return the `count` most promising nodes."""
+        best, self.nodes = self.nodes[:count], self.nodes[count:]
+        return best
+
+    def summary(self) -> str:
+        top = f"{self.nodes[0].priority:.2f}" if self.nodes else "-"
+        return (
+            f"frontier {len(self.nodes)} (best {top}), "
+            f"{len(self.seen)} distinct programs, {self.duplicates} duplicates, {self.pruned} pruned"
+        )
@@ -0,0 +1,165 @@
+"""Verified solutions keyed by normalised task.
+
+The same task tends to be submitted again and again with small differences
+in case, spacing and punctuation. `SolutionStore` keeps the last working
+program per `task_key` in a `solutions` table of `laph.db` (next to the
+`sessions` history, whose successful rows seed the table when it is first
+created). Before it starts the thinker, `RepairLoop.run_task` looks the task
+up, runs the stored program and its tests in the sandbox and judges the
+result like any other candidate. A program that still passes is returned
+straight away; one that no longer does is invalidated, together with the
+successful sessions that produced it, and the task is solved from scratch.
+
+Reuse can be switched off globally with `set_solutions_enabled(False)` or
+`LAPH_SOLUTIONS_ENABLED=false`.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from core.config import get_config
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalise_task(task: str) -> str:
+    """`task` in lower case with punctuation dropped and whitespace collapsed."""
+    return " ".join(_PUNCTUATION.sub(" ", (task or "").lower()).split())
+
+
+def task_key(task: str) -> str:
+    return hashlib.sha256(normalise_task(task).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Solution:
+    task: str
+    code: str
+    tests: Optional[str] = None
+    hits: int = 0
+
+
+class SolutionStore:
+    """SQLite table of the last verified program per normalised task."""
+
+    def __init__(self, path: str = "laph.db"):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with self._connect() as db:
+            exists = db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'solutions'"
+            ).fetchone()
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS solutions (
+                    key TEXT PRIMARY KEY,
+                    task TEXT,
+                    code TEXT,
+                    tests TEXT,
+                    created REAL,
+                    last_used REAL,
+                    hits INTEGER DEFAULT 0
+                )
+                """
+            )
+            if not exists:
+                self._import_sessions(db)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _import_sessions(self, db: sqlite3.Connection) -> None:
+        """Seed the table with the latest successful session per task."""
+        if not db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sessions'").fetchone():
+            return
+        now = time.time()
+        rows = db.execute(
+            "SELECT task, final_code FROM sessions WHERE success = 1 AND final_code != '' ORDER BY id"
+        ).fetchall()
+        db.executemany(
+            "INSERT OR REPLACE INTO solutions (key, task, code, tests, created, last_used) VALUES (?, ?, ?, NULL, ?, ?)",
+            [(task_key(task), task, code, now, now) for task, code in rows],
+        )
+
+    def lookup(self, task: str) -> Optional[Solution]:
+        with self._lock, self._connect() as db:
+            row = db.execute(
+                "SELECT task, code, tests, hits FROM solutions WHERE key = ?", (task_key(task),)
+            ).fetchone()
+        return Solution(*row) if row is not None else None
+
+    def put(self, task: str, code: str, tests: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO solutions (key, task, code, tests, created, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (task_key(task), task, code, tests, now, now),
+            )
+
+    def hit(self, task: str) -> None:
+        """Record that the stored solution was verified and reused."""
+        with self._lock, self._connect() as db:
+            db.execute(
+                "UPDATE solutions SET hits = hits + 1, last_used = ? WHERE key = ?", (time.time(), task_key(task))
+            )
+
+    def invalidate(self, task: str) -> None:
+        """Drop the stored solution for `task`.
+
+        The sessions that produced it no longer count as successful, so
+        retrieval stops offering the program as an example.
+        """
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT code FROM solutions WHERE key = ?", (task_key(task),)).fetchone()
+            db.execute("DELETE FROM solutions WHERE key = ?", (task_key(task),))
+            if row is not None and db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sessions'"
+            ).fetchone():
+                db.execute("UPDATE sessions SET success = 0 WHERE success = 1 AND final_code = ?", (row[0],))
+
+
+_stores: Dict[str, SolutionStore] = {}
+_solutions_enabled: Optional[bool] = None
+
+
+def set_solutions_enabled(enabled: bool) -> None:
+    """Globally enable or disable solution reuse."""
+    global _solutions_enabled
+    _solutions_enabled = enabled
+
+
+def get_solution_store() -> Optional[SolutionStore]:
+    """The store for the configured path, or None when reuse is disabled."""
+    config = get_config()
+    enabled = _solutions_enabled if _solutions_enabled is not None else config.get("solutions", "enabled", True)
+    if not enabled:
+        return None
+    # "laph.db" is relative to the working directory, like the session history
+    path = os.path.abspath(os.path.expanduser(config.get("solutions", "path", "laph.db")))
+    if path not in _stores:
+        _stores[path] = SolutionStore(path)
+    return _stores[path]
+
+
+def reset_solution_store() -> None:
+    """Drop cached stores and the enablement override (useful for testing)."""
+    global _solutions_enabled
+    _stores.clear()
+    _solutions_enabled = None
@@ -0,0 +1,60 @@
+"""Stop conditions for early termination of streamed generations.
+
+A stop condition is a callable fed every streamed chunk in order; once it
+returns True, `LLMInterface.generate` stops reading and closes the HTTP
+stream, which makes the server abort decoding. Conditions feed a shared
+`StreamParser`, so the caller can pass the same parser in and extract the
+blocks afterwards without scanning the output again. `key()` names a
+condition and its settings; a response stopped early is only cached for the
+same key (see `LLMInterface._cache_for`).
+
+Each condition only fires once everything its extractor uses has closed:
+the first JSON block for the thinker spec, and a tests block after the code
+for `split_code_and_tests`. Code followed by an explanation and then tests
+is a common shape, so prose before the tests never stops the coder. The
+stopped text therefore splits like the full output, unless the model opens
+yet another fence after long prose following its tests, which the coder
+prompt does not ask for.
+"""
+
+from typing import Optional
+
+from core.stream_parser import StreamParser
+
+
+class FirstJsonBlock:
+    """Stop as soon as the first ```json fenced block is closed."""
+
+    def __init__(self, parser: Optional[StreamParser] = None):
+        self.parser = parser if parser is not None else StreamParser()
+
+    def key(self) -> str:
+        return "FirstJsonBlock"
+
+    def __call__(self, chunk: str) -> bool:
+        return any(block.lang == "json" for block in self.parser.feed(chunk))
+
+
+class TrailingProse:
+    """Stop once the model rambles outside any fence after its tests.
+
+    Generation ends when a tests block (see `FencedBlock.is_tests`) has
+    closed after the code and more than `max_chars` of text have followed it
+    without a new fence opening. Output without tests runs to the end, since
+    a tests block may still follow any amount of explanation.
+    """
+
+    def __init__(self, max_chars: int = 200, parser: Optional[StreamParser] = None):
+        self.max_chars = max_chars
+        self.parser = parser if parser is not None else StreamParser()
+
+    def key(self) -> str:
+        return f"TrailingProse(max_chars={self.max_chars})"
+
+    def __call__(self, chunk: str) -> bool:
+        self.parser.feed(chunk)
+        blocks = self.parser.blocks
+        if self.parser.inside or len(blocks) < 2 or not blocks[-1].is_tests:
+            return False
+        # a partial fence at the very end may be the start of the next block
+        return self.parser.tail_length > self.max_chars
@@ -0,0 +1,223 @@
+"""Incremental parser for fenced blocks in streamed model output.
+
+Every role asks its model for fenced blocks: the thinker for a ```json spec,
+the coder for ```python code optionally followed by a block of tests, the
+thinker interaction for a ```json action list. `StreamParser` consumes the
+stream chunk by chunk, tracks whether it is inside a fence and emits each
+block as soon as its closing fence arrives, touching every character a
+bounded number of times. The extraction helpers below implement the shared
+code/tests/spec/json semantics on top of a parser (or a complete string).
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple, Union
+
+FENCE = "```"
+_INFO_STRING = re.compile(r"[\w+#.-]*")
+_TEST_MARKERS = ("assert ", "pytest", "unittest")
+
+
+@dataclass
+class FencedBlock:
+    """A closed ``` block: its info string (`lang`) and body."""
+
+    lang: str
+    body: str
+    start: int
+    end: int
+
+    @property
+    def is_tests(self) -> bool:
+        return any(marker in self.body for marker in _TEST_MARKERS)
+
+
+class StreamParser:
+    """Consume chunks and emit fenced blocks as soon as they close."""
+
+    def __init__(self, on_block: Optional[Callable[[FencedBlock], None]] = None):
+        self.on_block = on_block
+        self.blocks: List[FencedBlock] = []
+        self.inside = False
+        self.length = 0
+        self.last_close_end = -1
+        self._chunks: List[str] = []
+        self._text = ""
+        self._joined = 0
+        # trailing backticks held back because they may start a fence
+        self._carry = ""
+        self._open_at = -1
+        self._body: List[str] = []
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if self._joined < len(self._chunks):
+            self._text += "".join(self._chunks[self._joined :])
+            self._joined = len(self._chunks)
+        return self._text
+
+    @property
+    def open_block(self) -> Optional[str]:
+        """Raw text of the block still streaming (info string included), or None."""
+        return "".join(self._body) if self.inside else None
+
+    @property
+    def tail_length(self) -> int:
+        """Characters after the last closing fence, ignoring a possible partial fence."""
+        since = self.length - self.last_close_end if self.last_close_end >= 0 else self.length
+        return since - len(self._carry)
+
+    def feed(self, chunk: str) -> List[FencedBlock]:
+        """Append `chunk` and return the blocks it closed."""
+        if not chunk:
+            return []
+        self._chunks.append(chunk)
+        buf = self._carry + chunk
+        base = self.length - len(self._carry)
+        self.length += len(chunk)
+
+        closed = []
+        pos = 0
+        while True:
+            i = buf.find(FENCE, pos)
+            if i == -1:
+                break
+            if self.inside:
+                self._body.append(buf[pos:i])
+                self.inside = False
+                self.last_close_end = base + i + len(FENCE)
+                block = self._make_block("".join(self._body), self._open_at, self.last_close_end)
+                self.blocks.append(block)
+                closed.append(block)
+                if self.on_block is not None:
+                    self.on_block(block)
+            else:
+                self.inside = True
+                self._open_at = base + i
+                self._body = []
+            pos = i + len(FENCE)
+
+        rest = buf[pos:]
+        held = min(len(rest) - len(rest.rstrip("`")), len(FENCE) - 1)
+        self._carry = rest[len(rest) - held :] if held else ""
+        if self.inside:
+            self._body.append(rest[: len(rest) - held])
+        return closed
+
+    @staticmethod
+    def _make_block(raw: str, start: int, end: int) -> FencedBlock:
+        lang, body = "", raw
+        first, newline, rest = raw.partition("\n")
+        if newline and _INFO_STRING.fullmatch(first.strip()):
+            lang, body = first.strip(), rest
+        return FencedBlock(lang.lower(), body, start, end)
+
+
+Source = Union[str, StreamParser]
+
+
+def parse(source: Source) -> StreamParser:
+    """Return `source` if it is already a parser, else parse the whole string."""
+    if isinstance(source, StreamParser):
+        return source
+    parser = StreamParser()
+    parser.feed(source)
+    return parser
+
+
+def split_code_and_tests(source: Source) -> Tuple[str, Optional[str]]:
+    """Split coder output into `(code, tests)`.
+
+    No fence: the whole output is code. One fence: it is the code. Several
+    fences: if the last one looks like tests, it becomes the tests and the
+    others are joined as code; otherwise only the first fence is code.
+    """
+    parser = parse(source)
+    blocks = parser.blocks
+    if not blocks:
+        return parser.text.strip(), None
+    if len(blocks) == 1:
+        return blocks[0].body.strip(), None
+    last = blocks[-1]
+    if last.is_tests:
+        return "\n\n".join(b.body.strip() for b in blocks[:-1]), last.body.strip()
+    return blocks[0].body.strip(), None
+
+
+def extract_code(source: Source) -> str:
+    """Return the body of the first fenced block, or the whole output."""
+    parser = parse(source)
+    if parser.blocks:
+        return parser.blocks[0].body.strip()
+    return parser.text.strip()
+
+
+def first_json_block(source: Source) -> Optional[FencedBlock]:
+    for block in parse(source).blocks:
+        if block.lang == "json":
+            return block
+    return None
+
+
+def extract_json(source: Source):
+    """Parse the first ```json block, falling back to the outermost {...} span.
+
+    Raises `json.JSONDecodeError` when a candidate is found but invalid and
+    returns None when there is nothing JSON-like at all.
+    """
+    parser = parse(source)
+    block = first_json_block(parser)
+    if block is not None:
+        return json.loads(block.body)
+    text = parser.text
+    start = text.find("{")
+    end = text.rfind("}")
+    if start != -1 and end > start:
+        return json.loads(text[start : end + 1])
+    return None
+
+
+def streamed_field(source: Source, key: str) -> Optional[str]:
+    """Return string field `key` of the first json block once its closing quote has streamed.
+
+    Works on a block that is still open, so a consumer can act on one field
+    before the model has finished the rest of the object. Returns None while
+    the value is incomplete or when there is no such field.
+    """
+    parser = parse(source)
+    block = first_json_block(parser)
+    if block is not None:
+        try:
+            parsed = json.loads(block.body)
+        except json.JSONDecodeError:
+            return None
+        value = parsed.get(key) if isinstance(parsed, dict) else None
+        return value if isinstance(value, str) else None
+    raw = parser.open_block
+    if raw is None:
+        return None
+    lang, newline, body = raw.partition("\n")
+    if not newline or lang.strip().lower() != "json":
+        return None
+    match = re.search(r'"%s"\s*:\s*"((?:[^"\\]|\\.)*)"' % re.escape(key), body)
+    if match is None:
+        return None
+    try:
+        return json.loads('"' + match.group(1) + '"')
+    except json.JSONDecodeError:
+        return None
+
+
+def extract_spec(source: Source) -> str:
+    """Return the thinker spec: `spec` from the json block, else the first block, else the text."""
+    parser = parse(source)
+    block = first_json_block(parser)
+    if block is not None:
+        try:
+            parsed = json.loads(block.body)
+            return parsed.get("spec", "").strip() if isinstance(parsed, dict) else ""
+        except Exception:
+            pass
+    return extract_code(parser)
@@ -0,0 +1,151 @@
+"""Per-call inference telemetry and per-task aggregation.
+
+Ollama's final stream chunk reports token counts and nanosecond timings for
+prompt prefill (`prompt_eval_*`), decoding (`eval_*`), model loading
+(`load_duration`) and the whole request (`total_duration`). `LLMInterface`
+turns those, plus the client-side time to first token, into a `CallStats`
+record after every call; `TaskTelemetry` aggregates them per repair
+iteration and per task so slow tasks can be classified as prompt-bound,
+decode-bound or reload-bound.
+"""
+
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+NS = 1e9
+
+
+@dataclass
+class CallStats:
+    """Timing and token counts for a single LLM call."""
+
+    model: str
+    role: Optional[str] = None
+    prompt_tokens: int = 0
+    eval_tokens: int = 0
+    prefill_s: float = 0.0
+    decode_s: float = 0.0
+    load_s: float = 0.0
+    total_s: float = 0.0
+    ttft_s: Optional[float] = None
+    wall_s: float = 0.0
+    cached: bool = False
+    stopped: bool = False
+    hedged: bool = False
+    error: Optional[str] = None
+
+    @classmethod
+    def from_metadata(cls, model: str, role: Optional[str], metadata: dict, **client) -> "CallStats":
+        """Build stats from a final Ollama chunk plus client-side measurements."""
+        return cls(
+            model=model,
+            role=role,
+            prompt_tokens=int(metadata.get("prompt_eval_count", 0) or 0),
+            eval_tokens=int(metadata.get("eval_count", 0) or 0),
+            prefill_s=(metadata.get("prompt_eval_duration", 0) or 0) / NS,
+            decode_s=(metadata.get("eval_duration", 0) or 0) / NS,
+            load_s=(metadata.get("load_duration", 0) or 0) / NS,
+            total_s=(metadata.get("total_duration", 0) or 0) / NS,
+            **client,
+        )
+
+    @property
+    def tokens_per_s(self) -> Optional[float]:
+        if self.decode_s > 0 and self.eval_tokens:
+            return self.eval_tokens / self.decode_s
+        return None
+
+    @property
+    def prefill_tokens_per_s(self) -> Optional[float]:
+        if self.prefill_s > 0 and self.prompt_tokens:
+            return self.prompt_tokens / self.prefill_s
+        return None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["tokens_per_s"] = self.tokens_per_s
+        return data
+
+
+@dataclass
+class StatsTotals:
+    """Summed stats over a group of calls."""
+
+    calls: int = 0
+    cached_calls: int = 0
+    prompt_tokens: int = 0
+    eval_tokens: int = 0
+    prefill_s: float = 0.0
+    decode_s: float = 0.0
+    load_s: float = 0.0
+    wall_s: float = 0.0
+
+    def add(self, stats: CallStats) -> None:
+        self.calls += 1
+        self.cached_calls += int(stats.cached)
+        self.prompt_tokens += stats.prompt_tokens
+        self.eval_tokens += stats.eval_tokens
+        self.prefill_s += stats.prefill_s
+        self.decode_s += stats.decode_s
+        self.load_s += stats.load_s
+        self.wall_s += stats.wall_s
+
+    @property
+    def bound(self) -> str:
+        """Which phase dominated server time: prompt, decode or reload."""
+        phases = {"prompt": self.prefill_s, "decode": self.decode_s, "reload": self.load_s}
+        if not any(phases.values()):
+            return "unknown"
+        return max(phases, key=phases.get) + "-bound"
+
+    def summary(self) -> str:
+        return (
+            f"{self.calls} calls ({self.cached_calls} cached), "
+            f"{self.prompt_tokens} prompt / {self.eval_tokens} generated tokens, "
+            f"prefill {self.prefill_s:.2f}s, decode {self.decode_s:.2f}s, "
+            f"load {self.load_s:.2f}s, wall {self.wall_s:.2f}s [{self.bound}]"
+        )
+
+
+@dataclass
+class TaskTelemetry:
+    """Collect `CallStats` for a task, grouped by repair iteration."""
+
+    iterations: Dict[int, List[CallStats]] = field(default_factory=dict)
+    current: int = 0
+
+    def start_iteration(self, number: int) -> None:
+        self.current = number
+        self.iterations.setdefault(number, [])
+
+    def record(self, stats: CallStats) -> None:
+        self.iterations.setdefault(self.current, []).append(stats)
+
+    def calls(self) -> List[CallStats]:
+        return [s for number in sorted(self.iterations) for s in self.iterations[number]]
+
+    def iteration_totals(self, number: int) -> StatsTotals:
+        totals = StatsTotals()
+        for stats in self.iterations.get(number, []):
+            totals.add(stats)
+        return totals
+
+    def task_totals(self) -> StatsTotals:
+        totals = StatsTotals()
+        for stats in self.calls():
+            totals.add(stats)
+        return totals
+
+    def by_role(self) -> Dict[str, StatsTotals]:
+        roles: Dict[str, StatsTotals] = {}
+        for stats in self.calls():
+            roles.setdefault(stats.role or "?", StatsTotals()).add(stats)
+        return roles
+
+    def to_dict(self) -> dict:
+        return {
+            "iterations": {
+                number: [s.to_dict() for s in calls] for number, calls in self.iterations.items()
+            },
+            "totals": asdict(self.task_totals()),
+        }
@@ -0,0 +1,107 @@
+"""Count passing tests in coder-written test blocks.
+
+Coder tests are plain top-level `assert`s and `test_*` functions, so a run
+normally stops at the first failure and says nothing about how close the
+program is. `instrument` rewrites a test block so every case runs on its
+own, prints a `MARKER passed total` line and still fails the process (exit
+code 1, each failure and its traceback on stderr) when any case failed.
+`read_results` takes the marker back out of stdout.
+"""
+
+import ast
+from typing import Optional, Tuple
+
+MARKER = "__LAPH_TESTS__"
+
+_RUNTIME = """
+import sys as _laph_sys
+import traceback as _laph_traceback
+_laph_failures = []
+_laph_passed = [0]
+
+
+def _laph_check(_laph_name, _laph_case):
+    try:
+        _laph_case()
+        _laph_passed[0] += 1
+    except Exception as _laph_error:
+        _laph_failures.append(
+            (f"{_laph_name}: {type(_laph_error).__name__}: {_laph_error}", _laph_traceback.format_exc())
+        )
+"""
+
+_REPORT = """
+print(f"%s {_laph_passed[0]} %d")
+for _laph_failure, _laph_trace in _laph_failures:
+    print("FAILED " + _laph_failure, file=_laph_sys.stderr)
+    print(_laph_trace, file=_laph_sys.stderr)
+if _laph_failures:
+    _laph_sys.exit(1)
+"""
+
+
+def _is_test(node: ast.stmt) -> bool:
+    return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test") and not (
+        node.args.args or node.args.posonlyargs or node.args.kwonlyargs
+    )
+
+
+def _called_test(node: ast.stmt, names: set) -> Optional[str]:
+    """Name of the test function `node` calls as a bare `test_x()` statement."""
+    if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+        func = node.value.func
+        if isinstance(func, ast.Name) and func.id in names and not node.value.args:
+            return func.id
+    return None
+
+
+def _check(label: str, target: str) -> ast.stmt:
+    return ast.parse(f"_laph_check({label!r}, {target})").body[0]
+
+
+def instrument(tests: str) -> Optional[Tuple[str, int]]:
+    """Return `(instrumented tests, number of cases)`, or None to run `tests` as they are."""
+    try:
+        module = ast.parse(tests)
+    except SyntaxError:
+        return None
+
+    names = {node.name for node in module.body if _is_test(node)}
+    body = []
+    called = set()
+    cases = 0
+    for node in module.body:
+        name = _called_test(node, names)
+        if name is not None:
+            body.append(_check(name, name))
+            called.add(name)
+            cases += 1
+        elif isinstance(node, ast.Assert):
+            cases += 1
+            case = ast.parse(f"def _laph_case_{cases}():\n    pass").body[0]
+            case.body = [node]
+            body += [case, _check(f"line {node.lineno}", case.name)]
+        else:
+            body.append(node)
+    for name in sorted(names - called):
+        body.append(_check(name, name))
+        cases += 1
+    if not cases:
+        return None
+
+    module.body = body
+    ast.fix_missing_locations(module)
+    return _RUNTIME + "\n" + ast.unparse(module) + "\n" + _REPORT % (MARKER, cases), cases
+
+
+def read_results(stdout: str) -> Tuple[str, Optional[int], Optional[int]]:
+    """Split the marker line off `stdout`: `(stdout, passed, total)`, counts None if absent."""
+    lines = stdout.splitlines(keepends=True)
+    for i in range(len(lines) - 1, -1, -1):
+        if lines[i].startswith(MARKER + " "):
+            try:
+                passed, total = (int(n) for n in lines[i].split()[1:3])
+            except ValueError:
+                break
+            return "".join(lines[:i] + lines[i + 1 :]), passed, total
+    return stdout, None, None
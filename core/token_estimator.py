@@ -0,0 +1,124 @@
+"""Prompt token estimation and automatic `num_ctx` sizing.
+
+Ollama silently truncates prompts that do not fit the context window, while
+a large window for every call wastes KV-cache memory and slows prefill.
+`TokenEstimator` approximates token counts from characters, calibrated per
+model against the `prompt_eval_count` of earlier calls. `ContextSizer` adds
+the expected output length and picks the smallest configured bucket that
+fits.
+
+Changing `num_ctx` makes Ollama reload the model, so buckets are sticky: a
+model never gets a smaller window than it was already given in this process,
+which bounds the number of reloads by the number of buckets.
+"""
+
+import math
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from core.config import get_config
+
+DEFAULT_CHARS_PER_TOKEN = 3.5
+DEFAULT_BUCKETS = (2048, 4096, 8192, 16384, 32768)
+# tokens added by the chat template and as a safety margin for estimation error
+TEMPLATE_OVERHEAD_TOKENS = 64
+SAFETY_FACTOR = 1.1
+
+class TokenEstimator:
+    """Characters-per-token estimate, calibrated per model."""
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN, smoothing: float = 0.3):
+        self.default = chars_per_token
+        self.smoothing = smoothing
+        self.ratios: Dict[str, float] = {}
+        self.samples: Dict[str, int] = {}
+
+    def ratio(self, model: str) -> float:
+        return self.ratios.get(model, self.default)
+
+    def estimate(self, model: str, text: str) -> int:
+        return math.ceil(len(text) / self.ratio(model)) if text else 0
+
+    def calibrate(self, model: str, chars: int, prompt_tokens: int) -> None:
+        """Fold in one observation of `chars` characters prefilling as `prompt_tokens`.
+
+        Ollama may serve part of a prompt from its own prefix cache and then
+        reports fewer tokens; implausible ratios are ignored so that such
+        calls do not make later estimates too small.
+        """
+        if chars <= 0 or prompt_tokens <= 0:
+            return
+        observed = chars / prompt_tokens
+        if not 1.0 <= observed <= 8.0:
+            return
+        if model not in self.ratios:
+            self.ratios[model] = observed
+        else:
+            self.ratios[model] += self.smoothing * (observed - self.ratios[model])
+        self.samples[model] = self.samples.get(model, 0) + 1
+
+
+class ContextSizer:
+    """Pick the smallest sticky `num_ctx` bucket that fits prompt plus output."""
+
+    def __init__(
+        self,
+        estimator: Optional[TokenEstimator] = None,
+        buckets: Iterable[int] = DEFAULT_BUCKETS,
+        expected_output: int = 1024,
+    ):
+        self.estimator = estimator or TokenEstimator()
+        self.buckets = sorted(int(b) for b in buckets)
+        self.expected_output = expected_output
+        self.floors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def needed(self, model: str, prompt: str, context_tokens: int = 0, output_tokens: Optional[int] = None) -> int:
+        output = self.expected_output if output_tokens is None or output_tokens < 0 else output_tokens
+        prompt_tokens = self.estimator.estimate(model, prompt) + context_tokens + TEMPLATE_OVERHEAD_TOKENS
+        return math.ceil(prompt_tokens * SAFETY_FACTOR) + output
+
+    def num_ctx(
+        self, model: str, prompt: str, context_tokens: int = 0, output_tokens: Optional[int] = None
+    ) -> Tuple[int, bool]:
+        """Return `(num_ctx, at_risk)`; `at_risk` means even the largest bucket is too small.
+
+        The caller reports the risk (see `RepairLoop._record_llm_call`).
+        """
+        needed = self.needed(model, prompt, context_tokens, output_tokens)
+        fitting = [b for b in self.buckets if b >= needed]
+        at_risk = not fitting
+        with self._lock:
+            size = max(fitting[0] if fitting else self.buckets[-1], self.floors.get(model, 0))
+            self.floors[model] = size
+        return size, at_risk
+
+
+_sizer: Optional[ContextSizer] = None
+_lock = threading.Lock()
+
+
+def get_context_sizer() -> Optional[ContextSizer]:
+    """Return the shared sizer, or None when `llm.auto_num_ctx` is disabled."""
+    global _sizer
+    config = get_config()
+    if not config.get("llm", "auto_num_ctx", True):
+        return None
+    if _sizer is None:
+        with _lock:
+            if _sizer is None:
+                buckets = config.get("llm", "num_ctx_buckets", list(DEFAULT_BUCKETS))
+                if isinstance(buckets, str):
+                    buckets = [b for b in buckets.split(",") if b.strip()]
+                _sizer = ContextSizer(
+                    buckets=buckets,
+                    expected_output=int(config.get("llm", "expected_output_tokens", 1024)),
+                )
+    return _sizer
+
+
+def reset_context_sizer() -> None:
+    """Drop the shared sizer, its calibration and sticky floors."""
+    global _sizer
+    with _lock:
+        _sizer = None
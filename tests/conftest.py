@@ -0,0 +1,302 @@
+"""Shared pytest fixtures.
+
+`ollama_stub` starts a tiny local HTTP server that speaks enough of the Ollama
+API (`/api/generate`, `/api/ps`, `/api/tags`) and of the OpenAI-compatible
+streaming API (`/v1/chat/completions`) to exercise the real HTTP code paths
+without a model server. `stub_loop` is a `RepairLoop` wired to it, and
+`scripted_models` gives that loop's thinker, coder, evaluator and summariser
+canned replies.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import config, response_cache, retrieval, solution_store  # noqa: E402
+
+
+class OllamaStub:
+    """Configurable fake Ollama server running on a background thread."""
+
+    def __init__(self):
+        self.chunks = ["hello ", "world"]
+        # optional callable(payload) -> list of chunks, overrides `chunks`
+        self.script = None
+        self.final = {"eval_count": 2, "prompt_eval_count": 5}
+        self.first_token_delay = 0.0
+        self.chunk_delay = 0.0
+        self.loaded = []
+        self.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, body):
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _write_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path == "/api/ps":
+                    self._send_json({"models": [{"name": m, "model": m} for m in stub.loaded]})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": [{"name": m} for m in stub.loaded]})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests.append(payload)
+                if self.path == "/v1/chat/completions":
+                    self._chat_completions(payload)
+                    return
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+
+                model = payload.get("model", "")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    time.sleep(stub.first_token_delay)
+                    chunks = stub.script(payload) if stub.script else stub.chunks
+                    for chunk in chunks if payload.get("prompt") else []:
+                        line = {"model": model, "response": chunk, "done": False}
+                        self._write_chunk(json.dumps(line).encode() + b"\n")
+                        time.sleep(stub.chunk_delay)
+                    final = {"model": model, "response": "", "done": True}
+                    final.update(stub.final)
+                    self._write_chunk(json.dumps(final).encode() + b"\n")
+                    self._write_chunk(b"")
+                except OSError:
+                    return
+                if model and model not in stub.loaded:
+                    stub.loaded.append(model)
+
+            def _chat_completions(self, payload):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    time.sleep(stub.first_token_delay)
+                    chunks = stub.script(payload) if stub.script else stub.chunks
+                    for chunk in chunks:
+                        event = {"choices": [{"index": 0, "delta": {"content": chunk}}]}
+                        self._write_chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+                        time.sleep(stub.chunk_delay)
+                    usage = {
+                        "prompt_tokens": stub.final.get("prompt_eval_count", 0),
+                        "completion_tokens": stub.final.get("eval_count", 0),
+                    }
+                    self._write_chunk(b"data: " + json.dumps({"choices": [], "usage": usage}).encode() + b"\n\n")
+                    self._write_chunk(b"data: [DONE]\n\n")
+                    self._write_chunk(b"")
+                except OSError:
+                    return
+
+        return Handler
+
+
+@pytest.fixture
+def ollama_stub():
+    stub = OllamaStub().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def make_ollama_stub():
+    """Factory for extra stub servers (e.g. to test multi-endpoint routing)."""
+    stubs = []
+
+    def make():
+        stub = OllamaStub().start()
+        stubs.append(stub)
+        return stub
+
+    yield make
+    for stub in stubs:
+        stub.stop()
+
+
+@pytest.fixture(autouse=True)
+def _no_global_response_cache():
+    """Keep tests from reading or writing the user's on-disk response cache."""
+    response_cache.set_cache_enabled(False)
+    yield
+    response_cache.reset_response_cache()
+
+
+@pytest.fixture(autouse=True)
+def _no_solution_reuse():
+    """Solve every task from scratch, without stored solutions or retrieved examples."""
+    solution_store.set_solutions_enabled(False)
+    retrieval.set_retrieval_enabled(False)
+    yield
+    solution_store.reset_solution_store()
+    retrieval.reset_session_index()
+
+
+@pytest.fixture(autouse=True)
+def _log_file_in_tmp(tmp_path):
+    """Send the "laph" logger's file output to the test's temporary directory."""
+    laph = logging.getLogger("laph")
+    saved = laph.handlers[:]
+    handler = logging.FileHandler(tmp_path / "laph.log")
+    laph.handlers = [handler]
+    yield
+    handler.close()
+    laph.handlers = saved
+
+
+@pytest.fixture(autouse=True)
+def _checkpoints_in_tmp(tmp_path, monkeypatch):
+    """Write session checkpoints under the test's temporary directory."""
+    monkeypatch.setenv("LAPH_CHECKPOINT_DIR", str(tmp_path / "sessions"))
+    config.reset_config()
+    yield
+    config.reset_config()
+
+
+class QuietLogger:
+    def __init__(self):
+        self.messages = []
+
+    def log(self, message, level=None):
+        self.messages.append(message)
+
+
+@pytest.fixture
+def stub_loop(ollama_stub, tmp_path, monkeypatch):
+    """A RepairLoop using the built-in plugins, all talking to `ollama_stub`.
+
+    Runs in a temporary directory (so `laph.db` stays out of the repo) and
+    without the retry back-off sleep.
+    """
+    from core import repair_loop
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(repair_loop, "time", types.SimpleNamespace(sleep=lambda s: None, time=time.time))
+    loop = repair_loop.RepairLoop(QuietLogger())
+    for role, llm in loop._role_llms().items():
+        llm.endpoint = ollama_stub.url
+        llm.model_name = f"{role}-model"
+        llm.reuse_context = False
+    return loop
+
+
+WORKING_CODE = "```python\nprint(42)\n```"
+FAILING_CODE = "```python\nprint(undefined)\n```"
+
+
+class ScriptedModels:
+    """Canned replies of the `stub_loop` models, installed as `ollama_stub.script`.
+
+    `spec` (the thinker's spec), `code` (the coder's whole output), `verdict`
+    (the evaluator's answer), `followup` (the follow-up spec of the
+    interaction step) and `summary` (the summariser's answer) are strings or
+    callables taking the request payload. Specs and follow-ups are wrapped in
+    their JSON block; a reply given as a list is streamed chunk by chunk
+    exactly as it is.
+    """
+
+    working = WORKING_CODE
+    failing = FAILING_CODE
+
+    def __init__(self):
+        self.spec = "print 42"
+        self.code = WORKING_CODE
+        self.verdict = "YES"
+        self.followup = ""
+        self.summary = ""
+
+    def reject(self, code: str = FAILING_CODE) -> "ScriptedModels":
+        """Have the coder write `code`, which the evaluator turns down every time."""
+        self.code = code
+        self.verdict = "NO"
+        self.followup = "define the variable"
+        return self
+
+    def __call__(self, payload):
+        model, prompt = payload["model"], payload.get("prompt", "")
+        if "coder" in model:
+            return self._chunks(self.code, payload)
+        if model == "evaluator-model":
+            return self._chunks(self.verdict, payload)
+        if model == "summariser-model":
+            return self._chunks(self.summary, payload)
+        if "Thinker Interaction" in prompt:
+            return self._chunks(self.followup, payload, '```json\n{{"actions": [], "followup_spec": "{}"}}\n```')
+        return self._chunks(self.spec, payload, '```json\n{{"spec": "{}"}}\n```')
+
+    @staticmethod
+    def _chunks(reply, payload, block="{}"):
+        reply = reply(payload) if callable(reply) else reply
+        return reply if isinstance(reply, list) else [block.format(reply)]
+
+
+@pytest.fixture
+def scripted_models(ollama_stub):
+    """`ScriptedModels` answering every request to `ollama_stub`; a passing "print 42" task by default."""
+    models = ScriptedModels()
+    ollama_stub.script = models
+    return models
+
+
+@pytest.fixture
+def rejected_models(scripted_models):
+    """A program that runs cleanly without output, which only the evaluator can judge, and rejects."""
+    return scripted_models.reject("```python\nvalue = 1\n```")
+
+
+@pytest.fixture
+def strict_evaluation(monkeypatch):
+    """Send every run that did not crash to the LLM judge."""
+    monkeypatch.setenv("LAPH_EVALUATION_STRICT", "true")
+    config.reset_config()
+    yield
+    config.reset_config()
@@ -0,0 +1,63 @@
+"""Tests for per-task LLM call accounting."""
+
+import threading
+
+import pytest
+
+from core import repair_loop
+from core.accounting import CallLedger, CallLimitExceeded
+from core.budget import TaskBudget
+from core.constants import MAX_LLM_CALLS_PER_TASK
+from core.telemetry import CallStats
+
+def _stats(role="coder", tokens=10, cached=False):
+    return CallStats(model="m", role=role, eval_tokens=tokens, cached=cached)
+
+
+def test_scopes_attribute_calls_per_thread_and_mark_usage():
+    ledger = CallLedger()
+    with ledger.scope("code") as code:
+        ledger.record(_stats())
+        worker = threading.Thread(target=ledger.record, args=(_stats("evaluator", 30),))
+        worker.start()
+        worker.join()
+    ledger.mark(code, False)
+    ledger.record(_stats("summariser", 0))
+
+    assert [(r.purpose, r.used) for r in ledger.records] == [("code", False), ("evaluator", True), ("summariser", True)]
+    assert ledger.wasted_ratio == 0.25
+    assert "code 1 (1 unused)" in ledger.summary()
+
+
+def test_cap_counts_only_uncached_calls():
+    ledger = CallLedger(max_calls=1)
+    ledger.record(_stats(cached=True))
+    with ledger.scope("spec"):
+        ledger.record(_stats())
+    with pytest.raises(CallLimitExceeded):
+        with ledger.scope("code"):
+            pass
+
+
+def test_loop_reports_unused_followup_code(stub_loop, ollama_stub, rejected_models):
+    ollama_stub.final = {"eval_count": 10}
+    assert stub_loop.run_task("task", max_iters=2, schedule="fixed") is None
+    purposes = {p: len(r) for p, r in stub_loop.ledger.by_purpose().items()}
+    assert purposes == {"spec": 2, "code": 2, "evaluate": 2, "interaction": 2, "followup code": 2}
+    # spec and interaction streams stop at the closing fence, before the token counts
+    assert stub_loop.ledger.wasted_ratio == pytest.approx(1 / 3)
+    assert any("followup code 2 (2 unused)" in m for m in stub_loop.logger.messages)
+
+
+def test_loop_stops_at_the_call_cap(stub_loop, ollama_stub, rejected_models, monkeypatch):
+    monkeypatch.setattr(repair_loop, "MAX_LLM_CALLS_PER_TASK", 4)
+    assert stub_loop.run_task("task", max_iters=5, schedule="fixed") == "value = 1"
+    assert stub_loop.ledger.calls == 4
+    assert any("the limit per task is 4" in m for m in stub_loop.logger.messages)
+
+
+def test_call_cap_follows_the_call_budget(stub_loop, rejected_models):
+    stub_loop.run_task("task", max_iters=1, schedule="fixed")
+    assert stub_loop.ledger.max_calls == MAX_LLM_CALLS_PER_TASK
+    stub_loop.run_task("task", max_iters=1, schedule="fixed", budget=TaskBudget(llm_calls=200))
+    assert stub_loop.ledger.max_calls == 200
@@ -0,0 +1,61 @@
+"""Tests for the asyncio streaming path (`LLMInterface.agenerate`)."""
+
+import asyncio
+
+from core.llm_interface import LLMInterface
+from core.plugins.ollama_coder import OllamaCoder
+
+
+async def _collect(agen):
+    return "".join([chunk async for chunk in agen])
+
+
+def test_agenerate_yields_same_chunks_as_generate(ollama_stub):
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    sync_out = "".join(llm.generate("hi"))
+    async_out = asyncio.run(_collect(llm.agenerate("hi")))
+    assert async_out == sync_out == "hello world"
+    assert llm.last_error is None
+
+
+def test_many_streams_share_one_event_loop(ollama_stub):
+    ollama_stub.chunk_delay = 0.05
+
+    async def main():
+        llms = [LLMInterface(f"m{i}", endpoint=ollama_stub.url) for i in range(5)]
+        return await asyncio.gather(*(_collect(llm.agenerate("hi")) for llm in llms))
+
+    assert asyncio.run(main()) == ["hello world"] * 5
+
+
+def test_agenerate_cancellation(ollama_stub):
+    ollama_stub.chunks = ["x"] * 50
+    ollama_stub.chunk_delay = 0.05
+
+    async def main():
+        llm = LLMInterface("m", endpoint=ollama_stub.url)
+        task = asyncio.create_task(_collect(llm.agenerate("hi")))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert asyncio.run(main())
+
+
+def test_agenerate_reports_connection_errors():
+    llm = LLMInterface("m", endpoint="http://127.0.0.1:9")
+    assert asyncio.run(_collect(llm.agenerate("hi"))) == ""
+    assert llm.last_error
+
+
+def test_async_coder_plugin_splits_code_and_tests(ollama_stub):
+    ollama_stub.chunks = ["```python\nprint('a')\n```\n", "```\nassert 1 == 1\n```"]
+    coder = OllamaCoder("m")
+    coder.llm.endpoint = ollama_stub.url
+    code, tests = asyncio.run(coder.agenerate_code("spec"))
+    assert code == "print('a')"
+    assert tests == "assert 1 == 1"
@@ -0,0 +1,75 @@
+"""Tests for pluggable inference backends."""
+
+import asyncio
+
+import pytest
+
+from core.backends import Backend, OllamaBackend, OpenAIBackend, get_backend, resolve_backend
+from core.llm_interface import LLMInterface
+from core.stop_conditions import FirstJsonBlock
+
+MODELS = {
+    "default": {"name": "big", "provider": "ollama", "role": "primary"},
+    "coder": {"name": "coder-model", "provider": "openai", "role": "coder", "endpoint": "http://gpu:8000"},
+    "judge": {"name": "judge-model", "provider": "vllm"},
+}
+
+
+def test_resolve_backend_by_role_then_model_name():
+    backend, endpoint = resolve_backend("coder", "anything", MODELS)
+    assert isinstance(backend, OpenAIBackend) and endpoint == "http://gpu:8000"
+    assert isinstance(resolve_backend("thinker", "x", MODELS)[0], OllamaBackend)
+    assert isinstance(resolve_backend("evaluator", "judge-model", MODELS)[0], OpenAIBackend)
+    assert resolve_backend("evaluator", "unknown", MODELS)[1] is None
+    with pytest.raises(ValueError):
+        get_backend("nope")
+
+
+def test_incomplete_backend_fails_on_construction():
+    class BodyOnly(Backend):
+        def body(self, payload):
+            return payload
+
+    with pytest.raises(TypeError):
+        BodyOnly()
+
+
+def test_openai_body_maps_options():
+    body = OpenAIBackend().body(
+        {"model": "m", "prompt": "p", "options": {"temperature": 0.2, "num_predict": 5, "stop": ["x"], "num_ctx": 4096}}
+    )
+    assert body["messages"] == [{"role": "user", "content": "p"}]
+    assert body["max_tokens"] == 5 and body["stop"] == ["x"] and body["temperature"] == 0.2
+    assert "num_ctx" not in body and "options" not in body
+
+
+def test_openai_backend_streams_with_the_same_contract(ollama_stub):
+    ollama_stub.final = {"prompt_eval_count": 7, "eval_count": 2}
+    llm = LLMInterface("m", endpoint=ollama_stub.url, backend=OpenAIBackend())
+    assert "".join(llm.generate("hi")) == "hello world"
+    assert llm.last_error is None
+    assert llm.last_stats.prompt_tokens == 7 and llm.last_stats.eval_tokens == 2
+    assert ollama_stub.requests[-1]["messages"][0]["content"] == "hi"
+
+
+def test_openai_backend_async_and_early_stop(ollama_stub):
+    ollama_stub.chunks = ['```json\n{"spec": "x"}\n```', " trailing", " more"]
+    llm = LLMInterface("m", endpoint=ollama_stub.url, backend=OpenAIBackend())
+
+    async def run():
+        return [c async for c in llm.agenerate("hi", until=FirstJsonBlock())]
+
+    assert asyncio.run(run()) == ['```json\n{"spec": "x"}\n```']
+    assert llm.last_stopped
+
+
+def test_prefix_reuse_falls_back_to_full_prompt(ollama_stub):
+    llm = LLMInterface("m", endpoint=ollama_stub.url, backend=OpenAIBackend())
+    "".join(llm.generate_with_prefix("TEMPLATE\n", "delta"))
+    assert [r["messages"][0]["content"] for r in ollama_stub.requests] == ["TEMPLATE\ndelta"]
+
+
+def test_use_backend_defaults_to_the_backend_endpoint():
+    llm = LLMInterface("m")
+    llm.use_backend(OpenAIBackend())
+    assert llm.endpoint == OpenAIBackend.default_endpoint and llm.pool is None
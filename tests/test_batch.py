@@ -0,0 +1,103 @@
+"""Tests for the batch task runner."""
+
+import io
+import json
+
+import pytest
+
+from core.batch import BatchResult, BatchRunner, BatchSummary, percentile, read_tasks, write_jsonl
+
+
+@pytest.fixture
+def batch_models(scripted_models):
+    """Tasks pass unless they mention "broken"."""
+    scripted_models.spec = lambda payload: "broken program" if "broken" in payload["prompt"] else "print 42"
+    scripted_models.code = lambda payload: (
+        scripted_models.failing if "broken" in payload["prompt"] else scripted_models.working
+    )
+
+
+@pytest.fixture
+def loop_factory(stub_loop, ollama_stub, batch_models):
+    from core.repair_loop import RepairLoop
+
+    built = []
+
+    def factory():
+        loop = RepairLoop(stub_loop.logger)
+        for role, llm in loop._role_llms().items():
+            llm.endpoint = ollama_stub.url
+            llm.model_name = f"{role}-model"
+            llm.reuse_context = False
+        built.append(loop)
+        return loop
+
+    factory.built = built
+    return factory
+
+
+def test_read_tasks_accepts_objects_strings_and_reports_bad_lines():
+    lines = [
+        '{"task": "print primes", "id": "primes", "max_iterations": 3}',
+        "",
+        "# a comment",
+        '"say hello"',
+        "not json",
+        '{"id": "x"}',
+    ]
+    tasks = list(read_tasks(lines))
+    assert [(t.line, t.id, t.task, t.max_iterations) for t in tasks[:2]] == [
+        (1, "primes", "print primes", 3),
+        (4, "4", "say hello", None),
+    ]
+    assert tasks[2].error.startswith("line 5:")
+    assert tasks[3].error == "line 6: missing 'task'"
+
+
+def test_percentile_and_summary():
+    assert percentile([], 50) == 0.0
+    values = [float(v) for v in range(1, 21)]
+    assert percentile(values, 50) == 10.0
+    assert percentile(values, 95) == 19.0
+
+    summary = BatchSummary(wall_s=1800)
+    summary.add(BatchResult("a", 1, "t", True, seconds=2.0))
+    summary.add(BatchResult("b", 2, "t", False, seconds=4.0))
+    summary.add(BatchResult("c", 3, "", False, error="line 3: missing 'task'"))
+    assert (summary.tasks, summary.succeeded, summary.failed, summary.errors) == (3, 1, 1, 1)
+    assert summary.tasks_per_hour == 6.0
+    assert summary.latencies == [2.0, 4.0]
+    assert "6.0 tasks/hour" in summary.summary()
+
+
+def test_batch_runs_tasks_on_reused_loops_and_streams_jsonl(loop_factory, ollama_stub):
+    lines = [json.dumps({"task": f"print 42 #{i}", "id": f"t{i}"}) for i in range(4)]
+    lines.append(json.dumps({"task": "broken", "id": "bad", "max_iterations": 1}))
+    lines.append("{oops")
+    output = io.StringIO()
+
+    runner = BatchRunner(workers=2, max_iterations=2, loop_factory=loop_factory, schedule="fixed")
+    summary = runner.run(read_tasks(lines), write_jsonl(output))
+
+    # one loop per worker, reused for every task it ran
+    assert len(loop_factory.built) == 2
+    results = {r["id"]: r for r in map(json.loads, output.getvalue().splitlines())}
+    assert set(results) == {"t0", "t1", "t2", "t3", "bad", "6"}
+    for i in range(4):
+        result = results[f"t{i}"]
+        assert result["success"] and result["code"] == "print(42)"
+        assert result["iterations"] == 1 and result["llm_calls"] == 2
+        assert result["seconds"] > 0
+    assert not results["bad"]["success"] and results["bad"]["error"] is None
+    assert results["bad"]["iterations"] == 1
+    assert results["6"]["error"].startswith("line 6:")
+    assert (summary.succeeded, summary.failed, summary.errors) == (4, 1, 1)
+    assert len(summary.latencies) == 5 and summary.tasks_per_hour > 0
+
+
+def test_batch_reports_a_crashing_task_and_carries_on(loop_factory):
+    runner = BatchRunner(workers=1, loop_factory=loop_factory, strategy="sideways")
+    results = []
+    summary = runner.run(read_tasks(['{"task": "print 42"}']), results.append)
+    assert summary.errors == 1
+    assert results[0].error.startswith("ValueError: Unknown strategy")
@@ -0,0 +1,76 @@
+"""Tests for per-task budgets and adaptive degradation."""
+
+from core import budget as budget_mod
+from core import config
+from core.budget import TaskBudget
+from core.telemetry import CallStats
+
+
+def _call(tokens=0, cached=False):
+    return CallStats(model="m", prompt_tokens=tokens, cached=cached)
+
+
+def test_budget_is_off_unless_configured(monkeypatch):
+    assert TaskBudget.from_config().remaining() == {}
+    monkeypatch.setenv("LAPH_BUDGET_WALL_SECONDS", "60")
+    config.reset_config()
+    budget = TaskBudget.from_config()
+    assert (budget.wall_seconds, budget.llm_calls) == (60, None)
+
+
+def test_levels_follow_the_scarcest_resource():
+    budget = TaskBudget(wall_seconds=None, llm_calls=10, tokens=1000)
+    budget.start()
+    assert budget.level == budget_mod.FULL
+    for _ in range(5):
+        budget.record_call(_call())
+    assert budget.level == budget_mod.SKIP_EVALUATOR
+    budget.record_call(_call(tokens=750))
+    assert budget.level == budget_mod.SMALL_MODEL
+    budget.record_call(_call(tokens=200))
+    assert budget.level == budget_mod.SHRINK_CONTEXT
+    budget.record_call(_call(tokens=50))
+    assert budget.exhausted
+
+
+def test_cached_calls_are_free_and_sandbox_time_counts():
+    budget = TaskBudget(wall_seconds=None, llm_calls=1, sandbox_seconds=2.0)
+    budget.start()
+    budget.record_call(_call(cached=True))
+    assert budget.calls_used == 0
+    budget.record_sandbox(1.9)
+    assert budget.level == budget_mod.SHRINK_CONTEXT
+
+
+def test_shrink_keeps_the_tail_once_context_is_shrunk():
+    budget = TaskBudget(wall_seconds=None, llm_calls=10, shrunk_context_chars=5)
+    budget.start()
+    assert budget.shrink("0123456789") == "0123456789"
+    budget.calls_used = 9
+    assert budget.shrink("0123456789") == "...56789"
+
+
+def test_exhausted_budget_returns_best_candidate(stub_loop, ollama_stub, scripted_models):
+    scripted_models.reject()
+    result = stub_loop.run_task("task", max_iters=5, schedule="fixed", budget=TaskBudget(wall_seconds=None, llm_calls=4))
+
+    assert result == "print(undefined)"
+    assert stub_loop.last_success is False
+    # the evaluator was skipped once half the calls were used
+    assert [r["model"] for r in ollama_stub.requests] == ["thinker-model", "coder-model"] * 2
+    assert any("Budget exhausted" in m for m in stub_loop.logger.messages)
+
+
+def test_low_budget_switches_to_small_models_and_restores_them(stub_loop, ollama_stub, scripted_models):
+    scripted_models.reject()
+    budget = TaskBudget(
+        wall_seconds=None,
+        llm_calls=100,
+        thresholds={budget_mod.SMALL_MODEL: 0.99},
+        small_models={"coder": "tiny-coder"},
+    )
+    assert stub_loop.run_task("task", max_iters=2, schedule="grouped", budget=budget) is None
+
+    coder_models = [r["model"] for r in ollama_stub.requests if "coder" in r["model"]]
+    assert coder_models == ["coder-model", "tiny-coder"]
+    assert stub_loop.coder.llm.model_name == "coder-model"
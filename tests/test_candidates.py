@@ -0,0 +1,45 @@
+"""Tests for best-of-N candidate generation."""
+
+from core.candidates import Candidate, best, candidate_options, clone_plugin
+from core.llm_interface import LLMInterface
+
+def test_candidate_options_spread_temperature_and_seed():
+    assert candidate_options(1, 0.2) == [{"temperature": 0.2}]
+    options = candidate_options(3, 0.0, 0.8)
+    assert [o["temperature"] for o in options] == [0.0, 0.4, 0.8]
+    assert [o["seed"] for o in options] == [0, 1, 2]
+
+
+def test_best_prefers_score_then_lower_index():
+    candidates = [Candidate(0, "a", score=3.0), Candidate(1, "b", score=5.0), Candidate(2, "c", score=5.0)]
+    assert best(candidates).index == 1
+
+
+def test_clone_plugin_gets_its_own_llm_state():
+    class Plugin:
+        def __init__(self):
+            self.llm = LLMInterface("m", options={"top_p": 0.9})
+
+    plugin = Plugin()
+    twin = clone_plugin(plugin, temperature=0.5)
+    assert twin.llm is not plugin.llm
+    assert twin.llm.options == {"top_p": 0.9, "temperature": 0.5}
+    assert plugin.llm.options == {"top_p": 0.9}
+    assert twin.llm.listeners is plugin.llm.listeners
+    runner = object()
+    assert clone_plugin(runner) is runner
+
+
+def test_best_of_n_keeps_the_highest_scoring_candidate(stub_loop, ollama_stub, scripted_models):
+    # only the hottest candidate writes a working program
+    scripted_models.code = lambda payload: (
+        scripted_models.working if payload["options"].get("seed") == 2 else scripted_models.failing
+    )
+    result = stub_loop.run_task("print 42", max_iters=1, schedule="fixed", n_candidates=3)
+    assert result == "print(42)"
+    coder_calls = [r for r in ollama_stub.requests if r["model"] == "coder-model"]
+    assert sorted(r["options"]["seed"] for r in coder_calls) == [0, 1, 2]
+    # crashes and the clean run are decided without the evaluator
+    assert not any(r["model"] == "evaluator-model" for r in ollama_stub.requests)
+    assert stub_loop.verdicts == {"deterministic": 3}
+    assert stub_loop.telemetry.task_totals().calls == len(ollama_stub.requests)
@@ -0,0 +1,89 @@
+"""Tests for record/replay cassettes."""
+
+import asyncio
+import time
+
+import pytest
+
+from core import retrieval, solution_store
+from core.cassette import RECORD, REPLAY, Cassette, use_cassette
+from core.llm_interface import LLMInterface
+
+
+@pytest.fixture
+def chunked_models(scripted_models):
+    """The spec and code of a "print 42" task, streamed in several chunks."""
+    scripted_models.spec = ['```json\n{"spec": ', '"print 42"}\n```']
+    scripted_models.code = ["```python\n", "print(42)\n", "```"]
+
+
+def test_replayed_task_needs_neither_model_nor_sandbox(stub_loop, ollama_stub, chunked_models, tmp_path):
+    path = str(tmp_path / "run.cassette")
+    with use_cassette(Cassette(path, RECORD)) as cassette:
+        recorded = stub_loop.run_task("print 42", max_iters=2, schedule="fixed")
+    assert recorded == "print(42)"
+    assert cassette.calls == len(ollama_stub.requests) and cassette.runs == 1
+    recorded_tokens = stub_loop.telemetry.task_totals().eval_tokens
+
+    ollama_stub.requests.clear()
+
+    def run(code):
+        raise AssertionError("the sandbox ran during replay")
+
+    stub_loop.runner.run = run
+    with use_cassette(Cassette(path, REPLAY)) as cassette:
+        assert stub_loop.run_task("print 42", max_iters=2, schedule="fixed") == recorded
+    assert ollama_stub.requests == []
+    assert cassette.calls > 0 and cassette.runs == 1
+    assert stub_loop.telemetry.task_totals().eval_tokens == recorded_tokens
+
+
+def test_replay_keeps_recorded_timings_only_when_asked(ollama_stub, tmp_path):
+    ollama_stub.chunks = ["a", "b", "c", "d"]
+    ollama_stub.chunk_delay = 0.05
+    path = str(tmp_path / "slow.cassette")
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    with use_cassette(Cassette(path, RECORD)):
+        assert "".join(llm.generate("hi")) == "abcd"
+
+    started = time.perf_counter()
+    with use_cassette(Cassette(path, REPLAY)):
+        assert "".join(llm.generate("hi")) == "abcd"
+    assert time.perf_counter() - started < 0.1
+
+    started = time.perf_counter()
+    with use_cassette(Cassette(path, REPLAY, realtime=True)):
+        assert "".join(llm.generate("hi")) == "abcd"
+    assert time.perf_counter() - started >= 0.15
+    assert llm.last_stats.eval_tokens == 2
+
+
+def test_replay_miss_and_async_replay(ollama_stub, tmp_path):
+    path = str(tmp_path / "async.cassette")
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    with use_cassette(Cassette(path, RECORD)):
+        live = list(llm.generate("hi"))
+
+    async def collect(prompt):
+        return [chunk async for chunk in llm.agenerate(prompt)]
+
+    requests = len(ollama_stub.requests)
+    with use_cassette(Cassette(path, REPLAY)):
+        assert asyncio.run(collect("hi")) == live
+        assert list(llm.generate("something else")) == []
+        assert "No recorded response" in llm.last_error
+    assert len(ollama_stub.requests) == requests
+
+
+def test_replay_ignores_stored_solutions_and_examples(stub_loop, ollama_stub, chunked_models, tmp_path):
+    solution_store.set_solutions_enabled(True)
+    retrieval.set_retrieval_enabled(True)
+    path = str(tmp_path / "run.cassette")
+    with use_cassette(Cassette(path, RECORD)):
+        recorded = stub_loop.run_task("print 42", max_iters=2, schedule="fixed")
+    # the recorded success is now in laph.db, as a solution and as an example
+    assert solution_store.get_solution_store().lookup("print 42") is not None
+
+    with use_cassette(Cassette(path, REPLAY)) as cassette:
+        assert stub_loop.run_task("print 42", max_iters=2, schedule="fixed") == recorded
+    assert cassette.calls == len(ollama_stub.requests)
@@ -0,0 +1,71 @@
+"""Tests for per-iteration checkpoints and resumed sessions."""
+
+import pytest
+
+from core import repair_loop
+from core.budget import TaskBudget
+from core.checkpoint import IterationCheckpoint, SessionLog
+
+
+def test_session_log_round_trip_skips_torn_lines(tmp_path):
+    log = SessionLog.create("task", str(tmp_path), max_iters=3)
+    checkpoint = IterationCheckpoint(1, "spec", "print(x)", None, "", "NameError", 1, 1.0, None, "NameError", None)
+    log.record_iteration(checkpoint)
+    with open(log.path, "a") as f:
+        f.write('{"type": "iteration", "iter')
+
+    reopened = SessionLog.open(log.path)
+    assert reopened.session == log.session
+    assert reopened.task == "task"
+    assert reopened.last_iteration() == checkpoint
+    assert reopened.outcome() is None
+    reopened.finish(False, "", 1)
+    assert reopened.outcome()["success"] is False
+    with pytest.raises(FileNotFoundError):
+        SessionLog.open("missing", str(tmp_path))
+
+
+def test_failed_session_resumes_after_last_iteration(stub_loop, ollama_stub, scripted_models):
+    scripted_models.code = scripted_models.failing
+    assert stub_loop.run_task("print 42", max_iters=2, schedule="fixed") is None
+    session = stub_loop.session
+    iterations = [r for r in session.records() if r["type"] == "iteration"]
+    assert [r["iteration"] for r in iterations] == [1, 2]
+    assert "NameError" in iterations[-1]["last_error"]
+    assert iterations[-1]["code"] == "print(undefined)"
+
+    ollama_stub.requests.clear()
+    scripted_models.code = scripted_models.working
+    assert stub_loop.run_task("", max_iters=4, schedule="fixed", resume=session.session) == "print(42)"
+    assert stub_loop.telemetry.current == 3
+    # the resumed thinker call sees the error the last checkpoint handed on
+    assert "NameError" in ollama_stub.requests[0]["prompt"]
+    assert session.outcome()["success"] is True
+    assert [r["type"] for r in session.records()][-3:] == ["end", "resume", "end"]
+
+    ollama_stub.requests.clear()
+    assert stub_loop.run_task("", max_iters=4, resume=session.session) == "print(42)"
+    assert ollama_stub.requests == []
+
+
+def test_resume_only_supports_linear_strategy(stub_loop):
+    with pytest.raises(ValueError):
+        stub_loop.run_task("", resume="anything", strategy="beam")
+
+
+def _checkpointed(session):
+    return [r["iteration"] for r in session.records() if r["type"] == "iteration"]
+
+
+def test_exhausted_budget_keeps_the_last_iteration(stub_loop, scripted_models):
+    scripted_models.reject()
+    # the thinker and coder calls of the first iteration use up the budget
+    stub_loop.run_task("task", max_iters=5, schedule="fixed", budget=TaskBudget(llm_calls=2))
+    assert _checkpointed(stub_loop.session) == [1]
+    assert "NameError" in stub_loop.session.last_iteration().last_error
+
+
+def test_call_cap_keeps_the_last_iteration(stub_loop, rejected_models, monkeypatch):
+    monkeypatch.setattr(repair_loop, "MAX_LLM_CALLS_PER_TASK", 4)
+    stub_loop.run_task("task", max_iters=5, schedule="fixed")
+    assert _checkpointed(stub_loop.session) == [1]
@@ -0,0 +1,71 @@
+"""Tests for KV context reuse of static prompt prefixes."""
+
+from core.llm_interface import PASS_THROUGH_TEMPLATE, LLMInterface
+from core.plugins.ollama_thinker import OllamaThinker
+from core.prompt_manager import PromptManager
+
+
+def test_prefix_is_primed_once_and_deltas_reuse_context(ollama_stub):
+    ollama_stub.final = {"context": [11, 12, 13, 99]}
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+
+    assert "".join(llm.generate_with_prefix("TEMPLATE\n", "first")) == "hello world"
+    assert "".join(llm.generate_with_prefix("TEMPLATE\n", "second")) == "hello world"
+
+    priming, first, second = ollama_stub.requests
+    assert priming["prompt"] == "TEMPLATE\n"
+    assert priming["options"]["num_predict"] == 1
+    assert first["prompt"] == "first" and first["context"] == [11, 12, 13]
+    assert second["prompt"] == "second" and second["context"] == [11, 12, 13]
+    # no chat template around either half: the model sees "TEMPLATE\nfirst"
+    assert {r["template"] for r in ollama_stub.requests} == {PASS_THROUGH_TEMPLATE}
+
+
+def test_empty_delta_sends_the_full_prompt(ollama_stub):
+    ollama_stub.final = {"context": [11, 12, 13, 99]}
+    thinker = OllamaThinker("m")
+    thinker.llm.endpoint = ollama_stub.url
+    ollama_stub.script = lambda payload: ['```json\n{"spec": "print primes"}\n```']
+
+    # first iteration: no code and no error, so nothing follows the prefix
+    assert thinker.generate_spec("print primes") == "print primes"
+    (request,) = ollama_stub.requests
+    assert request["prompt"] == thinker.prompts.build_thinker("print primes")
+    assert "context" not in request and "template" not in request
+
+
+def test_falls_back_to_full_prompt_without_server_context(ollama_stub):
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    "".join(llm.generate_with_prefix("TEMPLATE\n", "delta"))
+    "".join(llm.generate_with_prefix("TEMPLATE\n", "delta 2"))
+    prompts = [r["prompt"] for r in ollama_stub.requests]
+    # primed once, then full prompts without a context
+    assert prompts == ["TEMPLATE\n", "TEMPLATE\ndelta", "TEMPLATE\ndelta 2"]
+    assert "context" not in ollama_stub.requests[-1]
+
+
+def test_reuse_can_be_disabled(ollama_stub):
+    ollama_stub.final = {"context": [1, 2]}
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    llm.reuse_context = False
+    "".join(llm.generate_with_prefix("TEMPLATE\n", "delta"))
+    assert [r["prompt"] for r in ollama_stub.requests] == ["TEMPLATE\ndelta"]
+
+
+def test_prompt_parts_join_to_full_prompt():
+    pm = PromptManager()
+    assert "".join(pm.thinker_parts("t", "c", "e")) == pm.build_thinker("t", "c", "e")
+    assert "".join(pm.coder_parts("s", "c", "e")) == pm.build_coder("s", "c", "e")
+    assert pm.thinker_parts("t", "c1")[0] == pm.thinker_parts("t", "c2", "e")[0]
+
+
+def test_loop_with_context_reuse_gets_a_spec_on_the_first_iteration(stub_loop, ollama_stub):
+    ollama_stub.final = {"context": [11, 12, 13, 99]}
+    for llm in stub_loop._role_llms().values():
+        llm.reuse_context = True
+    ollama_stub.script = lambda payload: (
+        ["```python\nprint(2)\n```"] if payload["model"] == "coder-model" else ['```json\n{"spec": "print 2"}\n```']
+    )
+    stub_loop.run_task("print 2", max_iters=1, schedule="fixed")
+    coder_calls = [r for r in ollama_stub.requests if r["model"] == "coder-model" and "context" in r]
+    assert coder_calls and coder_calls[0]["prompt"].startswith("\n\nSpecification: print 2\n")
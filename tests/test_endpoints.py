@@ -0,0 +1,109 @@
+"""Tests for multi-endpoint routing, health checks and failover."""
+
+import asyncio
+
+from core import config, endpoints
+from core.endpoints import EndpointPool
+from core.llm_interface import LLMInterface
+
+DEAD = "http://127.0.0.1:9"
+
+
+def pooled_llm(pool, model="m"):
+    llm = LLMInterface(model)
+    llm.pool = pool
+    return llm
+
+
+def test_least_loaded_spreads_concurrent_requests():
+    pool = EndpointPool(["http://a:1", "http://b:1"], routing=endpoints.LEAST_LOADED)
+    first = pool.acquire("m")
+    second = pool.acquire("m")
+    assert {first.url, second.url} == {"http://a:1", "http://b:1"}
+    pool.release(first)
+    assert pool.acquire("m") is first
+
+
+def test_affinity_keeps_a_model_on_the_same_endpoint():
+    pool = EndpointPool(["http://a:1", "http://b:1"])
+    warm = pool.acquire("coder")
+    pool.release(warm)
+    assert pool.acquire("other").url != warm.url
+    assert pool.acquire("coder") is warm
+
+
+def test_affinity_yields_to_a_much_less_loaded_endpoint():
+    pool = EndpointPool(["http://a:1", "http://b:1"])
+    warm = pool.acquire("coder")
+    assert pool.acquire("coder") is warm
+    # two more in flight than the idle endpoint: spill over
+    assert pool.acquire("coder").url == "http://b:1"
+
+
+def test_failover_skips_unreachable_endpoint(ollama_stub):
+    pool = EndpointPool([DEAD, ollama_stub.url], routing=endpoints.LEAST_LOADED)
+    llm = pooled_llm(pool)
+    assert "".join(llm.generate("hi")) == "hello world"
+    assert llm.last_error is None
+    assert llm.last_endpoint == ollama_stub.url
+    assert not pool.get(DEAD).healthy
+    assert pool.get(ollama_stub.url).in_flight == 0
+
+    # the dead endpoint stays out of rotation
+    "".join(llm.generate("again"))
+    assert len(ollama_stub.requests) == 2
+
+
+def test_async_failover(ollama_stub):
+    pool = EndpointPool([DEAD, ollama_stub.url], routing=endpoints.LEAST_LOADED)
+    llm = pooled_llm(pool)
+
+    async def run():
+        return "".join([c async for c in llm.agenerate("hi")])
+
+    assert asyncio.run(run()) == "hello world"
+    assert llm.last_error is None
+    assert not pool.get(DEAD).healthy
+
+
+def test_health_check_records_models_and_routes_by_them(make_ollama_stub):
+    small, big = make_ollama_stub(), make_ollama_stub()
+    small.loaded, big.loaded = ["tiny"], ["tiny", "large"]
+    pool = EndpointPool([small.url, big.url], routing=endpoints.LEAST_LOADED)
+    assert pool.check_all() == {small.url: True, big.url: True}
+    assert pool.acquire("large").url == big.url
+
+
+def test_down_endpoint_is_probed_again_after_back_off(ollama_stub):
+    pool = EndpointPool([ollama_stub.url], retry_after=0)
+    endpoint = pool.acquire("m")
+    pool.release(endpoint, ok=False)
+    assert not endpoint.healthy
+    assert pool.acquire("m") is endpoint
+    assert endpoint.healthy
+
+
+def test_prefix_context_stays_on_the_priming_endpoint(make_ollama_stub):
+    stubs = [make_ollama_stub(), make_ollama_stub()]
+    for stub in stubs:
+        stub.final = {"context": [1, 2, 3]}
+    pool = EndpointPool([s.url for s in stubs], routing=endpoints.LEAST_LOADED)
+    llm = pooled_llm(pool)
+
+    "".join(llm.generate_with_prefix("TEMPLATE\n", "delta"))
+    primed_on = [s for s in stubs if s.requests]
+    assert len(primed_on) == 1
+    assert [r["prompt"] for r in primed_on[0].requests] == ["TEMPLATE\n", "delta"]
+
+
+def test_pool_is_configured_from_endpoint_list(monkeypatch):
+    monkeypatch.setenv("LAPH_LLM_ENDPOINTS", "http://gpu1:11434, http://gpu2:11434/")
+    config.reset_config()
+    endpoints.reset_endpoint_pool()
+    try:
+        pool = endpoints.get_endpoint_pool()
+        assert [e.url for e in pool.endpoints] == ["http://gpu1:11434", "http://gpu2:11434"]
+        assert LLMInterface("m").endpoint == "http://gpu1:11434"
+    finally:
+        config.reset_config()
+        endpoints.reset_endpoint_pool()
@@ -0,0 +1,47 @@
+"""Tests for tiered evaluation."""
+
+from core.evaluation import DETERMINISTIC, LLM, TESTS, judged, triage
+from core.plugins.llm_evaluator import LLMEvaluator
+
+
+def test_cheap_tiers_decide_clear_outcomes():
+    crash = triage("partial output", "Traceback ...", 1)
+    assert (crash.tier, crash.passed) == (DETERMINISTIC, False)
+    clean = triage("42\n", "", 0)
+    assert (clean.tier, clean.passed) == (DETERMINISTIC, True)
+    tested = triage("", "", 0, tests_passed=3, tests_total=3)
+    assert (tested.tier, tested.passed) == (TESTS, True)
+    assert not triage("", "", 0, tests_passed=2, tests_total=3).passed
+    # a clean run without output, or with warnings, is ambiguous
+    assert triage("", "", 0) is None
+    assert triage("42\n", "DeprecationWarning", 0) is None
+
+
+def test_strict_mode_defers_everything_but_failures_to_the_judge():
+    assert triage("42\n", "", 0, strict=True) is None
+    assert triage("", "boom", 2, strict=True).tier == DETERMINISTIC
+    assert judged("42\n", "", 0, "NO", strict=True).passed is False
+    assert judged("42\n", "", 0, "NO").passed is True
+    assert judged("", "", 0, "yes").score == 4.0
+
+
+def test_evaluator_only_calls_the_model_when_ambiguous(ollama_stub):
+    ollama_stub.chunks = ["YES"]
+    evaluator = LLMEvaluator("judge")
+    evaluator.llm.endpoint = ollama_stub.url
+
+    assert evaluator.evaluate("", "", "NameError", 1, "task") == 0.0
+    assert evaluator.evaluate("", "done\n", "", 0, "task") == 3.0
+    assert ollama_stub.requests == []
+
+    assert evaluator.evaluate("", "", "", 0, "task") == 4.0
+    assert evaluator.last_verdict.tier == LLM
+    assert len(ollama_stub.requests) == 1
+
+
+def test_strict_evaluation_asks_the_judge(ollama_stub, strict_evaluation):
+    ollama_stub.chunks = ["NO"]
+    evaluator = LLMEvaluator("judge")
+    evaluator.llm.endpoint = ollama_stub.url
+    assert evaluator.evaluate("", "done\n", "", 0, "task") == 2.0
+    assert len(ollama_stub.requests) == 1
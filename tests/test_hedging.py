@@ -0,0 +1,74 @@
+"""Tests for hedged LLM requests."""
+
+import threading
+import time
+
+from core import endpoints
+from core.endpoints import EndpointPool
+from core.hedging import MIN_SAMPLES, HedgePolicy
+from core.llm_interface import LLMInterface
+
+
+def test_delay_uses_initial_value_until_enough_samples():
+    policy = HedgePolicy(percentile=90, initial_delay=3.0, min_delay=0.0)
+    assert policy.delay("m") == 3.0
+    for i in range(MIN_SAMPLES):
+        policy.observe("m", 0.1 * (i + 1), hedged=False, hedge_won=False)
+    assert policy.delay("m") == 1.0
+    assert policy.delay("other") == 3.0
+
+
+def test_stats():
+    policy = HedgePolicy()
+    policy.observe("m", 0.1, hedged=False, hedge_won=False)
+    policy.observe("m", 2.0, hedged=True, hedge_won=True)
+    assert policy.stats() == {
+        "requests": 2,
+        "hedged": 1,
+        "hedge_wins": 1,
+        "hedge_rate": 0.5,
+        "win_rate": 1.0,
+    }
+
+
+def test_stalled_endpoint_is_hedged_to_another(make_ollama_stub):
+    slow, fast = make_ollama_stub(), make_ollama_stub()
+    slow.first_token_delay = 2.0
+    pool = EndpointPool([slow.url, fast.url], routing=endpoints.LEAST_LOADED)
+    llm = LLMInterface("m")
+    llm.pool = pool
+    llm.hedging = HedgePolicy(initial_delay=0.1)
+
+    started = time.perf_counter()
+    assert "".join(llm.generate("hi")) == "hello world"
+    assert time.perf_counter() - started < 1.5
+    assert llm.last_hedged and llm.last_stats.hedged
+    assert llm.last_endpoint == fast.url
+    assert llm.hedging.hedge_wins == 1
+    assert len(slow.requests) == len(fast.requests) == 1
+
+
+def test_fast_call_is_not_hedged(ollama_stub):
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    llm.hedging = HedgePolicy(initial_delay=5.0)
+    assert "".join(llm.generate("hi")) == "hello world"
+    assert not llm.last_hedged
+    assert llm.hedging.stats()["hedged"] == 0
+    assert len(ollama_stub.requests) == 1
+
+
+def test_single_endpoint_hedges_to_a_second_slot(ollama_stub):
+    first = threading.Event()
+
+    def script(payload):
+        if not first.is_set():
+            first.set()
+            time.sleep(2.0)
+        return ["hedged"]
+
+    ollama_stub.script = script
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    llm.hedging = HedgePolicy(initial_delay=0.1)
+    assert "".join(llm.generate("hi")) == "hedged"
+    assert llm.last_hedged
+    assert len(ollama_stub.requests) == 2
@@ -0,0 +1,43 @@
+"""Tests for the shared keep-alive HTTP session used by `LLMInterface`."""
+
+from core import http_pool
+from core.llm_interface import LLMInterface
+
+
+def test_llm_interfaces_share_one_session():
+    http_pool.reset_session()
+    assert http_pool.get_session() is http_pool.get_session()
+
+
+def test_connections_are_reused_across_calls(ollama_stub):
+    http_pool.reset_session()
+    thinker = LLMInterface("thinker-model", endpoint=ollama_stub.url)
+    coder = LLMInterface("coder-model", endpoint=ollama_stub.url)
+    for llm in (thinker, coder, thinker):
+        assert "".join(llm.generate("hi")) == "hello world"
+        assert llm.last_error is None
+
+    stats = http_pool.pool_stats()
+    host = next(iter(stats.values()))
+    assert host["requests"] == 3
+    assert host["connections"] == 1
+    assert host["reused"] == 2
+
+
+def test_early_exit_returns_connection_to_pool(ollama_stub):
+    http_pool.reset_session()
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    stream = llm.generate("hi")
+    assert next(stream) == "hello "
+    stream.close()
+
+    assert "".join(llm.generate("again")) == "hello world"
+    assert http_pool.pool_stats()
+
+
+def test_task_log_reports_connection_reuse(stub_loop, ollama_stub):
+    http_pool.reset_session()
+    ollama_stub.script = lambda payload: ["```python\nprint(1)\n```"]
+    stub_loop.run_task("print 1", max_iters=1, schedule="fixed")
+    lines = [m for m in stub_loop.logger.messages if m.startswith(f"[HTTP] {ollama_stub.url}: ")]
+    assert lines and "reused)" in lines[0]
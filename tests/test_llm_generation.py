@@ -7,7 +7,7 @@ import pytest
 # Add the project root to sys.path so we can import core
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import requests
+from core import http_pool
 from core.llm_interface import LLMInterface
 
 
@@ -20,9 +20,14 @@ def test_llm_simple_code_generation(monkeypatch):
 
     def fake_post(url, **kwargs):
         class FakeResponse:
+            status_code = 200
+
             def raise_for_status(self):
                 return None
 
+            def close(self):
+                return None
+
             def iter_lines(self):
                 # Simulate streamed JSON response lines from Ollama
                 yield json.dumps(
@@ -31,7 +36,7 @@ def test_llm_simple_code_generation(monkeypatch):
 
         return FakeResponse()
 
-    monkeypatch.setattr(requests, "post", fake_post)
+    monkeypatch.setattr(http_pool.get_session(), "post", fake_post)
 
     llm = LLMInterface(model_name="qwen2.5:14b", temperature=0.1)
     prompt = "Write a simple Python function named 'add_numbers' that takes two arguments and returns their sum. Only return the code."
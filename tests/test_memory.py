@@ -0,0 +1,43 @@
+"""Tests for the rolling iteration memory."""
+
+from core.llm_interface import LLMInterface
+from core.memory import IterationMemory
+
+def test_compress_folds_attempts_with_the_summariser_prompt(ollama_stub):
+    ollama_stub.chunks = ["x" * 500]
+    memory = IterationMemory(LLMInterface("s", endpoint=ollama_stub.url), max_chars=100, error_chars=20)
+    memory.remember(1, "spec one", "NameError: undefined", "define it")
+    memory.compress()
+    context = memory.context("Traceback ... " + "e" * 100)
+
+    prompt = ollama_stub.requests[0]["prompt"]
+    assert "You are the Summariser" in prompt
+    assert "Iteration 1: spec: spec one" in prompt and "Suggested fix: define it" in prompt
+    assert len(memory.summary) <= 100 + 3
+    assert context.startswith("Earlier attempts (summary): ")
+    assert context.endswith("e" * 20)
+
+
+def test_falls_back_to_raw_history_when_summariser_fails():
+    memory = IterationMemory(LLMInterface("s", endpoint="http://127.0.0.1:9"), max_chars=50)
+    memory.remember(1, "spec", "boom")
+    memory.compress()
+    memory.wait()
+    assert memory.summary.endswith("Error: boom")
+
+
+def test_loop_prompts_stay_bounded_across_iterations(stub_loop, ollama_stub, scripted_models):
+    stub_loop.memory = IterationMemory(
+        LLMInterface("summariser-model", endpoint=ollama_stub.url), max_chars=200, error_chars=200
+    )
+    scripted_models.reject().summary = "tried printing an undefined name twice"
+    assert stub_loop.run_task("task", max_iters=4, schedule="grouped") is None
+
+    thinker_specs = [
+        r["prompt"] for r in ollama_stub.requests
+        if r["model"] == "thinker-model" and "Thinker Interaction" not in r["prompt"]
+    ]
+    assert "Earlier attempts (summary): tried printing an undefined name twice" in thinker_specs[-1]
+    sizes = [len(p) for p in thinker_specs[1:]]
+    assert max(sizes) - min(sizes) < 300
+    assert sum(r["model"] == "summariser-model" for r in ollama_stub.requests) == 3
@@ -0,0 +1,64 @@
+"""Tests for the pipelined thinker/coder mode."""
+
+from core.llm_interface import CANCELLED, LLMInterface
+from core.pipeline import SpecWatcher, similarity
+
+
+def _spec_chunks(spec):
+    return ['```json\n{"spec": "' + spec + '"', ', "notes": "extra thoughts"}', "\n```"]
+
+
+def _revise_spec(models, specs, working_when):
+    """First spec, then the revised one once the thinker sees an error."""
+    models.spec = lambda payload: _spec_chunks(specs[1] if "Error:" in payload["prompt"] else specs[0])
+    models.code = lambda payload: models.working if working_when in payload["prompt"] else models.failing
+
+
+def _coder_specs(stub):
+    return [
+        r["prompt"].split("Specification: ")[1].split("\n")[0]
+        for r in stub.requests
+        if r["model"] == "coder-model"
+    ]
+
+
+def test_spec_watcher_reports_the_spec_before_the_block_closes():
+    seen = []
+    watcher = SpecWatcher(seen.append)
+    chunks = _spec_chunks("do it")
+    assert watcher(chunks[0]) is False
+    assert seen == ["do it"]
+    assert [watcher(c) for c in chunks[1:]] == [False, True]
+    assert seen == ["do it"]
+
+
+def test_similarity_ignores_case_and_whitespace():
+    assert similarity("Print  42", "print 42") == 1.0
+    assert similarity("print 42", "parse a csv file") < 0.5
+
+
+def test_pipelined_run_keeps_speculative_code_for_an_unchanged_spec(stub_loop, ollama_stub, scripted_models):
+    _revise_spec(scripted_models, ["print 42", "print 42"], working_when="Error:")
+    result = stub_loop.run_task("print 42", max_iters=2, schedule="fixed", pipeline=True)
+    assert result == "print(42)"
+    # one coder call per iteration: the second was the speculative one
+    assert _coder_specs(ollama_stub) == ["print 42", "print 42"]
+
+
+def test_pipelined_run_discards_speculation_when_the_spec_changes(stub_loop, ollama_stub, scripted_models):
+    _revise_spec(scripted_models, ["print 42", "print forty-three as words"], working_when="forty-three")
+    result = stub_loop.run_task("print 42", max_iters=2, schedule="fixed", pipeline=True)
+    assert result == "print(42)"
+    assert _coder_specs(ollama_stub)[-1] == "print forty-three as words"
+    assert sorted(_coder_specs(ollama_stub)) == ["print 42", "print 42", "print forty-three as words"]
+    speculative = stub_loop.ledger.by_purpose()["speculative code"]
+    assert [r.used for r in speculative] == [False]
+
+
+def test_cancelled_calls_send_nothing(ollama_stub):
+    llm = LLMInterface("coder-model", endpoint=ollama_stub.url)
+    llm.cancel()
+    assert list(llm.generate("prompt")) == []
+    assert list(llm.generate_with_prefix("static prefix ", "delta")) == []
+    assert llm.last_error == CANCELLED
+    assert ollama_stub.requests == []
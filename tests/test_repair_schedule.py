@@ -0,0 +1,33 @@
+"""Tests for swap-aware call scheduling in the repair loop."""
+
+from core.scheduling import SwapTracker
+
+
+def _models(stub):
+    return [r["model"].split("-")[0] for r in stub.requests]
+
+
+def test_swap_tracker_counts_avoided_swaps():
+    tracker = SwapTracker()
+    for model in ["t", "c", "e", "t"]:
+        tracker.record(model)
+    tracker.skip("c")
+    tracker.record("t")
+    assert tracker.swaps == 3
+    assert tracker.avoided == 2
+
+
+def test_fixed_schedule_keeps_followup_coder_call(stub_loop, ollama_stub, rejected_models):
+    assert stub_loop.run_task("task", max_iters=2, schedule="fixed") is None
+    assert _models(ollama_stub) == ["thinker", "coder", "evaluator", "thinker", "coder"] * 2
+    assert stub_loop.swaps.swaps == 9
+    assert stub_loop.swaps.avoided == 0
+
+
+def test_grouped_schedule_reuses_thinker_and_reports_avoided_swaps(stub_loop, ollama_stub, rejected_models):
+    assert stub_loop.run_task("task", max_iters=2, schedule="grouped") is None
+    assert _models(ollama_stub) == ["thinker", "coder", "evaluator", "thinker"] * 2
+    assert stub_loop.swaps.swaps == 6
+    assert stub_loop.swaps.avoided == 3
+    # the follow-up suggestion reaches the next spec call
+    assert "Suggested fix: define the variable" in ollama_stub.requests[4]["prompt"]
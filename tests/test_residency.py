@@ -0,0 +1,82 @@
+"""Tests for model preloading and residency reporting."""
+
+from core import config, endpoints
+from core.llm_interface import LLMInterface
+from core.repair_loop import RepairLoop
+from core.residency import ModelResidency
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.messages = []
+
+    def log(self, message, level=None):
+        self.messages.append(message)
+
+
+def test_preload_passes_keep_alive_and_logs_load(ollama_stub):
+    ollama_stub.final = {"load_duration": 2_500_000_000}
+    logger = RecordingLogger()
+    residency = ModelResidency(ollama_stub.url, logger, keep_alive={"coder": "30m"})
+
+    timings = residency.preload({"coder": "coder-model", "thinker": "thinker-model"})
+
+    assert timings == {"coder-model": 2.5, "thinker-model": 2.5}
+    coder_req = next(r for r in ollama_stub.requests if r["model"] == "coder-model")
+    assert coder_req["keep_alive"] == "30m"
+    assert "prompt" not in coder_req
+    assert residency.loads == {"coder-model": 1, "thinker-model": 1}
+    assert any("loaded coder-model for coder in 2.50s" in m for m in logger.messages)
+
+
+def test_loaded_reports_server_ps(ollama_stub):
+    ollama_stub.loaded = ["qwen3:4b"]
+    residency = ModelResidency(ollama_stub.url)
+    assert [m["name"] for m in residency.loaded()] == ["qwen3:4b"]
+    assert "resident: qwen3:4b" in residency.report()
+
+
+def test_observe_counts_reloads_from_call_metadata(ollama_stub):
+    residency = ModelResidency(ollama_stub.url)
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    llm.role = "thinker"
+    llm.keep_alive = "10m"
+    llm.listeners.append(residency.observe)
+
+    ollama_stub.final = {"load_duration": 1_000_000}  # already resident
+    "".join(llm.generate("hi"))
+    ollama_stub.final = {"load_duration": 900_000_000}  # swapped back in
+    "".join(llm.generate("hi"))
+
+    assert residency.loads == {"m": 1}
+    assert ollama_stub.requests[-1]["keep_alive"] == "10m"
+
+
+def test_unreachable_server_is_not_fatal():
+    residency = ModelResidency("http://127.0.0.1:9")
+    assert residency.preload({"coder": "m"}) == {}
+    assert residency.report() == "resident: none"
+
+
+def test_default_endpoint_follows_the_config(ollama_stub, monkeypatch):
+    monkeypatch.setenv("LAPH_LLM_ENDPOINT", ollama_stub.url)
+    config.reset_config()
+    ollama_stub.loaded = ["qwen3:4b"]
+    assert ModelResidency().endpoint == ollama_stub.url
+    assert "resident: qwen3:4b" in ModelResidency().report()
+
+
+def test_warm_up_loads_each_model_where_its_role_is_routed(make_ollama_stub, monkeypatch, tmp_path):
+    pooled, pinned = make_ollama_stub(), make_ollama_stub()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LAPH_LLM_ENDPOINT", pooled.url)
+    config.reset_config()
+    endpoints.reset_endpoint_pool()
+    try:
+        loop = RepairLoop(RecordingLogger())
+        loop.coder.llm.endpoint = pinned.url
+        loop.warm_up()
+    finally:
+        endpoints.reset_endpoint_pool()
+    assert [r["model"] for r in pinned.requests] == [loop.coder.llm.model_name]
+    assert {r["model"] for r in pooled.requests} == {loop.thinker.llm.model_name, loop.evaluator.llm.model_name}
@@ -0,0 +1,64 @@
+"""Tests for the persistent LLM response cache."""
+
+import time
+
+from core.llm_interface import LLMInterface
+from core.response_cache import ResponseCache
+
+
+def test_hit_replays_chunks_without_server(ollama_stub, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"))
+    llm = LLMInterface("m", endpoint=ollama_stub.url, cache=cache)
+
+    first = list(llm.generate("hi"))
+    assert not llm.last_cached
+    second = list(llm.generate("hi"))
+    assert llm.last_cached
+    assert first == second == ["hello ", "world", ""]
+    assert len(ollama_stub.requests) == 1
+    assert cache.hits == 1
+
+
+def test_key_covers_model_prompt_and_options():
+    base = {"model": "m", "prompt": "p", "temperature": 0.0, "options": {}}
+    keys = {
+        ResponseCache.key(base),
+        ResponseCache.key({**base, "model": "other"}),
+        ResponseCache.key({**base, "prompt": "q"}),
+        ResponseCache.key({**base, "options": {"seed": 1}}),
+    }
+    assert len(keys) == 4
+
+
+def test_non_deterministic_calls_are_not_cached(ollama_stub, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"))
+    llm = LLMInterface("m", temperature=0.7, endpoint=ollama_stub.url, cache=cache)
+    list(llm.generate("hi"))
+    list(llm.generate("hi"))
+    assert len(ollama_stub.requests) == 2
+
+
+def test_failed_calls_are_not_cached(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"))
+    llm = LLMInterface("m", endpoint="http://127.0.0.1:9", cache=cache)
+    assert list(llm.generate("hi")) == []
+    assert llm.last_error
+    assert cache.get(cache.key(llm._payload("hi"))) is None
+
+
+def test_ttl_expiry(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"), ttl_seconds=0.01)
+    cache.put("k", ["a"])
+    time.sleep(0.02)
+    assert cache.get("k") is None
+
+
+def test_lru_eviction_respects_size_bound(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"), max_size_mb=200 / (1024 * 1024))
+    cache.put("old", ["x" * 80])
+    cache.put("recent", ["y" * 80])
+    assert cache.get("old") is not None  # touch "old" so "recent" is the LRU entry
+    cache.put("new", ["z" * 80])
+    assert cache.get("recent") is None
+    assert cache.get("old") is not None
+    assert cache.get("new") is not None
@@ -0,0 +1,153 @@
+"""Tests for similar-session retrieval."""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from core import retrieval
+from core.plugins.ollama_coder import OllamaCoder
+from core.plugins.ollama_thinker import OllamaThinker
+from core.prompt_manager import PromptManager
+from core.retrieval import Exemplar
+from core.solution_store import SolutionStore
+
+SOLVED = [
+    ("Print the prime numbers up to 50", "print([n for n in range(2, 51) if all(n % d for d in range(2, n))])"),
+    ("Reverse a string given on stdin", "print(input()[::-1])"),
+    ("Write a dice roller with input validation", "import random\nprint(random.randint(1, 6))"),
+]
+
+
+@pytest.fixture
+def shipped_plugins(tmp_path):
+    """The repo's configs/plugins.toml in the directory `stub_loop` runs in (request it first)."""
+    (tmp_path / "configs").mkdir()
+    shutil.copy(Path(__file__).parent.parent / "configs" / "plugins.toml", tmp_path / "configs")
+
+
+def _save_sessions(path, sessions, success=1):
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, timestamp TEXT, task TEXT, "
+        "final_code TEXT, iterations INTEGER, success INTEGER)"
+    )
+    db.executemany(
+        "INSERT INTO sessions VALUES (NULL, datetime('now'), ?, ?, 1, ?)",
+        [(task, code, success) for task, code in sessions],
+    )
+    db.commit()
+    db.close()
+
+
+def test_examples_go_into_the_thinker_and_coder_prefixes():
+    prompts = PromptManager()
+    plain = prompts.thinker_parts("task")[0]
+    prompts.examples = [Exemplar("Print primes", "print(2)")]
+    thinker_prefix, _ = prompts.thinker_parts("task", "code", "error")
+    coder_prefix, _ = prompts.coder_parts("spec")
+    for prefix in (thinker_prefix, coder_prefix):
+        assert "Example task: Print primes\nSolution:\n```python\nprint(2)\n```" in prefix
+    assert thinker_prefix.endswith("\n\nTask: task\n") and thinker_prefix != plain
+    prompts.examples = []
+    assert prompts.thinker_parts("task")[0] == plain
+
+
+def test_index_grows_incrementally_and_reloads_from_disk(tmp_path):
+    pytest.importorskip("numpy")
+    path = str(tmp_path / "laph.db")
+    _save_sessions(path, SOLVED)
+    _save_sessions(path, [("Print the prime numbers up to 10", "broken")], success=0)
+
+    index = retrieval.SessionIndex(path)
+    assert index.update() == 3
+    assert index.update() == 0
+    best_id, best = index.search("print prime numbers up to 60", k=2)[0]
+    assert best_id == 1 and best > 0.5
+
+    _save_sessions(path, [("Reverse every word of a sentence", "print(' '.join(w[::-1] for w in input().split()))")])
+    assert index.update() == 1
+    reloaded = retrieval.SessionIndex(path)
+    assert (reloaded.count, reloaded.last_id) == (4, 5)
+    assert reloaded.search("reverse each word in a sentence", k=1)[0][0] == 5
+
+
+def test_rows_written_after_the_saved_state_are_dropped(tmp_path):
+    pytest.importorskip("numpy")
+    path = str(tmp_path / "laph.db")
+    _save_sessions(path, SOLVED[:1])
+    index = retrieval.SessionIndex(path)
+    index.update()
+    with open(index._path("vectors.f32"), "ab") as f:
+        f.write(b"\0" * 100)
+
+    _save_sessions(path, SOLVED[1:])
+    index = retrieval.SessionIndex(path)
+    assert index.update() == 2
+    assert index.vectors.shape == (3, index.dim)
+    assert index.search("reverse a string from stdin", k=1)[0][0] == 2
+
+
+def test_idf_discounts_phrasing_shared_by_many_tasks(tmp_path):
+    pytest.importorskip("numpy")
+    path = str(tmp_path / "laph.db")
+    boilerplate = ["prints the current date", "sorts a list of numbers", "counts words in a file", "parses a csv file"]
+    _save_sessions(path, SOLVED + [(f"Write a Python program that {t}", "pass") for t in boilerplate])
+    index = retrieval.SessionIndex(path)
+    index.update()
+    (best_id, best), (_, runner_up) = index.search("Write a Python program that reverses a string given on stdin", k=2)
+    assert best_id == 2
+    assert best - runner_up > 0.25
+
+
+def test_sessions_of_an_invalidated_solution_are_no_examples(tmp_path):
+    pytest.importorskip("numpy")
+    path = str(tmp_path / "laph.db")
+    _save_sessions(path, SOLVED)
+    index = retrieval.SessionIndex(path)
+    assert index.exemplars("Print the prime numbers up to 70", k=1)[0].task == SOLVED[0][0]
+
+    SolutionStore(path).invalidate(SOLVED[0][0])
+    examples = index.exemplars("Print the prime numbers up to 70", k=3, min_similarity=0.0)
+    assert SOLVED[0][0] not in [e.task for e in examples]
+
+
+def test_exemplars_are_distinct_similar_and_compact(tmp_path):
+    pytest.importorskip("numpy")
+    path = str(tmp_path / "laph.db")
+    _save_sessions(path, SOLVED + [("print the prime numbers up to 50!", "x = 1\n" * 200)])
+    index = retrieval.SessionIndex(path)
+    examples = index.exemplars("Print prime numbers up to 100", k=2, min_similarity=0.3, max_chars=20)
+    # the two sessions of the same task count once
+    assert len(examples) == 1
+    assert examples[0].task.lower().startswith("print the prime numbers up to 50")
+    assert examples[0].code.endswith("\n# ...") and len(examples[0].code) <= 26
+    assert index.exemplars("completely unrelated zebra query", min_similarity=0.9) == []
+
+
+def test_loop_shows_similar_solutions_to_the_coder(stub_loop, ollama_stub):
+    pytest.importorskip("numpy")
+    retrieval.set_retrieval_enabled(True)
+    _save_sessions("laph.db", SOLVED)
+    ollama_stub.script = lambda payload: (
+        ["```python\nprint(2)\n```"] if payload["model"] == "coder-model" else ['```json\n{"spec": "primes"}\n```']
+    )
+    stub_loop.run_task("Print the prime numbers up to 70", max_iters=1, schedule="fixed")
+    coder_prompt = next(r["prompt"] for r in ollama_stub.requests if r["model"] == "coder-model")
+    assert "Example task: Print the prime numbers up to 50" in coder_prompt
+    assert "Reverse a string" not in coder_prompt
+
+
+def test_examples_reach_the_shipped_plugins(shipped_plugins, stub_loop, ollama_stub):
+    pytest.importorskip("numpy")
+    assert isinstance(stub_loop.thinker, OllamaThinker) and isinstance(stub_loop.coder, OllamaCoder)
+    retrieval.set_retrieval_enabled(True)
+    _save_sessions("laph.db", SOLVED)
+    ollama_stub.script = lambda payload: (
+        ["```python\nprint(2)\n```"] if payload["model"] == "coder-model" else ['```json\n{"spec": "primes"}\n```']
+    )
+    stub_loop.run_task("Print the prime numbers up to 70", max_iters=1, schedule="fixed")
+    for model in ("thinker-model", "coder-model"):
+        prompt = next(r["prompt"] for r in ollama_stub.requests if r["model"] == model)
+        assert "Example task: Print the prime numbers up to 50" in prompt
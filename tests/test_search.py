@@ -0,0 +1,51 @@
+"""Tests for beam search over repair attempts."""
+
+import sqlite3
+
+from core.candidates import Candidate
+from core.search import Frontier, Node, code_key
+
+PARTIAL = "```python\ndef double(x):\n    return x * 2 if x < 10 else 0\n```\n"
+FIXED = "```python\ndef double(x):\n    return x * 2\n```\n"
+TESTS = "```python\nassert double(2) == 4\nassert double(20) == 40\n```\n"
+
+
+def _node(code, score, passed=None, total=None):
+    return Node(Candidate(0, code, score=score, tests_passed=passed, tests_total=total), spec="s")
+
+
+def test_code_key_ignores_blank_lines_and_trailing_whitespace():
+    assert code_key("a = 1  \n\nb = 2\n") == code_key("a = 1\nb = 2")
+    assert code_key("a = 1") != code_key("a = 2")
+
+
+def test_frontier_ranks_by_score_and_tests_dedupes_and_prunes():
+    frontier = Frontier(max_size=2)
+    assert frontier.add(_node("a", 2.0))
+    assert frontier.add(_node("b", 2.0, passed=1, total=2))
+    assert not frontier.add(_node("a\n", 5.0))
+    assert not frontier.add(_node("c", 1.0))
+    assert (frontier.duplicates, frontier.pruned) == (1, 1)
+    assert [n.candidate.code for n in frontier.pop(1)] == ["b"]
+    assert [n.candidate.code for n in frontier.nodes] == ["a"]
+
+
+def test_beam_search_refines_the_partially_passing_attempt(stub_loop, ollama_stub, scripted_models):
+    scripted_models.spec = "double a number"
+    scripted_models.code = lambda payload: (FIXED if "1/2 tests passed" in payload["prompt"] else PARTIAL) + TESTS
+    result = stub_loop.run_task("double a number", max_iters=3, strategy="beam")
+    assert result == "def double(x):\n    return x * 2"
+    coder_prompts = [r["prompt"] for r in ollama_stub.requests if r["model"] == "coder-model"]
+    # the identical root candidates collapse into one node, expanded with two samples
+    assert len(coder_prompts) == 3 + 2
+    assert all("1/2 tests passed" in p for p in coder_prompts[3:])
+
+
+def test_exhausted_frontier_saves_the_rounds_run_and_the_best_attempt(stub_loop, ollama_stub, scripted_models):
+    scripted_models.spec = "double a number"
+    scripted_models.code = PARTIAL + TESTS
+    assert stub_loop.run_task("double a number", max_iters=5, strategy="beam") is None
+    db = sqlite3.connect("laph.db")
+    saved = db.execute("SELECT final_code, iterations, success FROM sessions").fetchall()
+    db.close()
+    assert saved == [("def double(x):\n    return x * 2 if x < 10 else 0", 2, 0)]
@@ -0,0 +1,60 @@
+"""Tests for the verified solution store."""
+
+import sqlite3
+
+import pytest
+
+from core import solution_store
+from core.solution_store import SolutionStore, normalise_task, task_key
+
+
+@pytest.fixture
+def reuse():
+    solution_store.set_solutions_enabled(True)
+
+
+def test_task_key_ignores_case_spacing_and_punctuation():
+    assert normalise_task("  Prime numbers,  up to 50!\n") == "prime numbers up to 50"
+    assert task_key("Prime numbers up to 50.") == task_key("prime   NUMBERS up to 50")
+    assert task_key("prime numbers up to 50") != task_key("prime numbers up to 60")
+
+
+def test_store_is_seeded_from_successful_sessions(tmp_path):
+    path = str(tmp_path / "laph.db")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE sessions (id INTEGER PRIMARY KEY, timestamp TEXT, task TEXT, "
+        "final_code TEXT, iterations INTEGER, success INTEGER)"
+    )
+    db.executemany(
+        "INSERT INTO sessions VALUES (NULL, datetime('now'), ?, ?, 1, ?)",
+        [("Say hi", "print('hi')", 1), ("say hi!", "print('hi!')", 1), ("fail", "broken", 0)],
+    )
+    db.commit()
+    db.close()
+
+    store = SolutionStore(path)
+    assert store.lookup("SAY HI").code == "print('hi!')"
+    assert store.lookup("fail") is None
+    store.invalidate("say hi")
+    assert store.lookup("say hi") is None
+
+
+def test_repeated_task_reuses_verified_solution(stub_loop, ollama_stub, scripted_models, reuse):
+    assert stub_loop.run_task("Print 42.", max_iters=2, schedule="fixed") == "print(42)"
+
+    ollama_stub.requests.clear()
+    assert stub_loop.run_task("  print 42 ", max_iters=2, schedule="fixed") == "print(42)"
+    assert ollama_stub.requests == []
+    assert stub_loop.telemetry.current == 0
+    assert stub_loop.last_success is True
+    assert solution_store.get_solution_store().lookup("print 42").hits == 1
+
+
+def test_stale_solution_is_invalidated_and_task_solved_again(stub_loop, ollama_stub, scripted_models, reuse):
+    store = solution_store.get_solution_store()
+    store.put("print 42", "print(undefined)")
+
+    assert stub_loop.run_task("print 42", max_iters=2, schedule="fixed") == "print(42)"
+    assert any(r["model"] == "coder-model" for r in ollama_stub.requests)
+    assert store.lookup("print 42").code == "print(42)"
@@ -0,0 +1,95 @@
+"""Tests for early stream termination predicates."""
+
+from core.llm_interface import LLMInterface
+from core.plugins.ollama_coder import OllamaCoder
+from core.plugins.ollama_thinker import OllamaThinker
+from core.response_cache import ResponseCache
+from core.stop_conditions import FirstJsonBlock, TrailingProse
+
+
+def _stop_point(predicate, chunks):
+    """Return the text seen when `predicate` fires (or all text)."""
+    seen = ""
+    for chunk in chunks:
+        seen += chunk
+        if predicate(chunk):
+            break
+    return seen
+
+
+def _chunked(text, size=3):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def test_first_json_block_stops_after_closing_fence():
+    full = 'Sure!\n```json\n{"spec": "Do X"}\n```\nHere is why I chose this...' * 2
+    seen = _stop_point(FirstJsonBlock(), _chunked(full))
+    assert len(seen) < len(full) / 2
+    thinker = OllamaThinker()
+    assert thinker._parse(seen) == thinker._parse(full) == "Do X"
+
+
+def test_first_json_block_ignores_python_fences():
+    full = "```python\nx = 1\n```\n" + "```json\n{\"spec\": \"s\"}\n```" + " trailing"
+    seen = _stop_point(FirstJsonBlock(), _chunked(full, 2))
+    assert '"spec"' in seen
+    assert not seen.endswith("trailing")
+
+
+def test_trailing_prose_preserves_code_and_tests_split():
+    full = (
+        "```python\ndef f():\n    return 1\n```\n"
+        "Tests:\n"
+        "```\nassert f() == 1\n```\n" + "This implementation is great because " * 20
+    )
+    seen = _stop_point(TrailingProse(max_chars=50), _chunked(full, 5))
+    assert len(seen) < len(full)
+    coder = OllamaCoder()
+    assert coder._parse(seen) == coder._parse(full)
+    assert coder._parse(seen)[1] == "assert f() == 1"
+
+
+def test_trailing_prose_waits_for_tests_after_an_explanation():
+    full = (
+        "```python\ndef f():\n    return 1\n```\n"
+        + "This works because f returns one. " * 10
+        + "\nHere are tests:\n```python\nassert f() == 1\n```\n"
+    )
+    seen = _stop_point(TrailingProse(), _chunked(full, 5))
+    coder = OllamaCoder()
+    assert coder._parse(seen) == coder._parse(full) == ("def f():\n    return 1", "assert f() == 1")
+
+
+def test_trailing_prose_waits_inside_open_fence():
+    predicate = TrailingProse(max_chars=5)
+    assert not predicate("```python\nx = 1\n```\n```python\n" + "assert x == 1\n" * 50)
+    assert not predicate("```")
+    assert predicate("\nlots of trailing words")
+
+
+def test_generate_until_closes_stream_early(ollama_stub):
+    ollama_stub.chunks = ["```json\n", '{"spec": "a"}\n', "```", " more", " words"]
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    out = "".join(llm.generate("hi", until=FirstJsonBlock()))
+    assert out == '```json\n{"spec": "a"}\n```'
+    assert llm.last_stopped
+    assert llm.last_error is None
+
+
+def test_stop_sequences_are_sent_to_server(ollama_stub):
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    "".join(llm.generate("hi", stop=["\n\n"]))
+    assert ollama_stub.requests[-1]["options"]["stop"] == ["\n\n"]
+
+
+def test_cached_early_stops_are_keyed_by_the_condition_settings(ollama_stub, tmp_path):
+    ollama_stub.chunks = ["```python\nx = 1\n```\n", "```python\nassert x == 1\n```\n", "trailing words", " and more"]
+    llm = LLMInterface("m", endpoint=ollama_stub.url, cache=ResponseCache(str(tmp_path / "responses.db")))
+    short = "".join(llm.generate("hi", until=TrailingProse(max_chars=5)))
+    full = "".join(llm.generate("hi", until=TrailingProse(max_chars=1000)))
+    assert short.endswith("trailing words") and full.endswith(" and more")
+    assert "".join(llm.generate("hi", until=TrailingProse(max_chars=5))) == short
+    assert llm.last_cached
+    assert len(ollama_stub.requests) == 2
+    "".join(llm.generate("hi", until=lambda chunk: False))
+    assert len(ollama_stub.requests) == 3
@@ -0,0 +1,82 @@
+"""Tests for the incremental fenced-block parser shared by all roles."""
+
+import json
+
+import pytest
+
+from core.stream_parser import (
+    StreamParser,
+    extract_code,
+    extract_json,
+    extract_spec,
+    split_code_and_tests,
+    streamed_field,
+)
+
+CODER_OUTPUT = (
+    "Here you go:\n```python\ndef add(a, b):\n    return a + b\n```\n"
+    "Some text\n```\nassert add(1, 2) == 3\n```\nDone."
+)
+
+
+def feed_in_chunks(text, size):
+    parser = StreamParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i : i + size])
+    return parser
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_fences_split_across_chunks(size):
+    parser = feed_in_chunks(CODER_OUTPUT, size)
+    assert [b.lang for b in parser.blocks] == ["python", ""]
+    assert parser.blocks[0].body == "def add(a, b):\n    return a + b\n"
+    assert parser.text == CODER_OUTPUT
+    assert not parser.inside
+
+
+def test_blocks_are_emitted_when_they_close():
+    seen = []
+    parser = StreamParser(on_block=seen.append)
+    assert parser.feed("```json\n{\"spec\": ") == []
+    assert parser.inside
+    closed = parser.feed("\"x\"}\n``` trailing")
+    assert [b.lang for b in closed] == ["json"] == [b.lang for b in seen]
+    assert parser.tail_length == len(" trailing")
+
+
+def test_partial_closing_fence_is_not_counted_as_prose():
+    parser = StreamParser()
+    parser.feed("```python\nx = 1\n```\nmore``")
+    assert parser.tail_length == len("\nmore")
+
+
+def test_split_code_and_tests_semantics():
+    assert split_code_and_tests(CODER_OUTPUT) == ("def add(a, b):\n    return a + b", "assert add(1, 2) == 3")
+    assert split_code_and_tests("print(1)") == ("print(1)", None)
+    two_code = "```python\na = 1\n```\n```python\nb = 2\n```"
+    assert split_code_and_tests(two_code) == ("a = 1", None)
+
+
+def test_extract_code_and_spec():
+    assert extract_code('Some text\n```python\nprint("hello")\n```\nTrailing') == 'print("hello")'
+    assert extract_spec('```json\n{"spec": "Do the thing"}\n```') == "Do the thing"
+    assert extract_spec("```\nplain spec\n```") == "plain spec"
+
+
+def test_extract_json_fallback_and_errors():
+    assert extract_json('noise {"actions": []} noise') == {"actions": []}
+    assert extract_json("no json here") is None
+    with pytest.raises(json.JSONDecodeError):
+        extract_json("```json\n{broken\n```")
+
+
+def test_streamed_field_is_available_before_the_block_closes():
+    parser = StreamParser()
+    parser.feed('```json\n{"spec": "say \\"hi')
+    assert streamed_field(parser, "spec") is None
+    parser.feed('\\"", "more": ')
+    assert streamed_field(parser, "spec") == 'say "hi"'
+    assert streamed_field(parser, "more") is None
+    parser.feed("1}\n```")
+    assert streamed_field(parser, "spec") == 'say "hi"'
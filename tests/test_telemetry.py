@@ -0,0 +1,54 @@
+"""Tests for per-call inference telemetry."""
+
+from core.llm_interface import LLMInterface
+from core.telemetry import CallStats, StatsTotals
+
+FINAL = {
+    "prompt_eval_count": 400,
+    "prompt_eval_duration": 2_000_000_000,
+    "eval_count": 50,
+    "eval_duration": 1_000_000_000,
+    "load_duration": 500_000_000,
+    "total_duration": 3_600_000_000,
+}
+
+
+def test_call_stats_from_final_chunk(ollama_stub):
+    ollama_stub.final = FINAL
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    llm.role = "coder"
+    "".join(llm.generate("hi"))
+
+    stats = llm.last_stats
+    assert (stats.model, stats.role) == ("m", "coder")
+    assert stats.prompt_tokens == 400 and stats.eval_tokens == 50
+    assert stats.prefill_s == 2.0 and stats.decode_s == 1.0 and stats.load_s == 0.5
+    assert stats.tokens_per_s == 50.0
+    assert stats.ttft_s is not None and stats.ttft_s <= stats.wall_s
+
+
+def test_totals_classify_bottleneck():
+    totals = StatsTotals()
+    totals.add(CallStats.from_metadata("m", "thinker", FINAL))
+    assert totals.bound == "prompt-bound"
+    totals.add(CallStats("m", load_s=10.0))
+    assert totals.bound == "reload-bound"
+
+
+def test_repair_loop_aggregates_per_iteration(stub_loop, ollama_stub, strict_evaluation):
+    ollama_stub.final = FINAL
+    ollama_stub.script = lambda p: {
+        "coder-model": ["```python\nprint(1)\n```"],
+        "evaluator-model": ["YES"],
+    }.get(p["model"], ['```json\n{"spec": "print 1"}\n```'])
+
+    assert stub_loop.run_task("print 1", max_iters=1) == "print(1)"
+
+    iteration = stub_loop.telemetry.iteration_totals(1)
+    assert iteration.calls == 3
+    # the thinker stream is cut at the closing fence, before the final chunk
+    assert iteration.prompt_tokens == 800
+    assert [s.stopped for s in stub_loop.telemetry.calls()] == [True, False, False]
+    roles = stub_loop.telemetry.by_role()
+    assert set(roles) == {"thinker", "coder", "evaluator"}
+    assert any("[Telemetry] task: 3 calls" in m for m in stub_loop.logger.messages)
@@ -0,0 +1,42 @@
+"""Tests for counting passing tests in coder-written test blocks."""
+
+import subprocess
+import sys
+
+from core.test_harness import MARKER, instrument, read_results
+
+CODE = "def add(a, b):\n    return a + b\n"
+TESTS = (
+    "assert add(1, 2) == 3\n"
+    "assert add(1, 1) == 3\n"
+    "def test_zero():\n    assert add(0, 0) == 0\n"
+    "test_zero()\n"
+    "def test_boom():\n    raise ValueError('boom')\n"
+)
+
+
+def _run(source):
+    result = subprocess.run([sys.executable, "-c", source], capture_output=True, text=True, timeout=10)
+    return result.stdout, result.stderr, result.returncode
+
+
+def test_every_case_runs_and_failures_still_fail_the_process():
+    source, cases = instrument(TESTS)
+    assert cases == 4
+    stdout, stderr, exitcode = _run(CODE + "\nprint('hello')\n" + source)
+    assert read_results(stdout) == ("hello\n", 2, 4)
+    assert exitcode == 1
+    assert "FAILED line 2: AssertionError" in stderr and "FAILED test_boom: ValueError: boom" in stderr
+
+
+def test_passing_tests_exit_cleanly():
+    source, _ = instrument("assert add(2, 2) == 4\n")
+    stdout, stderr, exitcode = _run(CODE + source)
+    assert (read_results(stdout)[1:], stderr, exitcode) == ((1, 1), "", 0)
+
+
+def test_unparseable_or_caseless_tests_are_left_alone():
+    assert instrument("assert (") is None
+    assert instrument("x = 1\n") is None
+    assert read_results("no marker\n") == ("no marker\n", None, None)
+    assert read_results(f"{MARKER} x y\n")[1] is None
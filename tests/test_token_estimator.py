@@ -0,0 +1,54 @@
+"""Tests for token estimation and automatic num_ctx sizing."""
+
+from core.llm_interface import LLMInterface
+from core.token_estimator import ContextSizer, TokenEstimator
+
+
+def test_estimator_calibrates_and_ignores_implausible_samples():
+    estimator = TokenEstimator(chars_per_token=4.0)
+    assert estimator.estimate("m", "x" * 400) == 100
+    estimator.calibrate("m", 400, 200)
+    assert estimator.estimate("m", "x" * 400) == 200
+    # a prompt mostly served from the server's prefix cache reports few tokens
+    estimator.calibrate("m", 4000, 10)
+    assert estimator.ratio("m") == 2.0
+    assert estimator.estimate("other", "x" * 400) == 100
+
+
+def test_sizer_picks_smallest_fitting_bucket_and_never_shrinks():
+    sizer = ContextSizer(TokenEstimator(chars_per_token=4.0), buckets=[2048, 4096, 8192], expected_output=500)
+    assert sizer.num_ctx("m", "x" * 400) == (2048, False)
+    assert sizer.num_ctx("m", "x" * 16000) == (8192, False)
+    # switching back down would force a model reload
+    assert sizer.num_ctx("m", "x" * 400) == (8192, False)
+    assert sizer.num_ctx("other", "x" * 400, output_tokens=1) == (2048, False)
+
+
+def test_context_tokens_count_towards_the_window():
+    sizer = ContextSizer(TokenEstimator(), buckets=[2048, 4096], expected_output=0)
+    assert sizer.num_ctx("m", "delta", context_tokens=3000)[0] == 4096
+
+
+def test_oversized_prompt_is_flagged():
+    sizer = ContextSizer(TokenEstimator(chars_per_token=1.0), buckets=[2048])
+    assert sizer.num_ctx("m", "x" * 5000) == (2048, True)
+
+
+def test_loop_reports_a_truncation_risk_once(stub_loop, scripted_models):
+    stub_loop.coder.llm.sizer = ContextSizer(TokenEstimator(chars_per_token=0.1), buckets=[2048])
+    stub_loop.run_task("print 42", max_iters=1, schedule="fixed")
+    warnings = [m for m in stub_loop.logger.messages if m.startswith("[num_ctx]")]
+    assert warnings == ["[num_ctx] coder prompt may exceed the largest context window (2048 tokens) and be truncated"]
+
+
+def test_requests_carry_num_ctx_and_calibrate(ollama_stub):
+    ollama_stub.final = {"prompt_eval_count": 100}
+    llm = LLMInterface("m", endpoint=ollama_stub.url)
+    llm.sizer = ContextSizer(TokenEstimator(), buckets=[2048, 4096])
+    "".join(llm.generate("x" * 300))
+    assert ollama_stub.requests[-1]["options"]["num_ctx"] == 2048
+    assert llm.last_num_ctx == 2048
+    assert llm.sizer.estimator.ratio("m") == 3.0
+
+    "".join(llm.generate("hi", options={"num_ctx": 999}))
+    assert ollama_stub.requests[-1]["options"]["num_ctx"] == 999